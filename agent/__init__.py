@@ -1,4 +1,5 @@
 from .routes import router
 from .graph_agent import create_agent
+from .registry import agent_registry
 
-__all__ = ["router", "create_agent"]
+__all__ = ["router", "create_agent", "agent_registry"]
@@ -5,7 +5,15 @@ Provides REST API endpoints for semantic search and document management
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from .rag_service import RAGService, QueryRequest, QueryResponse, DocumentRequest
+from datetime import datetime
+from .rag_service import (
+    RAGService,
+    QueryRequest,
+    QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResponse,
+    DocumentRequest
+)
 
 
 # Create router
@@ -19,7 +27,7 @@ def get_rag_service() -> RAGService:
     """Dependency to get RAG service instance"""
     global _rag_service
     if _rag_service is None:
-        _rag_service = RAGService()
+        _rag_service = RAGService(index_name="api")
     return _rag_service
 
 
@@ -41,6 +49,13 @@ class StatsResponse(BaseModel):
     initialized: bool
     document_count: int
     embedding_model: Optional[str] = None
+    embedding_dimension: Optional[int] = None
+    source_document_count: Optional[int] = None
+    chunk_count: Optional[int] = None
+    index_type: Optional[str] = None
+    index_bytes: Optional[int] = None
+    memory_bytes: Optional[int] = None
+    last_ingest_at: Optional[datetime] = None
 
 
 @router.post("/search", response_model=QueryResponse)
@@ -58,7 +73,7 @@ async def semantic_search(
         Search results with relevance scores
     """
     try:
-        results = rag_service.semantic_search(
+        results = await rag_service.asemantic_search(
             query=request.query,
             k=request.k,
             filter_dict=request.filter
@@ -77,6 +92,41 @@ async def semantic_search(
         )
 
 
+@router.post("/search/batch", response_model=BatchQueryResponse)
+async def semantic_search_batch(
+    request: BatchQueryRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Perform semantic search for many queries in one call
+
+    Args:
+        request: Queries with shared search parameters
+
+    Returns:
+        Per-query search results, in request order
+    """
+    try:
+        batch_results = await rag_service.asearch_many(
+            queries=request.queries,
+            k=request.k,
+            filter_dict=request.filter
+        )
+
+        results = [
+            QueryResponse(query=query, results=query_results, count=len(query_results))
+            for query, query_results in zip(request.queries, batch_results)
+        ]
+
+        return BatchQueryResponse(results=results, count=len(results))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+
 @router.post("/documents", response_model=DocumentsResponse)
 async def add_documents(
     request: DocumentsRequest,
@@ -92,7 +142,7 @@ async def add_documents(
         Success status and number of chunks added
     """
     try:
-        count = rag_service.add_documents(
+        count = await rag_service.aadd_documents(
             documents=request.documents,
             metadatas=request.metadatas
         )
@@ -125,7 +175,7 @@ async def add_single_document(
         Success status
     """
     try:
-        count = rag_service.add_documents(
+        count = await rag_service.aadd_documents(
             documents=[request.content],
             metadatas=[request.metadata] if request.metadata else None
         )
@@ -0,0 +1,161 @@
+"""
+Context Builder
+Assembles retrieved chunks into a prompt context that fits a token budget:
+ranks hits, removes duplicated and overlapping text, and truncates the tail
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from agent.llm_client import llm_client
+from config.settings import settings
+import hashlib
+
+
+@dataclass
+class BuiltContext:
+    """Prompt context and what went into it"""
+    text: str
+    tokens: int
+    used: List[Dict[str, Any]] = field(default_factory=list)
+    duplicates: int = 0
+    truncated: bool = False
+
+
+def _overlap(left: str, right: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    longest = min(len(left), len(right), max_overlap)
+    for k in range(longest, min_overlap - 1, -1):
+        if left.endswith(right[:k]):
+            return k
+    return 0
+
+
+class ContextBuilder:
+    """Token-budgeted context assembly for retrieved vector store hits"""
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        token_budget: int = 2048,
+        separator: str = "\n\n",
+        min_overlap: int = 32,
+        max_overlap: int = 512
+    ):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+        self.separator = separator
+        self.min_overlap = min_overlap
+        self.max_overlap = max_overlap
+
+    def _rank(self, results: List[Dict[str, Any]], higher_is_better: bool) -> List[Dict[str, Any]]:
+        """Order hits from most to least similar"""
+        def key(result):
+            distance = result.get("distance")
+            if distance is None:
+                return 0.0
+            return -distance if higher_is_better else distance
+        return sorted(results, key=key)
+
+    def _deduplicate(self, texts: List[str]) -> List[Optional[str]]:
+        """Drop repeated chunks and trim text that overlaps an earlier chunk"""
+        seen = set()
+        kept: List[str] = []
+        output: List[Optional[str]] = []
+
+        for text in texts:
+            text = (text or "").strip()
+            digest = hashlib.sha1(" ".join(text.split()).encode("utf-8")).digest()
+            if not text or digest in seen or any(text in other for other in kept):
+                output.append(None)
+                continue
+            seen.add(digest)
+
+            # Neighbouring chunks of one document share the splitter overlap
+            for other in kept:
+                head = _overlap(other, text, self.min_overlap, self.max_overlap)
+                if head:
+                    text = text[head:].lstrip()
+                tail = _overlap(text, other, self.min_overlap, self.max_overlap)
+                if tail:
+                    text = text[:-tail].rstrip()
+
+            if not text:
+                output.append(None)
+                continue
+            kept.append(text)
+            output.append(text)
+
+        return output
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens (binary search on characters)"""
+        # A token covers at most a few dozen characters
+        lo, hi = 0, min(len(text), max_tokens * 32)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count_tokens(text[:mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo].rstrip()
+
+    def build(
+        self,
+        results: List[Dict[str, Any]],
+        higher_is_better: bool = False,
+        token_budget: Optional[int] = None
+    ) -> BuiltContext:
+        """
+        Build the prompt context from search results
+
+        Args:
+            results: Vector store hits with "text" and "distance"
+            higher_is_better: Whether larger distances mean more similar
+            token_budget: Overrides the default budget
+
+        Returns:
+            Context text, its token count, and the hits it includes
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        ranked = self._rank(results, higher_is_better)
+        texts = self._deduplicate([result.get("text") for result in ranked])
+
+        separator_tokens = self.count_tokens(self.separator)
+        context = BuiltContext(text="", tokens=0)
+        parts = []
+
+        for result, text in zip(ranked, texts):
+            if text is None:
+                context.duplicates += 1
+                continue
+
+            cost = separator_tokens if parts else 0
+            remaining = budget - context.tokens - cost
+            if remaining <= 0:
+                context.truncated = True
+                break
+
+            tokens = self.count_tokens(text)
+            if tokens > remaining:
+                text = self._truncate(text, remaining)
+                if not text:
+                    context.truncated = True
+                    break
+                tokens = self.count_tokens(text)
+                context.truncated = True
+
+            parts.append(text)
+            context.used.append(result)
+            context.tokens += tokens + cost
+
+            if context.truncated:
+                break
+
+        context.text = self.separator.join(parts)
+        return context
+
+
+# Shared builder using the LLM's tokenizer
+context_builder = ContextBuilder(
+    count_tokens=llm_client.count_tokens,
+    token_budget=min(settings.AGENT_CONTEXT_TOKEN_BUDGET, settings.LLM_CONTEXT_LENGTH // 2)
+)
@@ -0,0 +1,79 @@
+"""
+Micro-Batching Embedding Scheduler
+Coalesces concurrent single-text embedding requests into one batched model call
+"""
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+from monitoring.metrics import embedding_batch_size
+import asyncio
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests for up to ``max_wait_ms`` (or ``max_batch_size``
+    texts) and embeds them with a single call, fanning vectors back to callers
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text as part of the next batch"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Requests queued on a previous event loop can never complete
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch everything queued so far as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        embedding_batch_size.observe(len(texts))
+
+        try:
+            vectors = await self.embed_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
@@ -0,0 +1,417 @@
+"""
+Content-Addressed Embedding Cache
+Shares embeddings across LLMClient and RAGService with an in-process LRU tier
+and an on-disk memory-mapped float32 tier
+"""
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from config.settings import settings
+from common.executor import compute_executor
+from agent.embedding_batcher import EmbeddingBatcher
+from monitoring.metrics import embedding_cache_hits_total, embedding_cache_misses_total
+import numpy as np
+import threading
+import hashlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+def text_hash(text: str) -> str:
+    """Content hash used as the cache key for a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_identity(embeddings: Embeddings) -> str:
+    """
+    Cache identity of an embeddings model: class, name and revision
+
+    The revision is the configured one, else the hub commit the weights were
+    loaded from, so a model update (or a stand-in model with the same name)
+    never reads vectors cached for another one.
+    """
+    name = getattr(embeddings, "model_name", "")
+    revision = (getattr(embeddings, "model_kwargs", None) or {}).get("revision")
+    if not revision:
+        try:
+            revision = embeddings.client[0].auto_model.config._commit_hash
+        except (AttributeError, IndexError, KeyError, TypeError):
+            revision = None
+    identity = f"{embeddings.__class__.__name__}-{name}" if name else embeddings.__class__.__name__
+    return f"{identity}@{revision[:12]}" if revision else identity
+
+
+def cache_namespace(model_name: str, normalize: bool) -> str:
+    """Namespace for a (model name, normalize flag) pair"""
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+    return f"{safe_name}__norm{int(normalize)}"
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only float32 vector file plus key index for one namespace
+
+    Vectors live in ``vectors.f32`` and are read through a read-only memory map,
+    so lookups are page-cache reads. ``keys.tsv`` maps text hashes to row numbers.
+    Appends take an exclusive file lock so several workers can share a directory.
+    A writer that dies between the vector and key appends can leave a torn
+    tail; opening the store truncates both files back to the rows they agree on.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.tsv")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.dimension: Optional[int] = None
+
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._mapped_rows = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.dimension = json.load(f)["dimension"]
+        self._repair()
+        self._read_new_keys()
+
+    def _lock_file(self, f):
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+
+    def _unlock_file(self, f):
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _repair(self):
+        """Truncate vectors and keys to the rows both files fully contain"""
+        if self.dimension is None or not os.path.exists(self.vectors_path):
+            return
+        row_bytes = 4 * self.dimension
+
+        with open(self.keys_path, "a+b") as keys_file:
+            self._lock_file(keys_file)
+            try:
+                rows = os.path.getsize(self.vectors_path) // row_bytes
+                keys_file.seek(0)
+                data = keys_file.read()
+
+                # Keep complete key lines up to the first one whose vector is missing
+                valid_bytes = 0
+                key_rows = 0
+                for line in data.splitlines(keepends=True):
+                    if not line.endswith(b"\n"):
+                        break
+                    row = int(line.split(b"\t")[1])
+                    if row >= rows:
+                        break
+                    valid_bytes += len(line)
+                    key_rows = max(key_rows, row + 1)
+
+                if valid_bytes < len(data):
+                    keys_file.truncate(valid_bytes)
+                # Drops partial rows and rows whose keys were never written
+                if os.path.getsize(self.vectors_path) != key_rows * row_bytes:
+                    os.truncate(self.vectors_path, key_rows * row_bytes)
+            finally:
+                self._unlock_file(keys_file)
+
+    def _read_new_keys(self):
+        """Pick up keys appended since the last read (possibly by other processes)"""
+        if not os.path.exists(self.keys_path):
+            return
+        if os.path.getsize(self.keys_path) == self._keys_offset:
+            return
+
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+
+        # Only consume complete lines; a partial line is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            key, row = line.decode("ascii").split("\t")
+            self._rows[key] = int(row)
+        self._keys_offset += end
+
+    def _vector(self, row: int) -> np.ndarray:
+        if row >= self._mapped_rows:
+            # Remap to cover rows appended since the last mapping
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dimension)
+            self._mmap = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension)
+            )
+            self._mapped_rows = rows
+        return np.array(self._mmap[row])
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors by key"""
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._read_new_keys()
+            if self.dimension is None:
+                return [None] * len(keys)
+            return [
+                self._vector(self._rows[key]) if key in self._rows else None
+                for key in keys
+            ]
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]):
+        """Append vectors for keys not already stored"""
+        with self._lock:
+            items = [(key, vector) for key, vector in items if key not in self._rows]
+            if not items:
+                return
+
+            if self.dimension is None:
+                self.dimension = int(items[0][1].shape[0])
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dimension": self.dimension}, f)
+
+            with open(self.vectors_path, "ab") as vectors_file, \
+                    open(self.keys_path, "ab") as keys_file:
+                self._lock_file(keys_file)
+                try:
+                    size = os.fstat(vectors_file.fileno()).st_size
+                    first_row = size // (4 * self.dimension)
+                    if size != first_row * 4 * self.dimension:
+                        # A partial row from a crashed writer would shift every later row
+                        vectors_file.truncate(first_row * 4 * self.dimension)
+                    block = np.stack([vector for _, vector in items]).astype(np.float32)
+                    vectors_file.write(block.tobytes())
+                    vectors_file.flush()
+
+                    lines = "".join(
+                        f"{key}\t{first_row + i}\n" for i, (key, _) in enumerate(items)
+                    )
+                    keys_file.write(lines.encode("ascii"))
+                    keys_file.flush()
+                finally:
+                    self._unlock_file(keys_file)
+
+            self._read_new_keys()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (model name, normalize flag, text hash)"""
+
+    def __init__(self, max_entries: int = 10000, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._stores: Dict[str, DiskEmbeddingStore] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, namespace: str) -> Optional[DiskEmbeddingStore]:
+        if not self.cache_dir:
+            return None
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None:
+                store = DiskEmbeddingStore(os.path.join(self.cache_dir, namespace))
+                self._stores[namespace] = store
+            return store
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(
+        self,
+        model_name: str,
+        normalize: bool,
+        texts: List[str]
+    ) -> List[Optional[np.ndarray]]:
+        """Return cached vectors, or None for texts that are not cached"""
+        namespace = cache_namespace(model_name, normalize)
+        hashes = [text_hash(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        disk_lookups = []
+
+        with self._lock:
+            for i, h in enumerate(hashes):
+                vector = self._lru.get((namespace, h))
+                if vector is not None:
+                    self._lru.move_to_end((namespace, h))
+                    results[i] = vector
+                else:
+                    disk_lookups.append(i)
+
+        memory_hits = len(texts) - len(disk_lookups)
+        disk_hits = 0
+
+        store = self._store(namespace)
+        if store is not None and disk_lookups:
+            vectors = store.get_many([hashes[i] for i in disk_lookups])
+            with self._lock:
+                for i, vector in zip(disk_lookups, vectors):
+                    if vector is not None:
+                        results[i] = vector
+                        self._remember((namespace, hashes[i]), vector)
+                        disk_hits += 1
+
+        if memory_hits:
+            embedding_cache_hits_total.labels(tier="memory").inc(memory_hits)
+        if disk_hits:
+            embedding_cache_hits_total.labels(tier="disk").inc(disk_hits)
+        misses = len(disk_lookups) - disk_hits
+        if misses:
+            embedding_cache_misses_total.inc(misses)
+
+        return results
+
+    def put_many(
+        self,
+        model_name: str,
+        normalize: bool,
+        texts: List[str],
+        vectors: List[List[float]]
+    ):
+        """Store freshly computed vectors in both tiers"""
+        namespace = cache_namespace(model_name, normalize)
+        items = [
+            (text_hash(text), np.asarray(vector, dtype=np.float32))
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            for h, vector in items:
+                self._remember((namespace, h), vector)
+
+        store = self._store(namespace)
+        if store is not None:
+            store.put_many(items)
+
+    def clear(self):
+        """Drop the in-process tier (the disk tier is left intact)"""
+        with self._lock:
+            self._lru.clear()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that consults the embedding cache before the model
+
+    Async calls run the model, and disk-tier cache reads and writes, through the
+    shared compute executor so embedding never blocks the event loop. Async
+    query misses are micro-batched when a batcher is configured. ``cache`` may
+    be None to only get the executor.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        cache: Optional[EmbeddingCache],
+        batch_size: int = 0,
+        batch_wait_ms: float = 5.0
+    ):
+        self.base = base
+        self.cache = cache
+        self.model_name = model_identity(base)
+        encode_kwargs = getattr(base, "encode_kwargs", None) or {}
+        self.normalize = bool(encode_kwargs.get("normalize_embeddings", False))
+
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if batch_size > 1:
+            self.batcher = EmbeddingBatcher(
+                self._aembed_missing,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms
+            )
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Optional[np.ndarray]], List[str]]:
+        """Return cached vectors and the unique texts that still need the model"""
+        if self.cache is None:
+            return [None] * len(texts), list(dict.fromkeys(texts))
+        cached = self.cache.get_many(self.model_name, self.normalize, texts)
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(texts, cached) if vector is None
+        ))
+        return cached, missing
+
+    def _merge(
+        self,
+        texts: List[str],
+        cached: List[Optional[np.ndarray]],
+        missing: List[str],
+        vectors: List[List[float]]
+    ) -> List[List[float]]:
+        if self.cache is not None and missing:
+            self.cache.put_many(self.model_name, self.normalize, missing, vectors)
+        computed = dict(zip(missing, vectors))
+        return [
+            vector.tolist() if vector is not None else computed[text]
+            for text, vector in zip(texts, cached)
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only the texts that are not cached"""
+        cached, missing = self._lookup(texts)
+        vectors = self.base.embed_documents(missing) if missing else []
+        return self._merge(texts, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        cached, missing = self._lookup([text])
+        vectors = [self.base.embed_query(text)] if missing else []
+        return self._merge([text], cached, missing, vectors)[0]
+
+    async def _run_cache(self, fn, *args):
+        """Run a cache call in the I/O pool when it may touch the disk tier"""
+        if self.cache is not None and self.cache.cache_dir:
+            return await compute_executor.run_io(fn, *args)
+        return fn(*args)
+
+    async def _aembed_missing(self, texts: List[str]) -> List[List[float]]:
+        """Embed uncached texts in the compute executor and store them"""
+        vectors = await compute_executor.embed(self.base, texts)
+        if self.cache is not None:
+            await self._run_cache(
+                self.cache.put_many, self.model_name, self.normalize, texts, vectors
+            )
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in the compute executor, skipping cached texts"""
+        cached, missing = await self._run_cache(self._lookup, texts)
+        vectors = await compute_executor.embed(self.base, missing) if missing else []
+        return await self._run_cache(self._merge, texts, cached, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single query, coalescing concurrent misses into one batch"""
+        if self.batcher is None:
+            return (await self.aembed_documents([text]))[0]
+
+        cached, missing = await self._run_cache(self._lookup, [text])
+        if not missing:
+            return cached[0].tolist()
+        return await self.batcher.embed(text)
+
+
+# Shared cache instance
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    cache_dir=settings.EMBEDDING_CACHE_DIR
+)
+
+
+def with_embedding_cache(embeddings: Embeddings) -> CachedEmbeddings:
+    """Wrap an embeddings model with the shared cache, executor and micro-batcher"""
+    cache = embedding_cache if settings.EMBEDDING_CACHE_ENABLED else None
+    batch_size = settings.EMBEDDING_BATCH_MAX_SIZE if settings.EMBEDDING_BATCH_ENABLED else 0
+    return CachedEmbeddings(
+        embeddings,
+        cache,
+        batch_size=batch_size,
+        batch_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+    )
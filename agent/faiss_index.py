@@ -0,0 +1,138 @@
+"""
+FAISS Index Management
+Builds IVF, HNSW and PQ/SQ-quantized FAISS indexes for RAGService and promotes
+exact flat indexes to ANN indexes once the corpus grows past a threshold
+"""
+import numpy as np
+import math
+import faiss
+
+
+INDEX_TYPES = ("flat", "ivf", "ivf_sq8", "ivf_pq", "hnsw")
+
+
+def auto_nlist(ntotal: int) -> int:
+    """Number of IVF lists for a corpus: ~4*sqrt(n), with >= 39 training points per list"""
+    return max(1, min(int(4 * math.sqrt(ntotal)), ntotal // 39))
+
+
+def factory_string(
+    index_type: str,
+    dim: int,
+    ntotal: int,
+    nlist: int = 0,
+    hnsw_m: int = 32,
+    pq_m: int = 16,
+    pq_nbits: int = 8
+) -> str:
+    """FAISS index_factory description for an index type"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {index_type}")
+
+    nlist = nlist or auto_nlist(ntotal)
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivf_sq8":
+        return f"IVF{nlist},SQ8"
+    if index_type == "ivf_pq":
+        if dim % pq_m != 0:
+            raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide the dimension ({dim})")
+        return f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+    return f"HNSW{hnsw_m}"
+
+
+def apply_search_params(index: faiss.Index, nprobe: int, ef_search: int):
+    """Set nprobe (IVF) and efSearch (HNSW) where the index supports them"""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            # Parameter does not apply to this index type
+            pass
+
+
+def build_index(
+    index_type: str,
+    vectors: np.ndarray,
+    train_size: int,
+    nprobe: int,
+    ef_search: int,
+    nlist: int = 0,
+    hnsw_m: int = 32,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+    metric: int = faiss.METRIC_L2
+) -> faiss.Index:
+    """
+    Build an index over vectors, training on the first ``train_size`` of them
+
+    Vectors are added in order, so position i in the new index is the same
+    document as position i in the source (LangChain's index_to_docstore_id).
+    """
+    ntotal, dim = vectors.shape
+    nlist = nlist or auto_nlist(min(ntotal, train_size))
+    description = factory_string(index_type, dim, ntotal, nlist, hnsw_m, pq_m, pq_nbits)
+    index = faiss.index_factory(dim, description, metric)
+
+    if not index.is_trained:
+        index.train(vectors[:max(train_size, 1)])
+    index.add(vectors)
+
+    apply_search_params(index, nprobe, ef_search)
+    return index
+
+
+def should_promote(index: faiss.Index, index_type: str, threshold: int) -> bool:
+    """Whether an exact flat index has grown enough to switch to the ANN index"""
+    return (
+        index_type != "flat"
+        and isinstance(index, faiss.IndexFlat)
+        and index.ntotal >= threshold
+    )
+
+
+def promote(
+    index: faiss.Index,
+    index_type: str,
+    train_size: int,
+    nprobe: int,
+    ef_search: int,
+    nlist: int = 0,
+    hnsw_m: int = 32,
+    pq_m: int = 16,
+    pq_nbits: int = 8
+) -> faiss.Index:
+    """Rebuild a flat index as an ANN index over the same vectors"""
+    vectors = index.reconstruct_n(0, index.ntotal)
+    return build_index(
+        index_type,
+        vectors,
+        train_size=train_size,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        nlist=nlist,
+        hnsw_m=hnsw_m,
+        pq_m=pq_m,
+        pq_nbits=pq_nbits,
+        metric=index.metric_type
+    )
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """Estimate the in-memory size of an index from its codes and graph links"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf = faiss.downcast_index(ivf)
+        # Inverted list codes plus 64-bit ids, the coarse centroids and PQ codebooks
+        size = ivf.ntotal * (ivf.code_size + 8) + ivf.nlist * ivf.d * 4
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            size += ivf.pq.centroids.size() * 4
+        return size
+    if isinstance(index, faiss.IndexHNSW):
+        storage = faiss.downcast_index(index.storage)
+        return index_bytes(storage) + index.hnsw.neighbors.size() * 4
+    code_size = getattr(index, "code_size", index.d * 4)
+    return index.ntotal * code_size
@@ -1,10 +1,48 @@
 from langgraph.graph import StateGraph, END
-from typing import Annotated, Sequence
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from typing_extensions import TypedDict
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from agent.llm_client import llm_client
 from agent.vector_store import vector_store
+from agent.kb_version import kb_version
+from agent.context_builder import context_builder
+from agent.response_cache import response_cache
+from agent.inference import GenerationResult
+from config.settings import settings
+from monitoring.metrics import (
+    agent_context_tokens,
+    agent_response_cache_total,
+    ai_agent_stage_duration_seconds,
+    ai_agent_prompt_tokens,
+    ai_agent_tokens_per_second,
+    observe_stage
+)
+from common.executor import compute_executor
+from monitoring.tracing import tracer
 import operator
+import asyncio
+
+
+# Static start of every agent prompt; its KV cache is reused across requests
+SYSTEM_PROMPT_PREFIX = """You are an AI assistant for the GaiA-ABiz system.
+Your role is to help users with their questions using the provided context.
+
+Context:
+"""
+
+_MESSAGE_TYPES = {"user": HumanMessage, "assistant": AIMessage, "system": SystemMessage}
+_MESSAGE_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+
+def to_base_messages(history: List[Dict[str, str]]) -> List[BaseMessage]:
+    """Convert stored chat messages to LangChain messages for the graph state"""
+    return [_MESSAGE_TYPES[m["role"]](content=m["content"]) for m in history]
+
+
+def to_chat_messages(messages: Sequence[BaseMessage]) -> List[Dict[str, str]]:
+    """Convert graph state messages back to LLMClient chat messages"""
+    return [{"role": _MESSAGE_ROLES[m.type], "content": m.content} for m in messages]
 
 
 class AgentState(TypedDict):
@@ -12,8 +50,12 @@ class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     query: str
     context: str
+    context_tokens: int
     response: str
     retrieval_results: list
+    query_embedding: list
+    kb_version: int
+    cached: bool
 
 
 class GraphAgent:
@@ -29,76 +71,243 @@ class GraphAgent:
 
         # Define nodes
         workflow.add_node("retrieve", self.retrieve_context)
+        workflow.add_node("check_cache", self.check_cache)
         workflow.add_node("generate", self.generate_response)
 
         # Define edges
         workflow.set_entry_point("retrieve")
-        workflow.add_edge("retrieve", "generate")
+        workflow.add_edge("retrieve", "check_cache")
+        workflow.add_conditional_edges(
+            "check_cache",
+            self._route_after_cache,
+            {"cached": END, "generate": "generate"}
+        )
         workflow.add_edge("generate", END)
 
         return workflow.compile()
 
+    @tracer.traced("langgraph.retrieve")
     async def retrieve_context(self, state: AgentState) -> dict:
         """Retrieve context from vector store"""
         query = state["query"]
 
+        # Answers cached from here on are tied to the collection as searched now;
+        # the version is shared, so writes by other workers and scripts count too
+        version = await compute_executor.run_io(kb_version.current, vector_store.collection_name)
+
         # Generate query embedding
-        query_embedding = await llm_client.generate_embeddings(query)
+        with observe_stage(self.agent_type, "embedding"):
+            query_embedding = await llm_client.generate_embeddings(query)
 
         # Search vector store
-        results = vector_store.search(query_embedding, top_k=5)
-
-        # Format context
-        context_parts = []
-        for result in results:
-            context_parts.append(result["text"])
+        with observe_stage(self.agent_type, "vector_search"):
+            results = await compute_executor.run_io(
+                vector_store.search, query_embedding, top_k=settings.AGENT_RETRIEVAL_TOP_K
+            )
 
-        context = "\n\n".join(context_parts)
+        # Rank, deduplicate and fit the hits into the context token budget
+        with observe_stage(self.agent_type, "context_assembly"):
+            context = await compute_executor.run_io(
+                context_builder.build, results, vector_store.higher_is_better
+            )
+        agent_context_tokens.observe(context.tokens)
 
         return {
-            "context": context,
-            "retrieval_results": results
+            "context": context.text,
+            "context_tokens": context.tokens,
+            "retrieval_results": results,
+            "query_embedding": query_embedding,
+            "kb_version": version
         }
 
-    async def generate_response(self, state: AgentState) -> dict:
-        """Generate response using LLM"""
-        query = state["query"]
-        context = state.get("context", "")
+    def _cacheable(self, state: AgentState) -> bool:
+        """Answers that depend on conversation history are never cached"""
+        return settings.AGENT_RESPONSE_CACHE_ENABLED and not state.get("messages")
 
-        system_prompt = f"""You are an AI assistant for the GaiA-ABiz system.
-Your role is to help users with their questions using the provided context.
+    @tracer.traced("langgraph.check_cache")
+    async def check_cache(self, state: AgentState) -> dict:
+        """Reuse the answer to a near-duplicate question, if one is cached"""
+        if not self._cacheable(state):
+            if settings.AGENT_RESPONSE_CACHE_ENABLED:
+                agent_response_cache_total.labels(result="skip").inc()
+            return {"cached": False}
 
-Context:
-{context}
+        with observe_stage(self.agent_type, "cache_lookup"):
+            entry = response_cache.lookup(
+                self.agent_type,
+                state["query_embedding"],
+                state["retrieval_results"],
+                state["kb_version"]
+            )
+        if entry is None:
+            return {"cached": False}
+        return {"cached": True, "response": entry["response"]}
+
+    def _route_after_cache(self, state: AgentState) -> str:
+        return "cached" if state.get("cached") else "generate"
+
+    def _cache_response(self, state: AgentState, response: str):
+        if response and self._cacheable(state):
+            response_cache.put(
+                self.agent_type,
+                state["query_embedding"],
+                state["retrieval_results"],
+                state["kb_version"],
+                response,
+                state["query"]
+            )
+
+    def _observe_generation(self, result: GenerationResult):
+        """Split LLM time into queue wait, prompt evaluation and token generation"""
+        def observe(stage: str, seconds: float):
+            ai_agent_stage_duration_seconds.labels(
+                agent_type=self.agent_type, stage=stage
+            ).observe(seconds)
+
+        observe("queue_wait", result.queue_wait)
+        if result.time_to_first_token is not None:
+            # Until the first token the replica is evaluating the prompt
+            observe("prompt_eval", result.time_to_first_token)
+            observe("generation", result.duration - result.time_to_first_token)
+        if result.prompt_tokens is not None:
+            ai_agent_prompt_tokens.labels(agent_type=self.agent_type).observe(result.prompt_tokens)
+        if result.completion_tokens:
+            ai_agent_tokens_per_second.labels(agent_type=self.agent_type).observe(
+                result.tokens_per_second
+            )
+
+    def _system_prompt(self, context: str) -> str:
+        """System prompt with the retrieved context"""
+        return f"""{SYSTEM_PROMPT_PREFIX}{context}
 
 Please provide accurate and helpful responses based on the context above.
 If the context doesn't contain relevant information, politely indicate that.
 """
 
-        messages = [
+    @tracer.traced("langgraph.generate")
+    async def generate_response(self, state: AgentState, config: RunnableConfig = None) -> dict:
+        """
+        Generate response using LLM
+
+        When the run was started by ``astream``, tokens are handed to the
+        ``on_token`` callback in the run config as they are generated.
+        """
+        query = state["query"]
+        context = state.get("context", "")
+        on_token = ((config or {}).get("configurable") or {}).get("on_token")
+
+        # Previous turns, then the current question
+        messages = to_chat_messages(state.get("messages", [])) + [
             {"role": "user", "content": query}
         ]
 
-        response = await llm_client.generate_response(
-            messages=messages,
-            system_prompt=system_prompt
-        )
+        if on_token is None:
+            result = await llm_client.generate(
+                messages=messages,
+                system_prompt=self._system_prompt(context),
+                cache_prefix=SYSTEM_PROMPT_PREFIX
+            )
+            self._observe_generation(result)
+            response = result.text
+        else:
+            tokens = []
+            async for token in llm_client.stream_response(
+                messages=messages,
+                system_prompt=self._system_prompt(context),
+                cache_prefix=SYSTEM_PROMPT_PREFIX,
+                on_complete=self._observe_generation
+            ):
+                tokens.append(token)
+                on_token(token)
+            response = "".join(tokens).strip()
+        self._cache_response(state, response)
 
         return {"response": response}
 
-    async def run(self, query: str) -> dict:
-        """Run the agent"""
-        initial_state = {
-            "messages": [],
+    def _initial_state(self, query: str, history: Optional[List[Dict[str, str]]]) -> dict:
+        return {
+            "messages": to_base_messages(history or []),
             "query": query,
             "context": "",
+            "context_tokens": 0,
             "response": "",
-            "retrieval_results": []
+            "retrieval_results": [],
+            "query_embedding": [],
+            "kb_version": 0,
+            "cached": False
         }
 
-        result = await self.graph.ainvoke(initial_state)
+    async def run(self, query: str, history: Optional[List[Dict[str, str]]] = None) -> dict:
+        """
+        Run the agent
+
+        Args:
+            query: User question
+            history: Previous chat messages of the session, oldest first
+        """
+        with tracer.span("langgraph.run", agent_type=self.agent_type):
+            result = await self.graph.ainvoke(self._initial_state(query, history))
         return result
 
+    async def astream(
+        self,
+        query: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run the agent graph, yielding events as they become available
+
+        Yields ("retrieval", {"results", "context_tokens"}) once the retrieve
+        node finishes, ("token", text) for every generated token (or the cached
+        answer as one token), and finally ("done", state) with the full
+        response in the same shape ``run`` returns.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run_graph():
+            try:
+                with tracer.span("langgraph.run", agent_type=self.agent_type):
+                    async for mode, chunk in self.graph.astream(
+                        self._initial_state(query, history),
+                        config={"configurable": {
+                            "on_token": lambda token: events.put_nowait(("token", token))
+                        }},
+                        stream_mode=["updates", "values"]
+                    ):
+                        events.put_nowait((mode, chunk))
+            except Exception as e:
+                events.put_nowait(("error", e))
+            finally:
+                events.put_nowait(("end", None))
+
+        # The graph runs in its own task (and trace context) while we relay its events
+        task = asyncio.create_task(run_graph())
+        state = None
+        try:
+            while True:
+                kind, data = await events.get()
+                if kind == "token":
+                    yield "token", data
+                elif kind == "updates":
+                    if "retrieve" in data:
+                        yield "retrieval", {
+                            "results": data["retrieve"]["retrieval_results"],
+                            "context_tokens": data["retrieve"]["context_tokens"]
+                        }
+                    elif data.get("check_cache", {}).get("cached"):
+                        yield "token", data["check_cache"]["response"]
+                elif kind == "values":
+                    state = data
+                elif kind == "error":
+                    raise data
+                else:
+                    break
+        finally:
+            # Stops generation if the caller goes away mid-stream
+            task.cancel()
+
+        yield "done", state
+
 
 # Agent factory
 def create_agent(agent_type: str) -> GraphAgent:
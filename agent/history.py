@@ -0,0 +1,239 @@
+"""
+Conversation History
+Loads a bounded, token-budgeted window of recent session messages for the
+agent prompt, with a per-session cache and rolling summaries of older turns
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from agent.models import AgentMessage
+from agent.llm_client import llm_client
+from agent.inference import PRIORITY_BACKGROUND
+from config.settings import settings
+from monitoring.logger import get_logger
+import threading
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class HistoryMessage:
+    """A stored message with its token count"""
+    id: int
+    role: str
+    content: str
+    created_at: datetime
+    tokens: int
+
+
+@dataclass
+class SessionWindow:
+    """Cached recent messages of one session"""
+    messages: List[HistoryMessage] = field(default_factory=list)
+    # Older messages that fell out of the window and are not summarized yet
+    evicted: List[HistoryMessage] = field(default_factory=list)
+    summary: Optional[str] = None
+    summary_tokens: int = 0
+    summarizing: bool = False
+    # Newest message read so far; kept even when every message was evicted
+    last_created_at: Optional[datetime] = None
+    last_id: int = 0
+
+    @property
+    def evicted_tokens(self) -> int:
+        return sum(message.tokens for message in self.evicted)
+
+
+class ConversationHistory:
+    """
+    Recent-history windows keyed by session id
+
+    Each turn costs one indexed query on (session_id, created_at): a cold
+    session loads its last ``max_messages`` messages, a cached one only the
+    messages written since. Messages that no longer fit the token budget are
+    folded into a rolling summary in the background. Summaries live in memory
+    only; after a restart a session starts again from its recent messages.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        summarize: Callable[[Optional[str], List[Dict[str, str]]], Awaitable[str]],
+        token_budget: int = 2048,
+        max_messages: int = 20,
+        cache_size: int = 1000,
+        summary_trigger: int = 1024
+    ):
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.cache_size = cache_size
+        self.summary_trigger = summary_trigger
+
+        self._windows: "OrderedDict[int, SessionWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _window(self, session_id: int) -> Optional[SessionWindow]:
+        with self._lock:
+            window = self._windows.get(session_id)
+            if window is not None:
+                self._windows.move_to_end(session_id)
+            return window
+
+    def _store(self, session_id: int, window: SessionWindow):
+        with self._lock:
+            self._windows[session_id] = window
+            self._windows.move_to_end(session_id)
+            while len(self._windows) > self.cache_size:
+                self._windows.popitem(last=False)
+
+    async def _fetch(self, db: AsyncSession, session_id: int, window: Optional[SessionWindow]):
+        """Fetch the messages the window does not have yet"""
+        query = select(
+            AgentMessage.id,
+            AgentMessage.role,
+            AgentMessage.content,
+            AgentMessage.created_at
+        ).where(AgentMessage.session_id == session_id)
+
+        seen = None
+        if window is not None and window.last_created_at is not None:
+            # Messages can share a timestamp, so re-read it and drop rows already seen
+            seen = (window.last_created_at, window.last_id)
+            query = query.where(AgentMessage.created_at >= window.last_created_at)
+
+        rows = (await db.execute(query.order_by(
+            AgentMessage.created_at.desc(),
+            AgentMessage.id.desc()
+        ).limit(self.max_messages))).all()
+
+        return [row for row in reversed(rows) if seen is None or (row.created_at, row.id) > seen]
+
+    def _trim(self, window: SessionWindow):
+        """Evict the oldest messages beyond the message cap or token budget"""
+        budget = self.token_budget - window.summary_tokens
+        total = sum(message.tokens for message in window.messages)
+        while window.messages and (
+            len(window.messages) > self.max_messages or total > budget
+        ):
+            message = window.messages.pop(0)
+            total -= message.tokens
+            window.evicted.append(message)
+
+    async def load(self, db: AsyncSession, session_id: int) -> List[Dict[str, str]]:
+        """
+        Recent messages of a session that fit the token budget
+
+        Returns:
+            Chat messages, oldest first, preceded by a system summary of
+            earlier turns when one exists
+        """
+        window = self._window(session_id)
+        rows = await self._fetch(db, session_id, window)
+
+        if window is None:
+            window = SessionWindow()
+        for row in rows:
+            window.messages.append(HistoryMessage(
+                id=row.id,
+                role=row.role,
+                content=row.content,
+                created_at=row.created_at,
+                tokens=self.count_tokens(row.content)
+            ))
+        if rows:
+            window.last_created_at, window.last_id = rows[-1].created_at, rows[-1].id
+        self._trim(window)
+        self._store(session_id, window)
+
+        messages = []
+        if window.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {window.summary}"
+            })
+        messages.extend(
+            {"role": message.role, "content": message.content}
+            for message in window.messages
+        )
+        return messages
+
+    def needs_summary(self, session_id: int) -> bool:
+        """Whether enough history was evicted to fold into the summary"""
+        window = self._window(session_id)
+        return (
+            window is not None
+            and not window.summarizing
+            and window.evicted_tokens >= self.summary_trigger
+        )
+
+    async def update_summary(self, session_id: int):
+        """Fold evicted messages into the session's rolling summary once enough piled up"""
+        if not self.needs_summary(session_id):
+            return
+        window = self._window(session_id)
+
+        window.summarizing = True
+        evicted = list(window.evicted)
+        try:
+            summary = await self.summarize(
+                window.summary,
+                [{"role": message.role, "content": message.content} for message in evicted]
+            )
+        except Exception as e:
+            logger.warning("history_summary_failed", session_id=session_id, error=str(e))
+            return
+        finally:
+            window.summarizing = False
+
+        window.summary = summary
+        window.summary_tokens = self.count_tokens(summary)
+        del window.evicted[:len(evicted)]
+        logger.info(
+            "history_summary_updated",
+            session_id=session_id,
+            messages=len(evicted),
+            summary_tokens=window.summary_tokens
+        )
+
+    def invalidate(self, session_id: int):
+        """Drop a session's cached window"""
+        with self._lock:
+            self._windows.pop(session_id, None)
+
+
+async def summarize_with_llm(
+    previous_summary: Optional[str],
+    messages: List[Dict[str, str]]
+) -> str:
+    """Summarize conversation turns with the local LLM at background priority"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    instructions = (
+        "Summarize the conversation below so it can replace the original messages. "
+        "Keep names, facts, decisions and open questions. "
+        f"Use at most {settings.AGENT_HISTORY_SUMMARY_MAX_WORDS} words."
+    )
+    if previous_summary:
+        instructions += f"\n\nSummary so far:\n{previous_summary}"
+
+    result = await llm_client.generate(
+        messages=[{"role": "user", "content": transcript}],
+        system_prompt=instructions,
+        priority=PRIORITY_BACKGROUND
+    )
+    return result.text
+
+
+# Shared history instance
+conversation_history = ConversationHistory(
+    count_tokens=llm_client.count_tokens,
+    summarize=summarize_with_llm,
+    token_budget=min(settings.AGENT_HISTORY_TOKEN_BUDGET, settings.LLM_CONTEXT_LENGTH // 4),
+    max_messages=settings.AGENT_HISTORY_MAX_MESSAGES,
+    cache_size=settings.AGENT_HISTORY_CACHE_SIZE,
+    summary_trigger=settings.AGENT_HISTORY_SUMMARY_TRIGGER
+)
@@ -0,0 +1,288 @@
+"""
+LLM Inference Scheduler
+Owns the local model replicas and serves generation requests from a bounded
+priority queue, so concurrent requests wait their turn instead of contending
+for one llama.cpp instance
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, List, Optional
+from monitoring.metrics import (
+    inference_queue_depth,
+    inference_queue_wait_seconds,
+    inference_rejected_total,
+    inference_time_to_first_token_seconds,
+    inference_tokens_per_second
+)
+from monitoring.logger import get_logger
+import itertools
+import threading
+import asyncio
+import time
+
+logger = get_logger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the request queue is at capacity"""
+
+
+class InferenceTimeout(Exception):
+    """Raised when a request waited longer than its timeout for a replica"""
+
+
+@dataclass
+class GenerationResult:
+    """Generated text with timing statistics"""
+    text: str
+    completion_tokens: int
+    queue_wait: float
+    time_to_first_token: Optional[float]
+    duration: float
+    prompt_tokens: Optional[int] = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.completion_tokens / self.duration if self.duration > 0 else 0.0
+
+
+@dataclass
+class InferenceJob:
+    """One queued generation request"""
+    prompt: str
+    loop: asyncio.AbstractEventLoop
+    deadline: Optional[float]
+    prefix: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.time)
+    events: asyncio.Queue = field(default_factory=asyncio.Queue)
+    tokens: List[str] = field(default_factory=list)
+    cancelled: bool = False
+    started_at: Optional[float] = None
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def emit(self, kind: str, value: Any = None):
+        """Hand an event to the waiting request from any thread"""
+        self.loop.call_soon_threadsafe(self.events.put_nowait, (kind, value))
+
+    async def _next_event(self):
+        """Next event, failing once the deadline passes before a replica picks the job up"""
+        while self.started_at is None and self.deadline is not None:
+            remaining = self.deadline - time.time()
+            if remaining <= 0:
+                inference_rejected_total.labels(reason="timeout").inc()
+                raise InferenceTimeout(
+                    f"LLM request waited {time.time() - self.enqueued_at:.1f}s for a replica"
+                )
+            try:
+                return await asyncio.wait_for(self.events.get(), remaining)
+            except asyncio.TimeoutError:
+                # Re-check: a replica may have started the job just now
+                continue
+        return await self.events.get()
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Yield tokens as the replica produces them"""
+        try:
+            while True:
+                kind, value = await self._next_event()
+                if kind == "token":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            # Stops generation early if the caller goes away
+            self.cancelled = True
+
+    def result(self) -> GenerationResult:
+        """Statistics for a finished job"""
+        start = self.started_at or self.enqueued_at
+        end = self.finished_at or time.time()
+        return GenerationResult(
+            text="".join(self.tokens).strip(),
+            completion_tokens=len(self.tokens),
+            queue_wait=start - self.enqueued_at,
+            time_to_first_token=self.first_token_at - start if self.first_token_at else None,
+            duration=end - start
+        )
+
+
+class InferenceScheduler:
+    """
+    Runs generation on a fixed set of model replicas
+
+    Each replica is created lazily by ``model_factory`` (anything with a
+    LangChain-style ``stream(prompt)``) and used by one worker thread at a time.
+    ``prepare(model, job)``, if given, runs on the replica thread before jobs
+    that carry a cacheable prompt prefix.
+    Requests are served by priority, then arrival order; when ``max_queue_size``
+    requests are already waiting, new ones are rejected with InferenceQueueFull.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Any],
+        replicas: int = 1,
+        max_queue_size: int = 32,
+        queue_timeout: Optional[float] = None,
+        prepare: Optional[Callable[[Any, "InferenceJob"], None]] = None
+    ):
+        self.model_factory = model_factory
+        self.prepare = prepare
+        self.replicas = max(1, replicas)
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+
+        self._models: List[Any] = [None] * self.replicas
+        self._model_lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(
+            max_workers=self.replicas, thread_name_prefix="llm-replica"
+        )
+        self._seq = itertools.count()
+        self._pending = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _model(self, replica: int):
+        with self._model_lock:
+            if self._models[replica] is None:
+                self._models[replica] = self.model_factory()
+            return self._models[replica]
+
+    def _ensure_workers(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Workers and queued jobs from a previous event loop can never run
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._pending = 0
+            self._workers = [
+                loop.create_task(self._worker(replica)) for replica in range(self.replicas)
+            ]
+        return loop
+
+    def full(self) -> bool:
+        """Whether a new request would be rejected"""
+        return self._pending >= self.max_queue_size
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def submit(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None,
+        prefix: Optional[str] = None
+    ) -> InferenceJob:
+        """Queue a generation request (must be called from the event loop)"""
+        loop = self._ensure_workers()
+        if self.full():
+            inference_rejected_total.labels(reason="queue_full").inc()
+            raise InferenceQueueFull(
+                f"LLM request queue is full ({self.max_queue_size} waiting)"
+            )
+
+        timeout = timeout if timeout is not None else self.queue_timeout
+        job = InferenceJob(
+            prompt=prompt,
+            loop=loop,
+            deadline=time.time() + timeout if timeout else None,
+            prefix=prefix
+        )
+        self._pending += 1
+        inference_queue_depth.set(self._pending)
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return job
+
+    async def stream(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None,
+        prefix: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Generate a completion, yielding tokens as they are produced"""
+        job = self.submit(prompt, priority, timeout, prefix)
+        async for token in job.stream():
+            yield token
+
+    async def generate(
+        self,
+        prompt: str,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None,
+        prefix: Optional[str] = None
+    ) -> GenerationResult:
+        """Generate a full completion"""
+        job = self.submit(prompt, priority, timeout, prefix)
+        async for _ in job.stream():
+            pass
+        return job.result()
+
+    async def _worker(self, replica: int):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self._queue.get()
+            self._pending -= 1
+            inference_queue_depth.set(self._pending)
+
+            if job.cancelled:
+                # Includes callers that gave up waiting at their deadline
+                continue
+
+            now = time.time()
+            inference_queue_wait_seconds.observe(now - job.enqueued_at)
+            if job.deadline is not None and now > job.deadline:
+                inference_rejected_total.labels(reason="timeout").inc()
+                job.emit("error", InferenceTimeout(
+                    f"LLM request waited {now - job.enqueued_at:.1f}s for a replica"
+                ))
+                continue
+
+            job.started_at = now
+            await loop.run_in_executor(self._threads, self._generate, replica, job)
+
+    def _generate(self, replica: int, job: InferenceJob):
+        """Run one job on a replica (worker thread)"""
+        try:
+            model = self._model(replica)
+            if self.prepare is not None and job.prefix:
+                try:
+                    self.prepare(model, job)
+                except Exception as e:
+                    # The cache is an optimization; generate from scratch instead
+                    logger.warning("inference_prepare_failed", error=str(e))
+            for token in model.stream(job.prompt):
+                if job.cancelled:
+                    break
+                if job.first_token_at is None:
+                    job.first_token_at = time.time()
+                job.tokens.append(token)
+                job.emit("token", token)
+        except Exception as e:
+            job.emit("error", e)
+            return
+
+        job.finished_at = time.time()
+        result = job.result()
+        if result.time_to_first_token is not None:
+            inference_time_to_first_token_seconds.observe(result.time_to_first_token)
+        if result.completion_tokens:
+            inference_tokens_per_second.observe(result.tokens_per_second)
+        job.emit("end")
+
+    def shutdown(self):
+        """Stop the replica threads"""
+        for task in self._workers:
+            task.cancel()
+        self._threads.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,98 @@
+"""
+Knowledge Base Version
+Shared change counter for the Milvus knowledge base, so every worker (and the
+scripts) can tell when cached answers went stale
+"""
+from typing import Dict, Tuple
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from common.database import engine
+from agent.models import KnowledgeBaseVersion
+from config.settings import settings
+from monitoring.logger import get_logger
+import threading
+import time
+
+logger = get_logger(__name__)
+
+
+class KBVersion:
+    """
+    Database-backed version per collection
+
+    Writers bump the row after each write or delete lands in Milvus. Readers
+    re-read it at most every ``check_interval`` seconds, so a change made by
+    another process is seen within that window; this process's own bumps are
+    seen at once.
+    """
+
+    def __init__(self, engine: Engine, check_interval: float = 1.0):
+        self.engine = engine
+        self.check_interval = check_interval
+        self._cached: Dict[str, Tuple[int, float]] = {}
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    def _ensure_table(self):
+        # Scripts may write before the API has ever created the tables
+        if not self._table_ready:
+            KnowledgeBaseVersion.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def _read(self, collection_name: str) -> int:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            version = conn.scalar(
+                select(KnowledgeBaseVersion.version)
+                .where(KnowledgeBaseVersion.collection_name == collection_name)
+            )
+        return version or 0
+
+    def current(self, collection_name: str) -> int:
+        """Current version, re-read from the database once the cached one is old (blocking)"""
+        with self._lock:
+            cached = self._cached.get(collection_name)
+        if cached is not None and time.monotonic() - cached[1] < self.check_interval:
+            return cached[0]
+
+        version = self._read(collection_name)
+        with self._lock:
+            self._cached[collection_name] = (version, time.monotonic())
+        return version
+
+    def bump(self, collection_name: str):
+        """Record a change to a collection (blocking); failures are logged, not raised"""
+        try:
+            self._ensure_table()
+            with self.engine.begin() as conn:
+                updated = conn.execute(
+                    update(KnowledgeBaseVersion)
+                    .where(KnowledgeBaseVersion.collection_name == collection_name)
+                    .values(
+                        version=KnowledgeBaseVersion.version + 1,
+                        updated_at=datetime.utcnow()
+                    )
+                ).rowcount
+                if not updated:
+                    conn.execute(KnowledgeBaseVersion.__table__.insert().values(
+                        collection_name=collection_name,
+                        version=1,
+                        updated_at=datetime.utcnow()
+                    ))
+        except IntegrityError:
+            # Another process inserted the row first
+            self.bump(collection_name)
+            return
+        except Exception as e:
+            logger.warning("kb_version_bump_failed", collection=collection_name, error=str(e))
+            return
+
+        # Expire the cached value so this process sees its own change immediately
+        with self._lock:
+            self._cached.pop(collection_name, None)
+
+
+# Global instance
+kb_version = KBVersion(engine, check_interval=settings.AGENT_RESPONSE_CACHE_VERSION_CHECK_INTERVAL)
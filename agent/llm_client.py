@@ -5,7 +5,16 @@ Supports CPU-only inference with llama-cpp-python
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.schema import HumanMessage, SystemMessage, AIMessage
 from config.settings import settings
-from typing import List, Dict, Any
+from agent.embedding_cache import with_embedding_cache
+from agent.inference import (
+    InferenceScheduler,
+    InferenceJob,
+    GenerationResult,
+    PRIORITY_INTERACTIVE
+)
+from agent.prompt_cache import PrefixStateCache
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
+import threading
 import os
 
 
@@ -24,16 +33,27 @@ class LLMClient:
         # Standard embeddings configuration
         model_kwargs = {'device': 'cpu'}
 
-        self.embeddings = HuggingFaceEmbeddings(
+        self.embeddings = with_embedding_cache(HuggingFaceEmbeddings(
             model_name=settings.EMBEDDINGS_MODEL,
             model_kwargs=model_kwargs,
             encode_kwargs={'normalize_embeddings': True}
-        )
+        ))
         print(f"[OK] Loaded embeddings model (dimension: {settings.EMBEDDINGS_DIMENSION})")
 
-        # Initialize local LLM (lazy loading)
-        self.chat_model = None
+        # Local LLM replicas are loaded lazily by the inference scheduler
         self.model_path = settings.LLM_MODEL_PATH
+        self.scheduler = InferenceScheduler(
+            self._load_llm,
+            replicas=settings.LLM_REPLICAS,
+            max_queue_size=settings.LLM_QUEUE_MAX_SIZE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+            prepare=self._prepare_prefix if settings.LLM_PROMPT_CACHE_ENABLED else None
+        )
+        # Prompt prefix snapshots, one cache per replica
+        self._prefix_caches: Dict[int, PrefixStateCache] = {}
+        # Vocabulary-only model used for token counting (False = unavailable)
+        self._tokenizer = None
+        self._tokenizer_lock = threading.Lock()
 
         # Check if model file exists
         if not os.path.exists(self.model_path):
@@ -44,16 +64,13 @@ class LLMClient:
             print(f"[OK] LLM model ready at {self.model_path}")
 
     def _load_llm(self):
-        """Lazy load LLM model (only when needed)"""
-        if self.chat_model is not None:
-            return
-
+        """Load one LLM replica (called by the scheduler when first needed)"""
         try:
             from langchain_community.llms import LlamaCpp
             from langchain_community.llms.llamacpp import Callbacks
 
             print(f"Loading Qwen 2.5 model from {self.model_path}...")
-            self.chat_model = LlamaCpp(
+            chat_model = LlamaCpp(
                 model_path=self.model_path,
                 temperature=settings.LLM_TEMPERATURE,
                 max_tokens=settings.LLM_MAX_TOKENS,
@@ -62,6 +79,7 @@ class LLMClient:
                 verbose=False,
             )
             print("[OK] Qwen 2.5 model loaded successfully")
+            return chat_model
         except ImportError:
             raise ImportError(
                 "llama-cpp-python is required for local LLM inference. "
@@ -70,15 +88,48 @@ class LLMClient:
         except Exception as e:
             raise RuntimeError(f"Failed to load LLM model: {e}")
 
-    async def generate_response(
+    def load_tokenizer(self):
+        """Load the vocabulary-only tokenizer once (called at startup)"""
+        with self._tokenizer_lock:
+            if self._tokenizer is not None:
+                return
+            try:
+                from llama_cpp import Llama
+                self._tokenizer = Llama(
+                    model_path=self.model_path, vocab_only=True, verbose=False
+                )
+            except Exception:
+                self._tokenizer = False
+
+    def count_tokens(self, text: str) -> int:
+        """Count prompt tokens with the model's tokenizer (~4 chars/token fallback)"""
+        if self._tokenizer is None:
+            self.load_tokenizer()
+
+        if self._tokenizer is False:
+            return max(1, len(text) // 4)
+        return len(self._tokenizer.tokenize(text.encode("utf-8"), add_bos=False))
+
+    def _prepare_prefix(self, chat_model, job: InferenceJob):
+        """Restore the KV cache for the job's static prefix (replica thread)"""
+        cache = self._prefix_caches.get(id(chat_model))
+        if cache is None:
+            cache = PrefixStateCache(settings.LLM_PROMPT_CACHE_MAX_PREFIXES)
+            self._prefix_caches[id(chat_model)] = cache
+        cache.prepare(chat_model.client, job.prompt, job.prefix)
+
+    def _prompt_prefix(self, system_prompt: str, cache_prefix: Optional[str]) -> Optional[str]:
+        """Formatted prompt prefix for a static leading part of the system prompt"""
+        if not cache_prefix or not system_prompt or not system_prompt.startswith(cache_prefix):
+            return None
+        return f"System: {cache_prefix}"
+
+    def _format_prompt(
         self,
         messages: List[Dict[str, str]],
         system_prompt: str = None
     ) -> str:
-        """Generate response from local LLM"""
-        self._load_llm()
-
-        # Format messages into a prompt
+        """Format chat messages into a completion prompt"""
         prompt_parts = []
 
         if system_prompt:
@@ -95,11 +146,75 @@ class LLMClient:
                 prompt_parts.append(f"System: {content}\n")
 
         prompt_parts.append("Assistant:")
-        prompt = "\n".join(prompt_parts)
+        return "\n".join(prompt_parts)
+
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        cache_prefix: Optional[str] = None
+    ) -> GenerationResult:
+        """
+        Generate a response with queue wait, token and throughput statistics
+
+        ``cache_prefix`` marks a static leading part of ``system_prompt`` whose
+        KV cache is snapshotted once per replica and restored for later requests.
+        """
+        prompt = self._format_prompt(messages, system_prompt)
+        result = await self.scheduler.generate(
+            prompt,
+            priority=priority,
+            prefix=self._prompt_prefix(system_prompt, cache_prefix)
+        )
+        result.prompt_tokens = self.count_tokens(prompt)
+        return result
+
+    async def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str = None,
+        cache_prefix: Optional[str] = None
+    ) -> str:
+        """Generate response from local LLM"""
+        result = await self.generate(messages, system_prompt, cache_prefix=cache_prefix)
+        return result.text
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        cache_prefix: Optional[str] = None,
+        on_complete: Optional[Callable[[GenerationResult], None]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate response from local LLM, yielding tokens as they are produced
+
+        ``on_complete``, if given, receives the generation statistics once the
+        last token has been yielded.
+        """
+        prompt = self._format_prompt(messages, system_prompt)
+        job = self.scheduler.submit(
+            prompt,
+            priority=priority,
+            prefix=self._prompt_prefix(system_prompt, cache_prefix)
+        )
 
-        # Generate response
-        response = await self.chat_model.ainvoke(prompt)
-        return response.strip()
+        first = True
+        async for token in job.stream():
+            if first:
+                # Match generate_response, which strips the leading space
+                token = token.lstrip()
+                if not token:
+                    continue
+                first = False
+            yield token
+
+        if on_complete is not None:
+            result = job.result()
+            result.prompt_tokens = self.count_tokens(prompt)
+            on_complete(result)
 
     async def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for text"""
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
 from datetime import datetime
 from common.database import Base
 
@@ -24,6 +24,11 @@ class AgentMessage(Base):
     message_metadata = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves the per-session recent-history query
+        Index("ix_agent_messages_session_created", "session_id", "created_at"),
+    )
+
 
 class KnowledgeBase(Base):
     __tablename__ = "knowledge_base"
@@ -36,3 +41,12 @@ class KnowledgeBase(Base):
     vector_id = Column(String, index=True)  # Reference to Milvus vector ID
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class KnowledgeBaseVersion(Base):
+    __tablename__ = "knowledge_base_versions"
+
+    # One counter per Milvus collection, bumped on every vector write or delete
+    collection_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,75 @@
+"""
+Prompt Prefix Cache
+Keeps llama.cpp KV-cache snapshots for static prompt prefixes (such as the
+agent system prompt) so each request only evaluates the tokens after the prefix
+"""
+from collections import OrderedDict
+from typing import Any, List, Tuple
+from monitoring.metrics import llm_prompt_prefix_cache_total
+
+
+def common_prefix_length(a: List[int], b: List[int]) -> int:
+    """Number of leading tokens two token lists share"""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class PrefixStateCache:
+    """
+    Prefix snapshots for one llama.cpp model instance
+
+    llama.cpp already skips re-evaluating tokens that match the start of its
+    current KV cache, so restoring a snapshot of the prefix right before a
+    request means only the remainder of the prompt is evaluated, even if the
+    previous request on this replica used a different prompt.
+    Not thread-safe: each model replica is used by one thread at a time.
+    """
+
+    def __init__(self, max_prefixes: int = 4):
+        self.max_prefixes = max_prefixes
+        self._states: "OrderedDict[str, Tuple[List[int], Any]]" = OrderedDict()
+
+    def _build(self, llama, prompt_tokens: List[int], prefix: str) -> Tuple[List[int], Any]:
+        """Evaluate the prefix once and snapshot the model state"""
+        prefix_tokens = llama.tokenize(prefix.encode("utf-8"), special=True)
+        # Tokenizing the prefix alone can merge differently at its last token
+        n = common_prefix_length(prefix_tokens, prompt_tokens)
+        # Leave at least one prompt token for generation to evaluate
+        n = min(n, len(prompt_tokens) - 1)
+
+        tokens = list(prompt_tokens[:n])
+        llama.reset()
+        llama.eval(tokens)
+        return tokens, llama.save_state()
+
+    def prepare(self, llama, prompt: str, prefix: str):
+        """Make the model's KV cache start with ``prefix`` before generating ``prompt``"""
+        if not prefix or not prompt.startswith(prefix):
+            return
+
+        entry = self._states.get(prefix)
+        if entry is None:
+            prompt_tokens = llama.tokenize(prompt.encode("utf-8"), special=True)
+            entry = self._build(llama, prompt_tokens, prefix)
+            if not entry[0]:
+                return
+            self._states[prefix] = entry
+            while len(self._states) > self.max_prefixes:
+                self._states.popitem(last=False)
+            llm_prompt_prefix_cache_total.labels(result="built").inc()
+            return
+
+        self._states.move_to_end(prefix)
+        tokens, state = entry
+        n = len(tokens)
+        if llama.n_tokens >= n and list(llama._input_ids[:n]) == tokens:
+            # The last request already left the prefix in the KV cache
+            llm_prompt_prefix_cache_total.labels(result="warm").inc()
+            return
+
+        llama.load_state(state)
+        llm_prompt_prefix_cache_total.labels(result="restored").inc()
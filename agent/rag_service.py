@@ -2,14 +2,27 @@
 RAG Service for Semantic Search and Document Retrieval
 Provides high-level RAG functionality using LangChain and vector stores
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pydantic import BaseModel
+from common.executor import compute_executor
+from config.settings import settings
+from monitoring.logger import get_logger
+from monitoring.tracing import tracer
+from .embedding_cache import with_embedding_cache
+from .rag_stats import RAGStats
+from . import faiss_index
+import numpy as np
+import threading
+import faiss
+import time
 import os
 
+logger = get_logger(__name__)
+
 
 class QueryRequest(BaseModel):
     """Request model for semantic search"""
@@ -25,6 +38,19 @@ class QueryResponse(BaseModel):
     count: int
 
 
+class BatchQueryRequest(BaseModel):
+    """Request model for multi-query semantic search"""
+    queries: List[str]
+    k: int = 3
+    filter: Optional[Dict[str, Any]] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for multi-query semantic search"""
+    results: List[QueryResponse]
+    count: int
+
+
 class DocumentRequest(BaseModel):
     """Request model for adding documents"""
     content: str
@@ -37,7 +63,9 @@ class RAGService:
     def __init__(
         self,
         model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
-        vector_store_path: Optional[str] = None
+        vector_store_path: Optional[str] = None,
+        index_type: Optional[str] = None,
+        index_name: Optional[str] = None
     ):
         """
         Initialize RAG service
@@ -45,19 +73,27 @@ class RAGService:
         Args:
             model_name: HuggingFace model name for embeddings
             vector_store_path: Path to saved vector store (optional)
+            index_type: FAISS index used once the corpus outgrows the flat
+                index (defaults to RAG_FAISS_INDEX_TYPE)
+            index_name: ``index`` label on the exported stats gauges (defaults
+                to the vector store directory name, else "default")
         """
         # Store model name
         self.model_name = model_name
+        self.index_type = (index_type or settings.RAG_FAISS_INDEX_TYPE).lower()
+        if self.index_type not in faiss_index.INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {self.index_type}")
 
         # Standard embeddings configuration
         encode_kwargs = {'normalize_embeddings': True}
         model_kwargs = {'device': 'cpu'}
 
-        self.embeddings = HuggingFaceEmbeddings(
+        # Cached so re-ingested chunks and repeated queries skip the model
+        self.embeddings = with_embedding_cache(HuggingFaceEmbeddings(
             model_name=model_name,
             model_kwargs=model_kwargs,
             encode_kwargs=encode_kwargs
-        )
+        ))
 
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -65,6 +101,19 @@ class RAGService:
             length_function=len
         )
 
+        # Serializes FAISS index mutation and search across executor threads
+        self._lock = threading.RLock()
+
+        # Maintained on ingest so get_stats never runs the model
+        if index_name is None:
+            index_name = os.path.basename(os.path.normpath(vector_store_path)) if vector_store_path else "default"
+        self.stats = RAGStats(
+            model_name,
+            export_metrics=settings.RAG_STATS_PROMETHEUS_ENABLED,
+            index_name=index_name
+        )
+        self.stats.set_dimension(self._model_dimension())
+
         # Initialize or load vector store
         if vector_store_path and os.path.exists(vector_store_path):
             self.vectorstore = FAISS.load_local(
@@ -72,10 +121,114 @@ class RAGService:
                 self.embeddings,
                 allow_dangerous_deserialization=True
             )
+            faiss_index.apply_search_params(
+                self.vectorstore.index,
+                nprobe=settings.RAG_FAISS_NPROBE,
+                ef_search=settings.RAG_FAISS_EF_SEARCH
+            )
+            self._load_stats()
         else:
             # Start with empty vector store (will be populated later)
             self.vectorstore = None
 
+    def _model_dimension(self) -> Optional[int]:
+        """Embedding dimension reported by the loaded sentence-transformers model"""
+        client = getattr(self.embeddings.base, "client", None)
+        try:
+            return client.get_sentence_embedding_dimension()
+        except AttributeError:
+            return None
+
+    def _index_type(self) -> str:
+        """Type of the index currently serving searches"""
+        if isinstance(self.vectorstore.index, faiss.IndexFlat):
+            return "flat"
+        return self.index_type
+
+    def _load_stats(self):
+        """Initialize statistics from a saved index (one pass over the docstore)"""
+        docs = self.vectorstore.docstore._dict.values()
+        self.stats.set_dimension(self.vectorstore.index.d)
+        self.stats.reset(
+            documents=sum(1 for doc in docs if doc.metadata.get("chunk_index", 0) == 0),
+            chunks=self.vectorstore.index.ntotal,
+            content_bytes=sum(len(doc.page_content.encode("utf-8")) for doc in docs),
+            index_bytes=faiss_index.index_bytes(self.vectorstore.index),
+            index_type=self._index_type()
+        )
+
+    def _split_documents(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Document]:
+        """Split documents into chunk Documents with chunk metadata"""
+        docs = []
+        for i, text in enumerate(documents):
+            metadata = metadatas[i] if metadatas and i < len(metadatas) else {}
+            # Split long documents into chunks
+            chunks = self.text_splitter.split_text(text)
+            for j, chunk in enumerate(chunks):
+                chunk_metadata = metadata.copy()
+                chunk_metadata["chunk_index"] = j
+                chunk_metadata["total_chunks"] = len(chunks)
+                docs.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return docs
+
+    @tracer.traced("faiss.add")
+    def _add_embedded(self, docs: List[Document], vectors: List[List[float]]):
+        """Add pre-embedded chunks to the FAISS index"""
+        text_embeddings = [(doc.page_content, vector) for doc, vector in zip(docs, vectors)]
+        metadatas = [doc.metadata for doc in docs]
+
+        with self._lock:
+            if self.vectorstore is None:
+                self.vectorstore = FAISS.from_embeddings(
+                    text_embeddings,
+                    self.embeddings,
+                    metadatas=metadatas
+                )
+            else:
+                self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+
+            self._maybe_promote_index()
+
+            self.stats.set_dimension(self.vectorstore.index.d)
+            self.stats.record_ingest(
+                documents=sum(1 for doc in docs if doc.metadata.get("chunk_index") == 0),
+                chunks=len(docs),
+                content_bytes=sum(len(doc.page_content.encode("utf-8")) for doc in docs),
+                index_bytes=faiss_index.index_bytes(self.vectorstore.index),
+                index_type=self._index_type()
+            )
+
+    def _maybe_promote_index(self):
+        """Rebuild the exact flat index as the configured ANN index once it is large enough"""
+        index = self.vectorstore.index
+        if not faiss_index.should_promote(
+            index, self.index_type, settings.RAG_FAISS_PROMOTION_THRESHOLD
+        ):
+            return
+
+        start_time = time.perf_counter()
+        self.vectorstore.index = faiss_index.promote(
+            index,
+            self.index_type,
+            train_size=settings.RAG_FAISS_TRAIN_SIZE,
+            nprobe=settings.RAG_FAISS_NPROBE,
+            ef_search=settings.RAG_FAISS_EF_SEARCH,
+            nlist=settings.RAG_FAISS_NLIST,
+            hnsw_m=settings.RAG_FAISS_HNSW_M,
+            pq_m=settings.RAG_FAISS_PQ_M,
+            pq_nbits=settings.RAG_FAISS_PQ_NBITS
+        )
+        logger.info(
+            "faiss_index_promoted",
+            index_type=self.index_type,
+            vectors=index.ntotal,
+            duration=time.perf_counter() - start_time
+        )
+
     def add_documents(
         self,
         documents: List[str],
@@ -91,26 +244,109 @@ class RAGService:
         Returns:
             Number of documents added
         """
-        # Create Document objects
-        docs = []
-        for i, text in enumerate(documents):
-            metadata = metadatas[i] if metadatas and i < len(metadatas) else {}
-            # Split long documents into chunks
-            chunks = self.text_splitter.split_text(text)
-            for j, chunk in enumerate(chunks):
-                chunk_metadata = metadata.copy()
-                chunk_metadata["chunk_index"] = j
-                chunk_metadata["total_chunks"] = len(chunks)
-                docs.append(Document(page_content=chunk, metadata=chunk_metadata))
+        docs = self._split_documents(documents, metadatas)
+        if not docs:
+            return 0
 
-        # Add to vector store
-        if self.vectorstore is None:
-            self.vectorstore = FAISS.from_documents(docs, self.embeddings)
-        else:
-            self.vectorstore.add_documents(docs)
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in docs])
+        self._add_embedded(docs, vectors)
 
         return len(docs)
 
+    async def aadd_documents(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """
+        Add documents without blocking the event loop
+
+        Embedding runs in the CPU pool and the FAISS insert in the I/O pool.
+
+        Returns:
+            Number of chunks added
+        """
+        docs = self._split_documents(documents, metadatas)
+        if not docs:
+            return 0
+
+        vectors = await self.embeddings.aembed_documents([doc.page_content for doc in docs])
+        await compute_executor.run_io(self._add_embedded, docs, vectors)
+
+        return len(docs)
+
+    @tracer.traced("faiss.search")
+    def _search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 3,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search the FAISS index with a pre-computed query embedding"""
+        with self._lock:
+            if self.vectorstore is None:
+                return []
+
+            # Perform search with scores
+            if filter_dict:
+                results = self.vectorstore.similarity_search_with_score_by_vector(
+                    embedding,
+                    k=k,
+                    filter=filter_dict
+                )
+            else:
+                results = self.vectorstore.similarity_search_with_score_by_vector(embedding, k=k)
+
+        return self._format_results(results)
+
+    @staticmethod
+    def _format_results(results: List[Tuple[Document, float]]) -> List[Dict[str, Any]]:
+        """Format (document, score) pairs for API responses"""
+        formatted_results = []
+        for doc, score in results:
+            formatted_results.append({
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "score": float(score)
+            })
+
+        return formatted_results
+
+    @tracer.traced("faiss.search_many")
+    def _search_many_by_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int = 3,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search the FAISS index for many pre-computed query embeddings"""
+        if filter_dict:
+            # LangChain's FAISS filters metadata per query (over-fetching fetch_k
+            # candidates), so filtered queries are searched one at a time
+            return [self._search_by_vector(embedding, k, filter_dict) for embedding in embeddings]
+
+        with self._lock:
+            if self.vectorstore is None:
+                return [[] for _ in embeddings]
+
+            # One vectorized ANN search for all queries
+            scores, indices = self.vectorstore.index.search(
+                np.asarray(embeddings, dtype=np.float32), k
+            )
+
+            all_results = []
+            for row_scores, row_indices in zip(scores, indices):
+                results = []
+                for score, i in zip(row_scores, row_indices):
+                    if i == -1:
+                        # Fewer than k vectors in the index
+                        continue
+                    doc_id = self.vectorstore.index_to_docstore_id[i]
+                    results.append((self.vectorstore.docstore.search(doc_id), score))
+                all_results.append(self._format_results(results))
+
+        return all_results
+
     def semantic_search(
         self,
         query: str,
@@ -131,26 +367,72 @@ class RAGService:
         if self.vectorstore is None:
             return []
 
-        # Perform search with scores
-        if filter_dict:
-            results = self.vectorstore.similarity_search_with_score(
-                query,
-                k=k,
-                filter=filter_dict
-            )
-        else:
-            results = self.vectorstore.similarity_search_with_score(query, k=k)
+        embedding = self.embeddings.embed_query(query)
+        return self._search_by_vector(embedding, k, filter_dict)
 
-        # Format results
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": float(score)
-            })
+    async def asemantic_search(
+        self,
+        query: str,
+        k: int = 3,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform semantic search without blocking the event loop
 
-        return formatted_results
+        Returns:
+            List of search results with content, metadata, and scores
+        """
+        if self.vectorstore is None:
+            return []
+
+        embedding = await self.embeddings.aembed_query(query)
+        return await compute_executor.run_io(self._search_by_vector, embedding, k, filter_dict)
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 3,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Perform semantic search for many queries at once
+
+        Args:
+            queries: Search queries
+            k: Number of results per query
+            filter_dict: Optional metadata filter applied to every query
+
+        Returns:
+            One result list per query, in query order
+        """
+        if self.vectorstore is None or not queries:
+            return [[] for _ in queries]
+
+        embeddings = self.embeddings.embed_documents(queries)
+        return self._search_many_by_vectors(embeddings, k, filter_dict)
+
+    async def asearch_many(
+        self,
+        queries: List[str],
+        k: int = 3,
+        filter_dict: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Perform multi-query semantic search without blocking the event loop
+
+        All queries are embedded in one batched call and searched in one
+        vectorized FAISS call.
+
+        Returns:
+            One result list per query, in query order
+        """
+        if self.vectorstore is None or not queries:
+            return [[] for _ in queries]
+
+        embeddings = await self.embeddings.aembed_documents(queries)
+        return await compute_executor.run_io(
+            self._search_many_by_vectors, embeddings, k, filter_dict
+        )
 
     def get_retriever(self, search_type: str = "similarity", k: int = 3):
         """
@@ -180,24 +462,4 @@ class RAGService:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
-        # Get embedding dimension from embeddings client
-        try:
-            test_embedding = self.embeddings.embed_query("test")
-            embedding_dimension = len(test_embedding)
-        except:
-            embedding_dimension = 0
-
-        if self.vectorstore is None:
-            return {
-                "initialized": False,
-                "document_count": 0,
-                "embedding_model": self.model_name,
-                "embedding_dimension": embedding_dimension
-            }
-
-        return {
-            "initialized": True,
-            "document_count": self.vectorstore.index.ntotal,
-            "embedding_model": self.model_name,
-            "embedding_dimension": embedding_dimension
-        }
+        return self.stats.snapshot()
@@ -0,0 +1,112 @@
+"""
+RAG Vector Store Statistics
+Maintains RAGService statistics incrementally so stats requests never touch the
+embedding model or scan the index
+"""
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+from monitoring.metrics import (
+    rag_chunks,
+    rag_documents,
+    rag_index_bytes,
+    rag_memory_bytes,
+    rag_last_ingest_timestamp
+)
+import threading
+
+
+class RAGStats:
+    """
+    Counters updated on ingest and served as an O(1) snapshot
+
+    Exported gauges carry an ``index`` label, so each named index reports its
+    own series; instances sharing a name overwrite each other.
+    """
+
+    def __init__(self, embedding_model: str, export_metrics: bool = False, index_name: str = "default"):
+        self.embedding_model = embedding_model
+        self.export_metrics = export_metrics
+        self.index_name = index_name
+        self.embedding_dimension: Optional[int] = None
+        self.index_type = "flat"
+
+        self.document_count = 0
+        self.chunk_count = 0
+        self.content_bytes = 0
+        self.index_bytes = 0
+        self.last_ingest_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def set_dimension(self, dimension: Optional[int]):
+        """Record the embedding dimension once it is known"""
+        if dimension and self.embedding_dimension is None:
+            self.embedding_dimension = int(dimension)
+
+    def record_ingest(
+        self,
+        documents: int,
+        chunks: int,
+        content_bytes: int,
+        index_bytes: int,
+        index_type: str
+    ):
+        """Account for a batch of newly indexed documents"""
+        with self._lock:
+            self.document_count += documents
+            self.chunk_count += chunks
+            self.content_bytes += content_bytes
+            self.index_bytes = index_bytes
+            self.index_type = index_type
+            self.last_ingest_at = datetime.now(timezone.utc)
+            self._export()
+
+    def reset(
+        self,
+        documents: int,
+        chunks: int,
+        content_bytes: int,
+        index_bytes: int,
+        index_type: str
+    ):
+        """Replace the counters, e.g. after loading a saved index"""
+        with self._lock:
+            self.document_count = documents
+            self.chunk_count = chunks
+            self.content_bytes = content_bytes
+            self.index_bytes = index_bytes
+            self.index_type = index_type
+            self._export()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Index bytes plus the chunk texts held in the docstore"""
+        return self.index_bytes + self.content_bytes
+
+    def _export(self):
+        if not self.export_metrics:
+            return
+        index = self.index_name
+        rag_documents.labels(index=index).set(self.document_count)
+        rag_chunks.labels(index=index).set(self.chunk_count)
+        rag_index_bytes.labels(index=index).set(self.index_bytes)
+        rag_memory_bytes.labels(index=index).set(self.memory_bytes)
+        if self.last_ingest_at is not None:
+            rag_last_ingest_timestamp.labels(index=index).set(self.last_ingest_at.timestamp())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current statistics"""
+        with self._lock:
+            return {
+                "initialized": self.chunk_count > 0,
+                # Chunks are what the index holds and what search returns
+                "document_count": self.chunk_count,
+                "source_document_count": self.document_count,
+                "chunk_count": self.chunk_count,
+                "embedding_model": self.embedding_model,
+                "embedding_dimension": self.embedding_dimension or 0,
+                "index_type": self.index_type,
+                "index_bytes": self.index_bytes,
+                "memory_bytes": self.memory_bytes,
+                "last_ingest_at": self.last_ingest_at,
+                "vector_store_type": f"FAISS ({self.index_type})"
+            }
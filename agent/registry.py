@@ -0,0 +1,69 @@
+"""
+Agent Registry
+Compiles each GraphAgent type once and reuses the compiled graph across requests
+"""
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+from agent.graph_agent import GraphAgent
+from config.settings import settings
+from monitoring.metrics import agent_graph_build_seconds
+from monitoring.logger import get_logger
+import threading
+import time
+
+logger = get_logger(__name__)
+
+
+class AgentRegistry:
+    """Cache of compiled GraphAgents keyed by agent type"""
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._agents: "OrderedDict[str, GraphAgent]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build(self, agent_type: str) -> GraphAgent:
+        start_time = time.perf_counter()
+        agent = GraphAgent(agent_type)
+        duration = time.perf_counter() - start_time
+
+        agent_graph_build_seconds.labels(agent_type=agent_type).observe(duration)
+        logger.info("agent_graph_compiled", agent_type=agent_type, duration=duration)
+        return agent
+
+    def get(self, agent_type: str) -> GraphAgent:
+        """Return the compiled agent for a type, compiling it on first use"""
+        with self._lock:
+            agent = self._agents.get(agent_type)
+            if agent is not None:
+                self._agents.move_to_end(agent_type)
+                return agent
+
+            agent = self._build(agent_type)
+            self._agents[agent_type] = agent
+            # Agent types come from requests, so bound how many stay compiled
+            while len(self._agents) > self.max_size:
+                self._agents.popitem(last=False)
+            return agent
+
+    def warm_up(self, agent_types: Iterable[str]):
+        """Compile agents ahead of the first request (e.g. at startup)"""
+        for agent_type in agent_types:
+            self.get(agent_type)
+
+    def invalidate(self, agent_type: Optional[str] = None):
+        """Drop one compiled agent, or all of them, so they are rebuilt on next use"""
+        with self._lock:
+            if agent_type is None:
+                self._agents.clear()
+            else:
+                self._agents.pop(agent_type, None)
+
+    def agent_types(self) -> List[str]:
+        """Agent types currently compiled"""
+        with self._lock:
+            return list(self._agents)
+
+
+# Singleton instance
+agent_registry = AgentRegistry(max_size=settings.AGENT_REGISTRY_MAX_SIZE)
@@ -0,0 +1,146 @@
+"""
+Semantic Response Cache
+Reuses agent answers for near-duplicate questions that retrieve the same
+documents from an unchanged knowledge base
+"""
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from monitoring.metrics import agent_response_cache_total
+import numpy as np
+import threading
+import hashlib
+import time
+
+
+def documents_fingerprint(results: List[Dict[str, Any]]) -> str:
+    """Order-independent fingerprint of the retrieved document ids"""
+    ids = sorted(str(result.get("id")) for result in results)
+    return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Small in-memory vector index of answered questions
+
+    Entries live in a fixed-size ring of normalized query embeddings, so a
+    lookup is one matrix-vector product. A cached answer is reused when the
+    new question is at least ``threshold`` cosine-similar to a cached one,
+    retrieved exactly the same documents, was asked of the same agent type,
+    and the knowledge base version has not changed since it was cached.
+    ``max_entries=0`` disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 1000, threshold: float = 0.95, ttl: float = 3600.0):
+        if max_entries < 0:
+            raise ValueError("max_entries must be 0 (disabled) or positive")
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._next = 0
+        self._kb_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _check_version(self, kb_version: int):
+        """Drop every entry once the knowledge base changed"""
+        if kb_version != self._kb_version:
+            self._vectors = None
+            self._entries = [None] * self.max_entries
+            self._next = 0
+            self._kb_version = kb_version
+
+    def lookup(
+        self,
+        agent_type: str,
+        embedding: List[float],
+        results: List[Dict[str, Any]],
+        kb_version: int
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a near-duplicate question, if any"""
+        if self.max_entries == 0:
+            agent_response_cache_total.labels(result="skip").inc()
+            return None
+
+        fingerprint = documents_fingerprint(results)
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(kb_version)
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                agent_response_cache_total.labels(result="miss").inc()
+                return None
+
+            similarities = self._vectors @ query
+            for i in np.argsort(-similarities):
+                if similarities[i] < self.threshold:
+                    break
+                entry = self._entries[i]
+                if (
+                    entry is not None
+                    and entry["agent_type"] == agent_type
+                    and entry["fingerprint"] == fingerprint
+                    and now - entry["created_at"] <= self.ttl
+                ):
+                    agent_response_cache_total.labels(result="hit").inc()
+                    return entry
+
+        agent_response_cache_total.labels(result="miss").inc()
+        return None
+
+    def put(
+        self,
+        agent_type: str,
+        embedding: List[float],
+        results: List[Dict[str, Any]],
+        kb_version: int,
+        response: str,
+        query: str
+    ):
+        """Cache an answer"""
+        if self.max_entries == 0:
+            return
+
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            self._check_version(kb_version)
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+                self._next = 0
+
+            # Overwrite the oldest slot
+            slot = self._next
+            self._vectors[slot] = vector
+            self._entries[slot] = {
+                "agent_type": agent_type,
+                "fingerprint": documents_fingerprint(results),
+                "response": response,
+                "query": query,
+                "created_at": time.time()
+            }
+            self._next = (slot + 1) % self.max_entries
+
+    def clear(self):
+        """Drop all cached answers"""
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.max_entries
+            self._next = 0
+
+
+# Shared cache instance
+response_cache = ResponseCache(
+    max_entries=settings.AGENT_RESPONSE_CACHE_MAX_ENTRIES,
+    threshold=settings.AGENT_RESPONSE_CACHE_THRESHOLD,
+    ttl=settings.AGENT_RESPONSE_CACHE_TTL
+)
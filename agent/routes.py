@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from common.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from common.database import get_async_db, AsyncSessionLocal
+from config.settings import settings
 from auth.security import get_current_active_user
 from auth.models import User
 from agent.models import AgentSession, AgentMessage, KnowledgeBase
@@ -12,14 +16,22 @@ from agent.schemas import (
     SessionResponse,
     MessageResponse,
     KnowledgeBaseCreate,
-    KnowledgeBaseResponse
+    KnowledgeBaseResponse,
+    KnowledgeSearchRequest,
+    KnowledgeSearchResponse
 )
-from agent.graph_agent import create_agent
+from agent.registry import agent_registry
+from agent.history import conversation_history
 from agent.llm_client import llm_client
-from agent.vector_store import vector_store
+from agent.inference import InferenceQueueFull, InferenceTimeout
+from agent.vector_store import vector_store, InsertBufferFull
+from common.executor import compute_executor
 from monitoring.logger import get_logger
+from monitoring.metrics import ai_agent_requests_total, ai_agent_duration_seconds, observe_stage
 from monitoring.models import AgentLog
+from monitoring.log_writer import log_writer
 from datetime import datetime
+import asyncio
 import time
 import json
 
@@ -27,112 +39,321 @@ router = APIRouter(prefix="/agent", tags=["AI Agent"])
 logger = get_logger(__name__)
 
 
+async def _save_turn(
+    db: AsyncSession,
+    query_data: AgentQuery,
+    user_id: int,
+    session_id: Optional[int],
+    asked_at: datetime,
+    result: Optional[dict] = None
+) -> int:
+    """
+    Persist one agent query in a single transaction
+
+    Creates the session if needed, then writes the user message and the
+    assistant message (when the agent answered).
+
+    Returns:
+        The session id
+    """
+    if session_id is None:
+        session = AgentSession(
+            user_id=user_id,
+            agent_type=query_data.agent_type
+        )
+        db.add(session)
+        # Assigns the session id without ending the transaction
+        await db.flush()
+        session_id = session.id
+
+    db.add(AgentMessage(
+        session_id=session_id,
+        role="user",
+        content=query_data.query,
+        created_at=asked_at
+    ))
+    if result is not None:
+        db.add(AgentMessage(
+            session_id=session_id,
+            role="assistant",
+            content=result["response"],
+            message_metadata={"retrieval_results": result.get("retrieval_results", [])}
+        ))
+    await db.commit()
+    return session_id
+
+
 @router.post("/query", response_model=AgentResponse)
 async def query_agent(
     query_data: AgentQuery,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Query the AI agent"""
     start_time = time.time()
+    asked_at = datetime.utcnow()
+    user_id = current_user.id
+    session_id = query_data.session_id
+    history = []
+
+    if session_id:
+        owned = await db.scalar(select(AgentSession.id).where(
+            AgentSession.id == session_id,
+            AgentSession.user_id == user_id
+        ))
+        if owned is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        # Previous turns that fit the history token budget
+        with observe_stage(query_data.agent_type, "history"):
+            history = await conversation_history.load(db, session_id)
+
+    # End the read transaction so no connection is held while the model runs
+    await db.commit()
 
     try:
-        # Create or get session
-        if query_data.session_id:
-            session = db.query(AgentSession).filter(
-                AgentSession.id == query_data.session_id,
-                AgentSession.user_id == current_user.id
-            ).first()
-            if not session:
-                raise HTTPException(status_code=404, detail="Session not found")
-        else:
-            session = AgentSession(
-                user_id=current_user.id,
-                agent_type=query_data.agent_type
-            )
-            db.add(session)
-            db.commit()
-            db.refresh(session)
-
-        # Save user message
-        user_message = AgentMessage(
-            session_id=session.id,
-            role="user",
-            content=query_data.query
-        )
-        db.add(user_message)
-        db.commit()
-
-        # Create and run agent
-        agent = create_agent(query_data.agent_type)
-        result = await agent.run(query_data.query)
+        # Run the precompiled agent
+        agent = agent_registry.get(query_data.agent_type)
+        result = await agent.run(query_data.query, history=history)
 
-        # Save assistant message
-        assistant_message = AgentMessage(
-            session_id=session.id,
-            role="assistant",
-            content=result["response"],
-            message_metadata={"retrieval_results": result.get("retrieval_results", [])}
-        )
-        db.add(assistant_message)
-        db.commit()
-
-        # Log agent activity
+        with observe_stage(query_data.agent_type, "persistence"):
+            session_id = await _save_turn(
+                db, query_data, user_id, session_id, asked_at, result=result
+            )
         duration = time.time() - start_time
-        agent_log = AgentLog(
-            agent_type=query_data.agent_type,
-            user_id=current_user.id,
-            query=query_data.query,
-            response=result["response"],
-            duration=duration,
-            status="success"
-        )
-        db.add(agent_log)
-        db.commit()
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="success").inc()
+        ai_agent_duration_seconds.labels(agent_type=query_data.agent_type).observe(duration)
+        log_writer.enqueue(AgentLog, {
+            "agent_type": query_data.agent_type,
+            "user_id": user_id,
+            "query": query_data.query,
+            "response": result["response"],
+            "duration": duration,
+            "status": "success"
+        })
 
         logger.info(
             "agent_query_completed",
             agent_type=query_data.agent_type,
-            user_id=current_user.id,
+            user_id=user_id,
             duration=duration
         )
 
+        # Fold old turns into the rolling summary after the response is sent
+        background_tasks.add_task(conversation_history.update_summary, session_id)
+
         return {
             "response": result["response"],
-            "session_id": session.id,
+            "session_id": session_id,
             "context": result.get("context"),
+            "context_tokens": result.get("context_tokens"),
+            "cached": result.get("cached", False),
             "retrieval_results": result.get("retrieval_results")
         }
 
-    except Exception as e:
-        duration = time.time() - start_time
-        agent_log = AgentLog(
+    except InferenceQueueFull as e:
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="rejected").inc()
+        logger.warning(
+            "agent_query_rejected",
             agent_type=query_data.agent_type,
-            user_id=current_user.id,
-            query=query_data.query,
-            response="",
-            duration=duration,
-            status="error",
-            error_message=str(e)
+            user_id=user_id,
+            error=str(e)
+        )
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    except InferenceTimeout as e:
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="timeout").inc()
+        logger.warning(
+            "agent_query_timeout",
+            agent_type=query_data.agent_type,
+            user_id=user_id,
+            error=str(e)
         )
-        db.add(agent_log)
-        db.commit()
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except Exception as e:
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="error").inc()
+        # A failed write leaves the transaction unusable
+        await db.rollback()
+        log_writer.enqueue(AgentLog, {
+            "agent_type": query_data.agent_type,
+            "user_id": user_id,
+            "query": query_data.query,
+            "response": "",
+            "duration": time.time() - start_time,
+            "status": "error",
+            "error_message": str(e)
+        })
+        try:
+            # Keep the question even though it got no answer
+            await _save_turn(db, query_data, user_id, session_id, asked_at)
+        except Exception as save_error:
+            # Typically the same database failure; still return the intended 500
+            await db.rollback()
+            logger.error(
+                "agent_query_save_failed",
+                agent_type=query_data.agent_type,
+                user_id=user_id,
+                error=str(save_error)
+            )
 
         logger.error(
             "agent_query_failed",
             agent_type=query_data.agent_type,
-            user_id=current_user.id,
+            user_id=user_id,
             error=str(e)
         )
 
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
 
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/query/stream")
+async def query_agent_stream(
+    query_data: AgentQuery,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Query the AI agent, streaming the answer as Server-Sent Events
+
+    Emits a ``retrieval`` event with the retrieved documents, one ``token``
+    event per generated token, then ``done`` once the assistant message is
+    saved (or ``error`` if generation or saving fails).
+    """
+    start_time = time.time()
+    user_id = current_user.id
+
+    # Reject up front while the status code can still be sent
+    if llm_client.scheduler.full():
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="rejected").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="LLM request queue is full",
+            headers={"Retry-After": "5"}
+        )
+
+    # Resolve the session before streaming so errors are still plain HTTP errors
+    if query_data.session_id:
+        session = await db.scalar(select(AgentSession).where(
+            AgentSession.id == query_data.session_id,
+            AgentSession.user_id == user_id
+        ))
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+    else:
+        session = AgentSession(
+            user_id=user_id,
+            agent_type=query_data.agent_type
+        )
+        db.add(session)
+        # Assigns the session id; committed together with the user message
+        await db.flush()
+    session_id = session.id
+
+    # Previous turns that fit the history token budget
+    with observe_stage(query_data.agent_type, "history"):
+        history = await conversation_history.load(db, session_id)
+
+    # Save user message
+    user_message = AgentMessage(
+        session_id=session_id,
+        role="user",
+        content=query_data.query
+    )
+    db.add(user_message)
+    await db.commit()
+
+    agent = agent_registry.get(query_data.agent_type)
+
+    async def event_stream():
+        first_token_time = None
+        try:
+            async for event, data in agent.astream(query_data.query, history=history):
+                if event == "retrieval":
+                    yield _sse("retrieval", {"session_id": session_id, **data})
+                elif event == "token":
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    yield _sse("token", {"text": data})
+                else:
+                    result = data
+
+            # The request session is closed once streaming starts
+            with observe_stage(query_data.agent_type, "persistence"):
+                async with AsyncSessionLocal() as message_db:
+                    message_db.add(AgentMessage(
+                        session_id=session_id,
+                        role="assistant",
+                        content=result["response"],
+                        message_metadata={"retrieval_results": result.get("retrieval_results", [])}
+                    ))
+                    await message_db.commit()
+        except Exception as e:
+            ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="error").inc()
+            log_writer.enqueue(AgentLog, {
+                "agent_type": query_data.agent_type,
+                "user_id": user_id,
+                "query": query_data.query,
+                "response": "",
+                "duration": time.time() - start_time,
+                "status": "error",
+                "error_message": str(e)
+            })
+
+            logger.error(
+                "agent_stream_failed",
+                agent_type=query_data.agent_type,
+                user_id=user_id,
+                error=str(e)
+            )
+            yield _sse("error", {"detail": f"Agent error: {str(e)}"})
+            return
+
+        duration = time.time() - start_time
+        ai_agent_requests_total.labels(agent_type=query_data.agent_type, status="success").inc()
+        ai_agent_duration_seconds.labels(agent_type=query_data.agent_type).observe(duration)
+        log_writer.enqueue(AgentLog, {
+            "agent_type": query_data.agent_type,
+            "user_id": user_id,
+            "query": query_data.query,
+            "response": result["response"],
+            "duration": duration,
+            "status": "success"
+        })
+
+        logger.info(
+            "agent_stream_completed",
+            agent_type=query_data.agent_type,
+            user_id=user_id,
+            duration=duration,
+            time_to_first_token=first_token_time
+        )
+
+        yield _sse("done", {
+            "session_id": session_id,
+            "response": result["response"],
+            "cached": result.get("cached", False)
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(conversation_history.update_summary, session_id)
+    )
+
+
 @router.post("/sessions", response_model=SessionResponse)
 async def create_session(
     session_data: SessionCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new agent session"""
     session = AgentSession(
@@ -140,8 +361,8 @@ async def create_session(
         agent_type=session_data.agent_type
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
 
     return session
 
@@ -149,12 +370,14 @@ async def create_session(
 @router.get("/sessions", response_model=List[SessionResponse])
 async def get_sessions(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's agent sessions"""
-    sessions = db.query(AgentSession).filter(
-        AgentSession.user_id == current_user.id
-    ).order_by(AgentSession.created_at.desc()).all()
+    sessions = (await db.scalars(
+        select(AgentSession).where(
+            AgentSession.user_id == current_user.id
+        ).order_by(AgentSession.created_at.desc())
+    )).all()
 
     return sessions
 
@@ -163,20 +386,22 @@ async def get_sessions(
 async def get_session_messages(
     session_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get messages for a session"""
-    session = db.query(AgentSession).filter(
+    session = await db.scalar(select(AgentSession).where(
         AgentSession.id == session_id,
         AgentSession.user_id == current_user.id
-    ).first()
+    ))
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    messages = db.query(AgentMessage).filter(
-        AgentMessage.session_id == session_id
-    ).order_by(AgentMessage.created_at.asc()).all()
+    messages = (await db.scalars(
+        select(AgentMessage).where(
+            AgentMessage.session_id == session_id
+        ).order_by(AgentMessage.created_at.asc())
+    )).all()
 
     return messages
 
@@ -184,18 +409,26 @@ async def get_session_messages(
 @router.post("/knowledge-base", response_model=KnowledgeBaseResponse)
 async def add_knowledge(
     knowledge_data: KnowledgeBaseCreate,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Add knowledge to the knowledge base and vector store"""
+    """
+    Add knowledge to the knowledge base and vector store
+
+    Waits up to MILVUS_INSERT_WAIT_TIMEOUT for the buffered vector write; if it
+    has not landed by then the entry is saved anyway and returned with 202 and
+    ``vector_status="pending"``.
+    """
     try:
         # Generate embeddings
         embeddings = await llm_client.generate_embeddings(knowledge_data.content)
 
         # Store in vector database
-        vector_store.connect()
-        vector_store.create_collection()
-        vector_store.insert(
+        await compute_executor.run_io(vector_store.connect)
+        await compute_executor.run_io(vector_store.create_collection)
+        written = await compute_executor.run_io(
+            vector_store.insert,
             embeddings=[embeddings],
             texts=[knowledge_data.content],
             metadata=[json.dumps({
@@ -204,6 +437,15 @@ async def add_knowledge(
                 "tags": knowledge_data.tags
             })]
         )
+        vector_status = "indexed"
+        try:
+            # Shielded so a timeout doesn't cancel the write itself
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(written)),
+                timeout=settings.MILVUS_INSERT_WAIT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            vector_status = "pending"
 
         # Store in database
         knowledge = KnowledgeBase(
@@ -213,11 +455,19 @@ async def add_knowledge(
             tags=knowledge_data.tags
         )
         db.add(knowledge)
-        db.commit()
-        db.refresh(knowledge)
+        await db.commit()
+        await db.refresh(knowledge)
 
-        return knowledge
+        if vector_status == "pending":
+            response.status_code = 202
+        return KnowledgeBaseResponse.model_validate(knowledge).model_copy(
+            update={"vector_status": vector_status}
+        )
 
+    except InsertBufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid knowledge entry: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -229,14 +479,50 @@ async def add_knowledge(
 async def get_knowledge(
     category: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get knowledge base entries"""
-    query = db.query(KnowledgeBase)
+    query = select(KnowledgeBase)
 
     if category:
-        query = query.filter(KnowledgeBase.category == category)
+        query = query.where(KnowledgeBase.category == category)
 
-    knowledge = query.order_by(KnowledgeBase.created_at.desc()).all()
+    knowledge = (await db.scalars(query.order_by(KnowledgeBase.created_at.desc()))).all()
 
     return knowledge
+
+
+@router.post("/knowledge-base/search/batch", response_model=List[KnowledgeSearchResponse])
+async def search_knowledge_batch(
+    search_data: KnowledgeSearchRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Search the knowledge base for many queries with one embedding call and one Milvus request"""
+    try:
+        embeddings = await llm_client.generate_batch_embeddings(search_data.queries)
+        results = await compute_executor.run_io(
+            vector_store.search_many, embeddings, top_k=search_data.top_k
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+    return [
+        {"query": query, "results": hits}
+        for query, hits in zip(search_data.queries, results)
+    ]
+
+
+@router.get("/vector-store/ready")
+async def vector_store_ready():
+    """Readiness check for the Milvus collection"""
+    ready = await compute_executor.run_io(vector_store.is_ready)
+    if not ready:
+        raise HTTPException(status_code=503, detail="Vector store not ready")
+
+    return {
+        "status": "ready",
+        "collection": vector_store.collection_name
+    }
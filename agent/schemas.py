@@ -13,6 +13,8 @@ class AgentResponse(BaseModel):
     response: str
     session_id: int
     context: Optional[str] = None
+    context_tokens: Optional[int] = None
+    cached: bool = False
     retrieval_results: Optional[List[Dict[str, Any]]] = None
 
 
@@ -56,6 +58,25 @@ class KnowledgeBaseResponse(BaseModel):
     category: Optional[str]
     tags: Optional[List[str]]
     created_at: datetime
+    # Set when adding an entry: "indexed", or "pending" while the vector write is buffered
+    vector_status: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class KnowledgeSearchRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 5
+
+
+class KnowledgeSearchHit(BaseModel):
+    id: int
+    distance: float
+    text: Optional[str]
+    metadata: Optional[str]
+
+
+class KnowledgeSearchResponse(BaseModel):
+    query: str
+    results: List[KnowledgeSearchHit]
@@ -1,17 +1,144 @@
 from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-from typing import List, Dict, Any
+from pymilvus.client.types import LoadState
+from pymilvus.exceptions import (
+    MilvusException,
+    ParamError,
+    DataNotMatchException,
+    DataTypeNotMatchException
+)
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 from config.settings import settings
+from monitoring.metrics import (
+    milvus_insert_buffer_size,
+    milvus_insert_failures_total,
+    milvus_insert_dropped_total
+)
+from monitoring.logger import get_logger
+from agent.kb_version import kb_version
+from monitoring.tracing import tracer
+import threading
+import json
+import time
+
+logger = get_logger(__name__)
+
+
+# Default (build params, search params) per ANN index type
+INDEX_PRESETS: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {
+    "FLAT": ({}, {}),
+    "IVF_FLAT": ({"nlist": 1024}, {"nprobe": 10}),
+    "IVF_SQ8": ({"nlist": 1024}, {"nprobe": 16}),
+    "IVF_PQ": ({"nlist": 1024, "m": 16, "nbits": 8}, {"nprobe": 16}),
+    "HNSW": ({"M": 16, "efConstruction": 200}, {"ef": 64}),
+    "DISKANN": ({}, {"search_list": 100}),
+}
+
+METRIC_TYPES = ("L2", "IP", "COSINE")
+
+# max_length of the text and metadata VARCHAR fields (Milvus counts bytes)
+MAX_VARCHAR_BYTES = 65535
+
+# Server messages for data Milvus refuses, where retrying cannot help
+PERMANENT_ERROR_MARKERS = ("exceed", "dimension", "dim ", "length", "invalid", "illegal")
+
+
+class InsertBufferFull(Exception):
+    """Raised when MILVUS_INSERT_MAX_BUFFERED entities are already waiting to be written"""
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Whether a write failed because of the data rather than Milvus being unavailable"""
+    if isinstance(error, (ParamError, DataNotMatchException, DataTypeNotMatchException, ValueError, TypeError)):
+        return True
+    if isinstance(error, MilvusException):
+        message = str(error).lower()
+        return any(marker in message for marker in PERMANENT_ERROR_MARKERS)
+    return False
+
+
+class _InsertTicket:
+    """Resolves its future once every row of one insert() call is written"""
+
+    def __init__(self, rows: int):
+        self.future: Future = Future()
+        self._remaining = rows
+        self._lock = threading.Lock()
+        if rows == 0:
+            self.future.set_result(None)
+
+    def written(self, rows: int):
+        with self._lock:
+            self._remaining -= rows
+            if self._remaining <= 0 and not self.future.done():
+                self.future.set_result(None)
+
+    def failed(self, error: Exception):
+        with self._lock:
+            if not self.future.done():
+                self.future.set_exception(error)
+
+
+@dataclass
+class _PendingBatch:
+    """A batch of (embeddings, texts, metadata, tickets) and its write attempts"""
+    batch: Tuple[List, List, List, List]
+    attempts: int = 0
+    retry_at: float = 0.0
+
+
+def _json_setting(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    return json.loads(value) if value else None
 
 
 class VectorStore:
     """Milvus vector database client"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        collection_name: Optional[str] = None,
+        index_type: Optional[str] = None,
+        metric_type: Optional[str] = None,
+        index_params: Optional[Dict[str, Any]] = None,
+        search_params: Optional[Dict[str, Any]] = None
+    ):
         self.host = settings.MILVUS_HOST
         self.port = settings.MILVUS_PORT
-        self.collection_name = settings.MILVUS_COLLECTION_NAME
+        self.collection_name = collection_name or settings.MILVUS_COLLECTION_NAME
         self.collection = None
 
+        # ANN index configuration (per instance, defaulting to settings)
+        self._configure_index(
+            index_type or settings.MILVUS_INDEX_TYPE,
+            metric_type or settings.MILVUS_METRIC_TYPE,
+            index_params if index_params is not None else _json_setting(settings.MILVUS_INDEX_PARAMS),
+            search_params if search_params is not None else _json_setting(settings.MILVUS_SEARCH_PARAMS)
+        )
+        # Cleared while the index is being rebuilt so searches wait instead of failing
+        self._index_ready = threading.Event()
+        self._index_ready.set()
+
+        # Load state is tracked locally so searches don't call load() each time
+        self._loaded = False
+        self._load_checked_at = 0.0
+        self._load_lock = threading.Lock()
+
+        # Write buffer: inserts are batched instead of written (and sealed) one by one
+        self._buffer: Tuple[List, List, List, List] = ([], [], [], [])
+        self._retries: List[_PendingBatch] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_due_at = 0.0
+
+        # Embedding dimension of the collection, once known
+        self.dim: Optional[int] = None
+
+        # Bumped on every write or delete (here and in the shared kb_version) so
+        # derived caches can detect changes
+        self.version = 0
+
     def connect(self):
         """Connect to Milvus"""
         connections.connect(
@@ -20,10 +147,23 @@ class VectorStore:
             port=str(self.port)
         )
 
-    def create_collection(self, dim: int = 1536):
+    def initialize(self, dim: int = settings.EMBEDDINGS_DIMENSION):
+        """Connect, ensure the collection exists and load it into memory"""
+        self.connect()
+        self.create_collection(dim)
+        self.ensure_loaded()
+
+    def create_collection(self, dim: int = settings.EMBEDDINGS_DIMENSION):
         """Create collection if it doesn't exist"""
+        if self.collection is not None:
+            return
+
         if utility.has_collection(self.collection_name):
             self.collection = Collection(self.collection_name)
+            self._sync_index_config()
+            for field in self.collection.schema.fields:
+                if field.name == "embedding":
+                    self.dim = field.params.get("dim")
             return
 
         # Define schema
@@ -43,35 +183,434 @@ class VectorStore:
             name=self.collection_name,
             schema=schema
         )
+        self.dim = dim
 
         # Create index
-        index_params = {
-            "metric_type": "L2",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 1024}
-        }
         self.collection.create_index(
             field_name="embedding",
-            index_params=index_params
+            index_params=self._index_definition()
+        )
+        self.load()
+
+    def _configure_index(
+        self,
+        index_type: str,
+        metric_type: str,
+        index_params: Optional[Dict[str, Any]] = None,
+        search_params: Optional[Dict[str, Any]] = None
+    ):
+        """Validate and apply an index configuration, filling in preset params"""
+        index_type = index_type.upper()
+        metric_type = metric_type.upper()
+        if index_type not in INDEX_PRESETS:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        if metric_type not in METRIC_TYPES:
+            raise ValueError(f"Unsupported metric type: {metric_type}")
+
+        default_index_params, default_search_params = INDEX_PRESETS[index_type]
+        self.index_type = index_type
+        self.metric_type = metric_type
+        self.index_params = {**default_index_params, **(index_params or {})}
+        self.search_params = {**default_search_params, **(search_params or {})}
+
+    def _index_definition(self) -> Dict[str, Any]:
+        return {
+            "metric_type": self.metric_type,
+            "index_type": self.index_type,
+            "params": self.index_params
+        }
+
+    def _sync_index_config(self):
+        """Adopt the index of an existing collection so search params match it (also after
+        another process rebuilt it)"""
+        # Each access is a round trip to Milvus
+        indexes = self.collection.indexes
+        if not indexes:
+            return
+
+        existing = indexes[0].params
+        index_type = existing.get("index_type", self.index_type)
+        metric_type = existing.get("metric_type", self.metric_type)
+        if (index_type, metric_type) != (self.index_type, self.metric_type):
+            logger.warning(
+                "milvus_index_config_mismatch",
+                collection=self.collection_name,
+                configured=f"{self.index_type}/{self.metric_type}",
+                existing=f"{index_type}/{metric_type}"
+            )
+            search_params = self.search_params if index_type == self.index_type else None
+            self._configure_index(index_type, metric_type, existing.get("params"), search_params)
+
+    @property
+    def higher_is_better(self) -> bool:
+        """Whether larger distances mean more similar (IP/COSINE) rather than less (L2)"""
+        return self.metric_type in ("IP", "COSINE")
+
+    def reindex(
+        self,
+        index_type: Optional[str] = None,
+        metric_type: Optional[str] = None,
+        index_params: Optional[Dict[str, Any]] = None,
+        search_params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Rebuild the ANN index with a new type, metric or parameters
+
+        Milvus only allows one index per field and requires the collection to be
+        released to drop it, so searches in this process are paused (not failed)
+        until the new index is built and the collection is loaded again. Other
+        processes see "not loaded" errors meanwhile; their searches wait for the
+        new index and adopt its metric (see ``_recover``).
+        """
+        if not self.collection:
+            raise ValueError("Collection not initialized")
+
+        index_changed = index_type is not None and index_type.upper() != self.index_type
+        self._configure_index(
+            index_type or self.index_type,
+            metric_type or self.metric_type,
+            index_params if index_params is not None else (None if index_changed else self.index_params),
+            search_params if search_params is not None else (None if index_changed else self.search_params)
         )
 
+        self._index_ready.clear()
+        try:
+            self.flush()
+            self._release_and_drop_index()
+            self.collection.create_index(
+                field_name="embedding",
+                index_params=self._index_definition()
+            )
+            self.load()
+        finally:
+            self._index_ready.set()
+
+        logger.info(
+            "milvus_reindexed",
+            collection=self.collection_name,
+            index_type=self.index_type,
+            metric_type=self.metric_type
+        )
+
+    def _release_and_drop_index(self, attempts: int = 3):
+        """Drop the index, releasing again if another process reloaded the collection"""
+        for attempt in range(attempts):
+            self.release()
+            try:
+                self.collection.drop_index()
+                return
+            except MilvusException as e:
+                if "loaded" not in str(e).lower() or attempt == attempts - 1:
+                    raise
+                logger.warning("milvus_drop_index_retry", collection=self.collection_name)
+
+    def _wait_for_index(self):
+        """Wait until the collection has a built index (e.g. during a rebuild elsewhere)"""
+        deadline = time.monotonic() + settings.MILVUS_REINDEX_WAIT_TIMEOUT
+        while not self.collection.indexes:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No index on collection {self.collection_name}")
+            time.sleep(1.0)
+        utility.wait_for_index_building_complete(
+            self.collection_name, timeout=max(1.0, deadline - time.monotonic())
+        )
+
+    def _recover(self, error: MilvusException) -> bool:
+        """
+        Adapt to an index rebuilt by another process
+
+        Returns:
+            False if the error is unrelated and should be raised
+        """
+        message = str(error).lower()
+        if "not loaded" in message:
+            # Released behind our back, possibly for a rebuild: reload once the
+            # index exists, with its (possibly new) metric
+            self._wait_for_index()
+            self._sync_index_config()
+            self.load()
+            return True
+        if "metric" in message:
+            self._sync_index_config()
+            return True
+        return False
+
+    def _search_params(self, top_k: int) -> Dict[str, Any]:
+        params = dict(self.search_params)
+        # Graph-based indexes need a candidate list at least as long as top_k
+        if "ef" in params:
+            params["ef"] = max(params["ef"], top_k)
+        if "search_list" in params:
+            params["search_list"] = max(params["search_list"], top_k)
+        return {"metric_type": self.metric_type, "params": params}
+
+    def load(self):
+        """Load the collection into query nodes (after creation or index changes)"""
+        if not self.collection:
+            raise ValueError("Collection not initialized")
+
+        with self._load_lock:
+            self.collection.load()
+            self._loaded = True
+            self._load_checked_at = time.monotonic()
+
+    def release(self):
+        """Release the collection from memory"""
+        if not self.collection:
+            raise ValueError("Collection not initialized")
+
+        with self._load_lock:
+            self.collection.release()
+            self._loaded = False
+            self._load_checked_at = time.monotonic()
+
+    def refresh_load_state(self) -> bool:
+        """Ask Milvus whether the collection is still loaded (detects external releases)"""
+        state = utility.load_state(self.collection_name)
+        self._loaded = state == LoadState.Loaded
+        self._load_checked_at = time.monotonic()
+        return self._loaded
+
+    def ensure_loaded(self):
+        """
+        Load the collection if it is not known to be loaded
+
+        The cached state is re-verified at most every
+        MILVUS_LOAD_STATE_CHECK_INTERVAL seconds, so a release by another
+        client is noticed without a round trip on every search.
+        """
+        if not self.collection:
+            raise ValueError("Collection not initialized")
+
+        stale = time.monotonic() - self._load_checked_at > settings.MILVUS_LOAD_STATE_CHECK_INTERVAL
+        if self._loaded and not stale:
+            return
+        if not self.refresh_load_state():
+            self.load()
+
+    def is_ready(self) -> bool:
+        """Readiness check: collection exists and is loaded"""
+        if not self.collection:
+            return False
+        try:
+            return self.refresh_load_state()
+        except MilvusException:
+            return False
+
     def insert(
         self,
         embeddings: List[List[float]],
         texts: List[str],
         metadata: List[str]
-    ):
-        """Insert embeddings into collection"""
+    ) -> Future:
+        """
+        Queue embeddings for insertion into the collection
+
+        Entities are written in batches of MILVUS_INSERT_BATCH_SIZE, or after
+        MILVUS_INSERT_FLUSH_INTERVAL seconds, whichever comes first. Segments are
+        not sealed per insert; Milvus serves searches from growing segments.
+        Batches that fail to write are retried with exponential backoff, up to
+        MILVUS_INSERT_MAX_ATTEMPTS times; batches Milvus rejects outright (bad
+        data rather than an unavailable server) are dropped at once. Call
+        flush() to write and seal everything immediately.
+
+        Returns:
+            Future that resolves once all the rows are written, or raises the
+            write error if they were dropped
+
+        Raises:
+            ValueError: If a row does not fit the collection schema
+            InsertBufferFull: If MILVUS_INSERT_MAX_BUFFERED rows are already waiting
+        """
         if not self.collection:
             raise ValueError("Collection not initialized")
+        self._validate(embeddings, texts, metadata)
+
+        ticket = _InsertTicket(len(texts))
+        batches = []
+        with self._buffer_lock:
+            if self._buffered_rows() >= settings.MILVUS_INSERT_MAX_BUFFERED:
+                raise InsertBufferFull(
+                    f"{self._buffered_rows()} entities are already waiting to be written to Milvus"
+                )
+
+            buffer_embeddings, buffer_texts, buffer_metadata, buffer_tickets = self._buffer
+            buffer_embeddings.extend(embeddings)
+            buffer_texts.extend(texts)
+            buffer_metadata.extend(metadata)
+            buffer_tickets.extend([ticket] * len(texts))
+
+            if len(buffer_texts) >= settings.MILVUS_INSERT_BATCH_SIZE:
+                batches = self._take_buffer()
+            else:
+                self._schedule_flush(settings.MILVUS_INSERT_FLUSH_INTERVAL)
+
+            milvus_insert_buffer_size.set(self._buffered_rows())
 
-        entities = [
-            embeddings,
-            texts,
-            metadata
+        error = self._write_batches(batches)
+        if error is not None:
+            logger.error("milvus_insert_failed", error=str(error))
+        return ticket.future
+
+    def _validate(self, embeddings: List[List[float]], texts: List[str], metadata: List[str]):
+        """Reject rows Milvus would refuse, before they reach the buffer"""
+        if not len(embeddings) == len(texts) == len(metadata):
+            raise ValueError("embeddings, texts and metadata must have the same length")
+
+        for embedding, text, meta in zip(embeddings, texts, metadata):
+            if self.dim is not None and len(embedding) != self.dim:
+                raise ValueError(
+                    f"Embedding has dimension {len(embedding)}, collection expects {self.dim}"
+                )
+            # Milvus limits VARCHAR fields in bytes, not characters
+            for field, value in (("text", text), ("metadata", meta)):
+                size = len(value.encode("utf-8"))
+                if size > MAX_VARCHAR_BYTES:
+                    raise ValueError(
+                        f"{field} is {size} bytes, Milvus stores at most {MAX_VARCHAR_BYTES}"
+                    )
+
+    def _buffered_rows(self) -> int:
+        """Entities waiting to be written, retries included (caller holds the lock)"""
+        return len(self._buffer[1]) + sum(len(pending.batch[1]) for pending in self._retries)
+
+    def _schedule_flush(self, delay: float):
+        """Make sure a flush runs within ``delay`` seconds (caller holds the lock)"""
+        due_at = time.monotonic() + delay
+        if self._flush_timer is not None:
+            if self._flush_due_at <= due_at:
+                return
+            self._flush_timer.cancel()
+
+        self._flush_timer = threading.Timer(delay, self._flush_on_timer)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+        self._flush_due_at = due_at
+
+    def _take_buffer(self) -> List[_PendingBatch]:
+        """Swap out the buffer and split it into batches (caller holds the lock)"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        buffer_embeddings, buffer_texts, buffer_metadata, buffer_tickets = self._buffer
+        self._buffer = ([], [], [], [])
+
+        size = settings.MILVUS_INSERT_BATCH_SIZE
+        return [
+            _PendingBatch((
+                buffer_embeddings[i:i + size],
+                buffer_texts[i:i + size],
+                buffer_metadata[i:i + size],
+                buffer_tickets[i:i + size]
+            ))
+            for i in range(0, len(buffer_texts), size)
         ]
 
-        self.collection.insert(entities)
+    def _take_retries(self, due_only: bool) -> List[_PendingBatch]:
+        """Remove queued retries, or only those past their backoff (caller holds the lock)"""
+        now = time.monotonic()
+        taken, waiting = [], []
+        for pending in self._retries:
+            (taken if not due_only or pending.retry_at <= now else waiting).append(pending)
+        self._retries = waiting
+        return taken
+
+    def _write_batches(self, batches: List[_PendingBatch]) -> Optional[Exception]:
+        """
+        Write batches, queueing failed ones for a retry or dropping them
+
+        Returns:
+            The last write error, or None if every batch was written
+        """
+        error = None
+        for pending in batches:
+            try:
+                self._write(pending.batch)
+            except Exception as e:
+                error = e
+                self._write_failed(pending, e)
+            else:
+                for ticket, rows in Counter(pending.batch[3]).items():
+                    ticket.written(rows)
+        return error
+
+    def _write_failed(self, pending: _PendingBatch, error: Exception):
+        """Back off and retry a failed batch, or drop it if retrying cannot help"""
+        milvus_insert_failures_total.inc()
+        pending.attempts += 1
+
+        permanent = _is_permanent(error)
+        if permanent or pending.attempts >= settings.MILVUS_INSERT_MAX_ATTEMPTS:
+            reason = "rejected" if permanent else "attempts"
+            milvus_insert_dropped_total.labels(reason=reason).inc(len(pending.batch[1]))
+            logger.error(
+                "milvus_insert_dropped",
+                collection=self.collection_name,
+                rows=len(pending.batch[1]),
+                attempts=pending.attempts,
+                reason=reason,
+                error=str(error)
+            )
+            for ticket in set(pending.batch[3]):
+                ticket.failed(error)
+            with self._buffer_lock:
+                milvus_insert_buffer_size.set(self._buffered_rows())
+            return
+
+        delay = min(
+            settings.MILVUS_INSERT_FLUSH_INTERVAL * 2 ** (pending.attempts - 1),
+            settings.MILVUS_INSERT_RETRY_MAX_DELAY
+        )
+        pending.retry_at = time.monotonic() + delay
+        with self._buffer_lock:
+            self._retries.append(pending)
+            milvus_insert_buffer_size.set(self._buffered_rows())
+            self._schedule_flush(delay)
+
+    def _write(self, batch: Tuple[List, List, List, List]):
+        """Write one batch of entities to Milvus"""
+        embeddings, texts, metadata, _ = batch
+        with tracer.span("milvus.insert", collection=self.collection_name, rows=len(texts)):
+            self.collection.insert([embeddings, texts, metadata])
+        self.version += 1
+        kb_version.bump(self.collection_name)
+
+    def _flush_on_timer(self):
+        with self._buffer_lock:
+            self._flush_timer = None
+            batches = self._take_retries(due_only=True) + self._take_buffer()
+            if self._retries:
+                # Retries still backing off
+                next_retry = min(pending.retry_at for pending in self._retries)
+                self._schedule_flush(max(0.0, next_retry - time.monotonic()))
+            milvus_insert_buffer_size.set(self._buffered_rows())
+
+        error = self._write_batches(batches)
+        if error is not None:
+            logger.error("milvus_buffer_flush_failed", error=str(error))
+
+    def flush_buffer(self):
+        """
+        Write all buffered entities and retries now, without sealing segments
+
+        Raises the last write error if a batch still failed (it stays queued for
+        a retry unless it was dropped).
+        """
+        with self._buffer_lock:
+            batches = self._take_retries(due_only=False) + self._take_buffer()
+            milvus_insert_buffer_size.set(self._buffered_rows())
+
+        error = self._write_batches(batches)
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """Write buffered entities and seal segments (for bulk loaders and shutdown)"""
+        if not self.collection:
+            raise ValueError("Collection not initialized")
+
+        self.flush_buffer()
         self.collection.flush()
 
     def search(
@@ -81,47 +620,90 @@ class VectorStore:
         filter_expr: str = None
     ) -> List[Dict[str, Any]]:
         """Search for similar embeddings"""
-        if not self.collection:
-            raise ValueError("Collection not initialized")
+        return self.search_many([query_embedding], top_k=top_k, filter_expr=filter_expr)[0]
 
-        self.collection.load()
+    def search_many(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        filter_expr: str = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for many query embeddings in one request, returning per-query hits"""
+        if not query_embeddings:
+            return []
 
-        search_params = {
-            "metric_type": "L2",
-            "params": {"nprobe": 10}
-        }
+        self._index_ready.wait(timeout=settings.MILVUS_REINDEX_WAIT_TIMEOUT)
 
-        results = self.collection.search(
-            data=[query_embedding],
-            anns_field="embedding",
-            param=search_params,
-            limit=top_k,
-            expr=filter_expr,
-            output_fields=["text", "metadata"]
-        )
+        if not self.collection:
+            # Milvus was unavailable at startup; connect and load now
+            self.initialize()
+        else:
+            self.ensure_loaded()
+
+        with tracer.span(
+            "milvus.search",
+            collection=self.collection_name,
+            queries=len(query_embeddings),
+            top_k=top_k
+        ):
+            try:
+                results = self._search(
+                    query_embeddings, self._search_params(top_k), top_k, filter_expr
+                )
+            except MilvusException as e:
+                if not self._recover(e):
+                    raise
+                results = self._search(
+                    query_embeddings, self._search_params(top_k), top_k, filter_expr
+                )
 
         output = []
         for hits in results:
-            for hit in hits:
-                output.append({
+            output.append([
+                {
                     "id": hit.id,
                     "distance": hit.distance,
                     "text": hit.entity.get("text"),
                     "metadata": hit.entity.get("metadata")
-                })
+                }
+                for hit in hits
+            ])
 
         return output
 
+    def _search(
+        self,
+        query_embeddings: List[List[float]],
+        search_params: Dict[str, Any],
+        top_k: int,
+        filter_expr: str
+    ):
+        return self.collection.search(
+            data=query_embeddings,
+            anns_field="embedding",
+            param=search_params,
+            limit=top_k,
+            expr=filter_expr,
+            output_fields=["text", "metadata"]
+        )
+
     def delete(self, expr: str):
         """Delete entities by expression"""
         if not self.collection:
             raise ValueError("Collection not initialized")
 
-        self.collection.delete(expr)
+        with tracer.span("milvus.delete", collection=self.collection_name):
+            self.collection.delete(expr)
+        self.version += 1
+        kb_version.bump(self.collection_name)
 
     def close(self):
         """Close connection"""
+        if self.collection:
+            self.flush_buffer()
         connections.disconnect("default")
+        self.collection = None
+        self._loaded = False
 
 
 # Singleton instance
@@ -1,4 +1,4 @@
 from .routes import router
-from .security import get_current_active_user, get_current_user
+from .security import get_current_active_user, get_current_user, get_current_superuser
 
-__all__ = ["router", "get_current_active_user", "get_current_user"]
+__all__ = ["router", "get_current_active_user", "get_current_user", "get_current_superuser"]
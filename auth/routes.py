@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from common.database import get_db
+from common.database import get_async_db
 from auth.models import User, RefreshToken
 from auth.schemas import UserCreate, UserResponse, Token, LoginRequest, RefreshTokenRequest
 from auth.security import (
@@ -19,12 +20,12 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user exists
-    db_user = db.query(User).filter(
+    db_user = await db.scalar(select(User).where(
         (User.email == user.email) | (User.username == user.username)
-    ).first()
+    ))
 
     if db_user:
         raise HTTPException(
@@ -41,16 +42,16 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login and get access token"""
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = await db.scalar(select(User).where(User.username == login_data.username))
 
     if not user or not verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
@@ -76,7 +77,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
     db.add(db_refresh_token)
-    db.commit()
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -86,7 +87,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
     """Refresh access token using refresh token"""
     try:
         payload = jwt.decode(
@@ -110,11 +111,11 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
         )
 
     # Check if refresh token exists and is valid
-    db_token = db.query(RefreshToken).filter(
+    db_token = await db.scalar(select(RefreshToken).where(
         RefreshToken.token == request.refresh_token,
         RefreshToken.user_id == user_id,
         RefreshToken.is_revoked == False
-    ).first()
+    ))
 
     if not db_token or db_token.expires_at < datetime.utcnow():
         raise HTTPException(
@@ -123,7 +124,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
         )
 
     # Get user
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -144,7 +145,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
         expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
     db.add(new_db_token)
-    db.commit()
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -163,16 +164,16 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def logout(
     request: RefreshTokenRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Logout and revoke refresh token"""
-    db_token = db.query(RefreshToken).filter(
+    db_token = await db.scalar(select(RefreshToken).where(
         RefreshToken.token == request.refresh_token,
         RefreshToken.user_id == current_user.id
-    ).first()
+    ))
 
     if db_token:
         db_token.is_revoked = True
-        db.commit()
+        await db.commit()
 
     return {"message": "Successfully logged out"}
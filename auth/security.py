@@ -4,9 +4,10 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.settings import settings
-from common.database import get_db
+from common.database import get_async_db
 from auth.models import User
 from auth.schemas import TokenData
 
@@ -48,7 +49,7 @@ def create_refresh_token(data: dict) -> str:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -69,7 +70,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = await db.scalar(select(User).where(User.id == token_data.user_id))
     if user is None:
         raise credentials_exception
 
@@ -81,3 +82,10 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_superuser(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get current active user, requiring superuser rights"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
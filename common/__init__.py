@@ -1,3 +1,3 @@
-from .database import Base, get_db
+from .database import Base, get_db, get_async_db
 
-__all__ = ["Base", "get_db"]
+__all__ = ["Base", "get_db", "get_async_db"]
@@ -0,0 +1,205 @@
+"""
+Compute Executor
+Keeps blocking work off the event loop: a bounded thread pool for FAISS/Milvus
+I/O and a process (or thread) pool for CPU-bound embedding
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.settings import settings
+from monitoring.metrics import executor_queue_depth, executor_wait_seconds
+import multiprocessing
+import contextvars
+import functools
+import os
+import asyncio
+import time
+
+
+# Embedding models loaded inside process-pool workers, keyed by model config
+_worker_models: Dict[Tuple[str, str, str], Any] = {}
+
+
+def _worker_model(model_name: str, model_kwargs: Dict[str, Any], encode_kwargs: Dict[str, Any]):
+    """Embedding model cached in the current (worker) process"""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    key = (model_name, repr(sorted(model_kwargs.items())), repr(sorted(encode_kwargs.items())))
+    model = _worker_models.get(key)
+    if model is None:
+        model = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs=model_kwargs,
+            encode_kwargs=encode_kwargs
+        )
+        _worker_models[key] = model
+    return model
+
+
+def _load_worker_models(configs: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]):
+    """Process-pool initializer: load the configured models before the first task"""
+    for model_name, model_kwargs, encode_kwargs in configs:
+        _worker_model(model_name, model_kwargs, encode_kwargs)
+
+
+def _ready(hold: float) -> int:
+    """Warm-up task; holding the worker briefly spreads the batch across processes"""
+    time.sleep(hold)
+    return os.getpid()
+
+
+def encode_texts(
+    model_name: str,
+    model_kwargs: Dict[str, Any],
+    encode_kwargs: Dict[str, Any],
+    texts: List[str]
+) -> List[List[float]]:
+    """Embed texts with a model cached in the current (worker) process"""
+    return _worker_model(model_name, model_kwargs, encode_kwargs).embed_documents(texts)
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[float, Any]:
+    """Run fn and report when it actually started"""
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+def _call(fn: Callable, *args):
+    """Picklable stand-in for ctx.run in process pools"""
+    return fn(*args)
+
+
+class ComputeExecutor:
+    """
+    Bounded executor pools shared by all agent code paths
+
+    In process mode every CPU worker holds its own copy of each embedding
+    model it serves (roughly one model's memory per EXECUTOR_CPU_WORKERS);
+    ``warm_up`` loads them at startup so first requests don't pay for it.
+    """
+
+    def __init__(self, io_workers: int, cpu_workers: int, cpu_mode: str = "process"):
+        if cpu_mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported executor CPU mode: {cpu_mode}")
+
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.cpu_mode = cpu_mode
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[Executor] = None
+        # Embedding models every new CPU worker process loads on start
+        self._worker_models: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers,
+                thread_name_prefix="io-worker"
+            )
+        return self._io_pool
+
+    @property
+    def cpu_pool(self) -> Executor:
+        if self._cpu_pool is None:
+            if self.cpu_mode == "process":
+                # spawn avoids forking a parent that already holds torch threads
+                self._cpu_pool = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_worker_models,
+                    initargs=(list(self._worker_models),)
+                )
+            else:
+                self._cpu_pool = ThreadPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    thread_name_prefix="cpu-worker"
+                )
+        return self._cpu_pool
+
+    async def _submit(self, pool_name: str, pool: Executor, call: Callable, fn, args, kwargs):
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        queue_depth = executor_queue_depth.labels(pool=pool_name)
+
+        queue_depth.inc()
+        try:
+            started_at, result = await loop.run_in_executor(
+                pool, functools.partial(call, _timed_call, fn, args, kwargs)
+            )
+        finally:
+            queue_depth.dec()
+
+        executor_wait_seconds.labels(pool=pool_name).observe(max(0.0, started_at - submitted_at))
+        return result
+
+    async def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking I/O call (FAISS, Milvus) in the I/O thread pool"""
+        # Copy the caller's context like asyncio.to_thread does
+        ctx = contextvars.copy_context()
+        return await self._submit("io", self.io_pool, ctx.run, fn, args, kwargs)
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run CPU-bound work in the CPU pool (fn must be picklable in process mode)"""
+        if self.cpu_mode == "process":
+            return await self._submit("cpu", self.cpu_pool, _call, fn, args, kwargs)
+        ctx = contextvars.copy_context()
+        return await self._submit("cpu", self.cpu_pool, ctx.run, fn, args, kwargs)
+
+    async def embed(self, embeddings, texts: List[str]) -> List[List[float]]:
+        """Embed texts with a LangChain embeddings model in the CPU pool"""
+        if self.cpu_mode == "process" and hasattr(embeddings, "model_kwargs"):
+            return await self.run_cpu(
+                encode_texts,
+                embeddings.model_name,
+                embeddings.model_kwargs,
+                embeddings.encode_kwargs,
+                texts
+            )
+        if self.cpu_mode == "process":
+            # Arbitrary embedding objects cannot be shipped to another process
+            return await self.run_io(embeddings.embed_documents, texts)
+        return await self.run_cpu(embeddings.embed_documents, texts)
+
+    def warm_up(self, embeddings_models: List[Any]):
+        """
+        Start every CPU worker process with these embedding models loaded (blocking)
+
+        Only applies in process mode, to models ``embed`` would ship to workers.
+        """
+        if self.cpu_mode != "process":
+            return
+        configs = [
+            (model.model_name, model.model_kwargs, model.encode_kwargs)
+            for model in embeddings_models
+            if hasattr(model, "model_kwargs")
+        ]
+        if not configs:
+            return
+
+        if self._cpu_pool is not None:
+            # Existing workers were started without these models
+            self._cpu_pool.shutdown(wait=True)
+            self._cpu_pool = None
+        self._worker_models = configs
+
+        # Each submission while the others are still starting spawns another worker
+        futures = [self.cpu_pool.submit(_ready, 0.2) for _ in range(self.cpu_workers)]
+        pids = {future.result() for future in futures}
+        print(f"[OK] Embedding models loaded in {len(pids)} CPU worker process(es)")
+
+    def shutdown(self):
+        """Shut down both pools"""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+
+
+# Singleton instance
+compute_executor = ComputeExecutor(
+    io_workers=settings.EXECUTOR_IO_WORKERS,
+    cpu_workers=settings.EXECUTOR_CPU_WORKERS,
+    cpu_mode=settings.EXECUTOR_CPU_MODE
+)
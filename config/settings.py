@@ -14,6 +14,7 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # defaults to DATABASE_URL with an async driver
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 10
 
@@ -38,22 +39,108 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 4096
     LLM_CONTEXT_LENGTH: int = 32768
-    LLM_N_THREADS: int = 8
+    LLM_N_THREADS: int = 8  # threads per replica
+    LLM_REPLICAS: int = 1  # model instances; each holds its own copy of the weights
+    LLM_QUEUE_MAX_SIZE: int = 32  # queued requests before new ones get 429
+    LLM_QUEUE_TIMEOUT: float = 120.0  # seconds a request may wait for a replica
+    LLM_PROMPT_CACHE_ENABLED: bool = True  # reuse KV cache for static prompt prefixes
+    LLM_PROMPT_CACHE_MAX_PREFIXES: int = 4  # prefix snapshots kept per replica
 
     # Embeddings Configuration (Local Only)
     EMBEDDINGS_PROVIDER: str = "local"
     EMBEDDINGS_MODEL: str = "sentence-transformers/all-mpnet-base-v2"
     EMBEDDINGS_DIMENSION: int = 768
 
+    # Embedding Cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_DIR: Optional[str] = ".cache/embeddings"  # relative to the working directory
+
+    # Embedding Micro-Batching
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+
+    # Compute Executor
+    EXECUTOR_IO_WORKERS: int = 8
+    EXECUTOR_CPU_WORKERS: int = 2
+    EXECUTOR_CPU_MODE: str = "process"  # process (one embedding model copy per worker), thread
+
+    # RAG FAISS Index (local/Streamlit deployments)
+    RAG_FAISS_INDEX_TYPE: str = "hnsw"  # flat, ivf, ivf_sq8, ivf_pq, hnsw
+    RAG_FAISS_PROMOTION_THRESHOLD: int = 50000  # chunks before flat is rebuilt as ANN
+    RAG_FAISS_TRAIN_SIZE: int = 100000  # vectors used to train IVF/PQ quantizers
+    RAG_FAISS_NLIST: int = 0  # IVF lists, 0 = ~4*sqrt(n)
+    RAG_FAISS_NPROBE: int = 16
+    RAG_FAISS_HNSW_M: int = 32
+    RAG_FAISS_EF_SEARCH: int = 64
+    RAG_FAISS_PQ_M: int = 16  # must divide the embedding dimension
+    RAG_FAISS_PQ_NBITS: int = 8
+    RAG_STATS_PROMETHEUS_ENABLED: bool = True  # export RAG stats as Prometheus gauges
+
+    # Agent Registry
+    AGENT_WARMUP_TYPES: str = "general"  # comma-separated agent types compiled at startup
+    AGENT_REGISTRY_MAX_SIZE: int = 32
+
+    # Agent Context Assembly
+    AGENT_RETRIEVAL_TOP_K: int = 5
+    AGENT_CONTEXT_TOKEN_BUDGET: int = 2048  # prompt tokens for retrieved documents
+
+    # Agent Response Cache (reuses answers for near-duplicate questions)
+    AGENT_RESPONSE_CACHE_ENABLED: bool = True
+    AGENT_RESPONSE_CACHE_THRESHOLD: float = 0.95  # minimum query cosine similarity
+    AGENT_RESPONSE_CACHE_MAX_ENTRIES: int = 1000  # 0 disables the cache
+    AGENT_RESPONSE_CACHE_TTL: float = 3600.0  # seconds
+    AGENT_RESPONSE_CACHE_VERSION_CHECK_INTERVAL: float = 1.0  # seconds between shared KB version reads
+
+    # Agent Conversation History
+    AGENT_HISTORY_TOKEN_BUDGET: int = 2048  # prompt tokens for previous turns
+    AGENT_HISTORY_MAX_MESSAGES: int = 20  # most recent messages considered per session
+    AGENT_HISTORY_CACHE_SIZE: int = 1000  # sessions kept in memory
+    AGENT_HISTORY_SUMMARY_TRIGGER: int = 1024  # evicted tokens before a rolling summary
+    AGENT_HISTORY_SUMMARY_MAX_WORDS: int = 150
+
     # Milvus Vector Database
     MILVUS_HOST: str = "localhost"
     MILVUS_PORT: int = 19530
     MILVUS_COLLECTION_NAME: str = "gaia_embeddings"
+    MILVUS_LOAD_STATE_CHECK_INTERVAL: float = 30.0  # seconds between load-state checks
+    MILVUS_INSERT_BATCH_SIZE: int = 1000
+    MILVUS_INSERT_FLUSH_INTERVAL: float = 1.0  # seconds before a partial batch is written
+    MILVUS_INSERT_MAX_ATTEMPTS: int = 5  # writes of a failing batch before it is dropped
+    MILVUS_INSERT_RETRY_MAX_DELAY: float = 30.0  # cap on the exponential retry backoff
+    MILVUS_INSERT_MAX_BUFFERED: int = 10000  # buffered entities before inserts are refused
+    MILVUS_INSERT_WAIT_TIMEOUT: float = 5.0  # seconds an API insert waits for its write
+    MILVUS_INDEX_TYPE: str = "IVF_FLAT"  # FLAT, IVF_FLAT, IVF_SQ8, IVF_PQ, HNSW, DISKANN
+    MILVUS_METRIC_TYPE: str = "L2"  # L2, IP, COSINE (IP/COSINE suit normalized embeddings)
+    MILVUS_INDEX_PARAMS: Optional[str] = None  # JSON build params, merged over the preset
+    MILVUS_SEARCH_PARAMS: Optional[str] = None  # JSON search params, merged over the preset
+    MILVUS_REINDEX_WAIT_TIMEOUT: float = 300.0  # max seconds a search waits for a rebuild
 
     # Monitoring
     PROMETHEUS_PORT: int = 9090
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None  # shared metrics dir for multi-worker servers
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
+    API_LOG_ENABLED: bool = True  # write an APILog row per request
+    METRICS_MAX_ENDPOINTS: int = 200  # route templates labelled before "<other>"
+
+    # Log Writer (batched APILog/AgentLog inserts)
+    LOG_WRITER_QUEUE_SIZE: int = 10000  # queued rows before new ones are dropped
+    LOG_WRITER_BATCH_SIZE: int = 500  # max rows per insert
+    LOG_WRITER_FLUSH_INTERVAL_MS: float = 200.0  # max time a row waits for its batch
+
+    # Tracing (request spans for FastAPI, LangGraph, Milvus/FAISS and SQL)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.01  # fraction of requests traced
+    TRACING_EXPORTER: str = "file"  # file, stdout
+    TRACING_FILE_PATH: str = "traces.jsonl"  # one JSON trace per line
+    TRACING_MAX_SPANS: int = 1000  # spans kept per trace; the rest are counted as dropped
+
+    # Profiling (admin-only /monitoring/profile endpoints)
+    PROFILER_MAX_SECONDS: float = 60.0  # longest CPU/memory capture per request
+    PROFILER_SAMPLE_INTERVAL_MS: float = 10.0  # default CPU stack sampling interval
+    PROFILER_TRACEMALLOC_FRAMES: int = 25  # stack depth recorded per allocation
 
     # Kubernetes
     KUBERNETES_NAMESPACE: str = "gaia-abiz"
@@ -2,17 +2,29 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from config.settings import settings
-from common.database import engine, Base
+from common.database import engine, async_engine, Base
+from common.executor import compute_executor
 from monitoring import setup_logging, MetricsMiddleware
+from monitoring.log_writer import log_writer
+from monitoring.metrics import mark_process_dead
+from monitoring.tracing import tracer, TracingMiddleware
 from auth.routes import router as auth_router
 from monitoring.routes import router as monitoring_router
 from encryption.routes import router as encryption_router
 from agent.routes import router as agent_router
+from agent.registry import agent_registry
+from agent.llm_client import llm_client
+from agent.vector_store import vector_store
 
 
 # Setup logging
 setup_logging()
 
+# Trace SQL statements issued by both the sync and the async engine
+if settings.TRACING_ENABLED:
+    tracer.instrument_engine(engine)
+    tracer.instrument_engine(async_engine.sync_engine)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,11 +32,37 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    print("Loading Milvus collection...")
+    try:
+        vector_store.initialize()
+    except Exception as e:
+        # Don't block startup on Milvus; the first search initializes it
+        print(f"[WARNING] Milvus collection not loaded: {e}")
+    print("Starting embedding workers...")
+    compute_executor.warm_up([llm_client.embeddings.base])
+    print("Loading tokenizer...")
+    # Token counting runs on the event loop, so don't build it on the first request
+    llm_client.load_tokenizer()
+    print("Compiling agent graphs...")
+    agent_registry.warm_up(
+        agent_type.strip()
+        for agent_type in settings.AGENT_WARMUP_TYPES.split(",")
+        if agent_type.strip()
+    )
     print("Application startup complete")
 
     yield
 
     # Shutdown
+    if vector_store.collection:
+        try:
+            vector_store.flush_buffer()
+        except Exception as e:
+            print(f"[WARNING] Failed to write buffered vectors: {e}")
+    llm_client.scheduler.shutdown()
+    await log_writer.stop()
+    compute_executor.shutdown()
+    mark_process_dead()
     print("Application shutdown")
 
 
@@ -44,8 +82,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add metrics middleware
-app.add_middleware(MetricsMiddleware)
+# Add metrics middleware (API logs are written in the background)
+app.add_middleware(
+    MetricsMiddleware,
+    log_writer=log_writer if settings.API_LOG_ENABLED else None
+)
+
+# Add tracing middleware (outermost, so the root span covers the whole request)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
 
 # Include routers
 app.include_router(auth_router)
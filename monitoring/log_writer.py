@@ -0,0 +1,175 @@
+"""
+Log Writer
+Background bulk inserts for APILog and AgentLog rows, so request handlers
+only enqueue a record instead of waiting on the database
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from common.database import AsyncSessionLocal
+from config.settings import settings
+from monitoring.metrics import (
+    log_writer_queue_depth,
+    log_writer_batch_size,
+    log_writer_rows_written_total,
+    log_writer_dropped_total
+)
+from monitoring.rollups import ROLLUPS, Rollup
+from monitoring.logger import get_logger
+import contextvars
+import asyncio
+
+logger = get_logger(__name__)
+
+
+class LogWriter:
+    """
+    Bounded in-memory queue of log rows drained by one worker per event loop
+
+    The worker waits for a first row, collects more for up to
+    ``flush_interval_ms`` (or ``batch_size`` rows) and writes them with one
+    multi-row INSERT per table. Tables with a ``rollups`` entry also get their
+    per-minute and per-hour aggregates upserted in the same transaction.
+    When ``max_queue_size`` rows are waiting, new rows are dropped and counted
+    rather than slowing down requests.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: float = 200.0,
+        rollups: Optional[Dict[Any, Rollup]] = None
+    ):
+        self.session_factory = session_factory
+        self.rollups = rollups or {}
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Rows queued on a previous event loop can never be written
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            # Started from a request, but its inserts must not join that request's trace
+            self._worker_task = loop.create_task(self._worker(), context=contextvars.Context())
+
+    @staticmethod
+    def _row(model, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Values for every column, so one batch can share a single INSERT"""
+        values = dict(values)
+        if "timestamp" in model.__table__.columns:
+            # Time of the event, not of the delayed insert
+            values.setdefault("timestamp", datetime.utcnow())
+        return {
+            column.name: values.get(column.name)
+            for column in model.__table__.columns
+            if not column.primary_key
+        }
+
+    def enqueue(self, model, values: Dict[str, Any]) -> bool:
+        """
+        Queue one row for insertion (must be called from the event loop)
+
+        Returns:
+            False if the row was dropped because the queue is full
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((model, self._row(model, values)))
+        except asyncio.QueueFull:
+            log_writer_dropped_total.labels(table=model.__tablename__, reason="queue_full").inc()
+            return False
+        log_writer_queue_depth.set(self._queue.qsize())
+        return True
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _next_batch(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Wait for a row, then gather more until the batch is full or the interval ends"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval_ms / 1000
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Tuple[Any, Dict[str, Any]]]):
+        """Insert a batch with one statement per table, plus its rollup upserts"""
+        by_model: Dict[Any, List[Dict[str, Any]]] = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+
+        log_writer_batch_size.observe(len(batch))
+        try:
+            async with self.session_factory() as db:
+                dialect = db.bind.dialect.name
+                for model, rows in by_model.items():
+                    await db.execute(insert(model), rows)
+                    rollup = self.rollups.get(model)
+                    if rollup is not None:
+                        await db.execute(rollup.upsert(dialect, rows))
+                await db.commit()
+        except Exception as e:
+            for model, rows in by_model.items():
+                log_writer_dropped_total.labels(
+                    table=model.__tablename__, reason="error"
+                ).inc(len(rows))
+            logger.warning("log_writer_failed", rows=len(batch), error=str(e))
+            return
+
+        for model, rows in by_model.items():
+            log_writer_rows_written_total.labels(table=model.__tablename__).inc(len(rows))
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                log_writer_queue_depth.set(self._queue.qsize())
+
+    async def stop(self, timeout: float = 5.0):
+        """Write the rows still queued, then stop the worker"""
+        if self._worker_task is None or self._loop is not asyncio.get_running_loop():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("log_writer_stop_timeout", pending=self._queue.qsize())
+        self._worker_task.cancel()
+        self._worker_task = None
+        self._loop = None
+
+
+# Shared writer instance
+log_writer = LogWriter(
+    AsyncSessionLocal,
+    max_queue_size=settings.LOG_WRITER_QUEUE_SIZE,
+    batch_size=settings.LOG_WRITER_BATCH_SIZE,
+    flush_interval_ms=settings.LOG_WRITER_FLUSH_INTERVAL_MS,
+    rollups=ROLLUPS
+)
@@ -1,8 +1,27 @@
+from config.settings import settings
+import os
+
+# prometheus_client picks its value storage when first imported
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
-from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY, multiprocess
 from fastapi import Response
+from contextlib import contextmanager
+from monitoring.models import APILog
 import time
 
+# Several worker processes share metrics through files in this directory
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROCESS_DIR:
+    os.makedirs(MULTIPROCESS_DIR, exist_ok=True)
+
+# Endpoint labels for requests that matched no route, and for routes beyond
+# the label cap
+UNMATCHED_ENDPOINT = "<unmatched>"
+OVERFLOW_ENDPOINT = "<other>"
+
 
 # Define metrics
 http_requests_total = Counter(
@@ -19,7 +38,8 @@ http_request_duration_seconds = Histogram(
 
 active_requests = Gauge(
     'active_requests',
-    'Number of active requests'
+    'Number of active requests',
+    multiprocess_mode='livesum'
 )
 
 ai_agent_requests_total = Counter(
@@ -31,7 +51,29 @@ ai_agent_requests_total = Counter(
 ai_agent_duration_seconds = Histogram(
     'ai_agent_duration_seconds',
     'AI agent processing duration in seconds',
-    ['agent_type']
+    ['agent_type'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+
+ai_agent_stage_duration_seconds = Histogram(
+    'ai_agent_stage_duration_seconds',
+    'Time an agent query spends in each pipeline stage',
+    ['agent_type', 'stage'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+ai_agent_prompt_tokens = Histogram(
+    'ai_agent_prompt_tokens',
+    'Prompt tokens sent to the LLM per agent query',
+    ['agent_type'],
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192)
+)
+
+ai_agent_tokens_per_second = Histogram(
+    'ai_agent_tokens_per_second',
+    'LLM generation throughput per agent query',
+    ['agent_type'],
+    buckets=(1, 2, 4, 8, 12, 16, 24, 32, 48, 64, 128)
 )
 
 database_queries_total = Counter(
@@ -46,12 +88,235 @@ encryption_operations_total = Counter(
     ['operation']
 )
 
+embedding_cache_hits_total = Counter(
+    'embedding_cache_hits_total',
+    'Total embedding cache hits',
+    ['tier']
+)
+
+embedding_cache_misses_total = Counter(
+    'embedding_cache_misses_total',
+    'Total embedding cache misses'
+)
+
+executor_queue_depth = Gauge(
+    'executor_queue_depth',
+    'Tasks submitted to a compute executor pool and not yet finished',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+executor_wait_seconds = Histogram(
+    'executor_wait_seconds',
+    'Time tasks wait before a compute executor worker picks them up',
+    ['pool']
+)
+
+embedding_batch_size = Histogram(
+    'embedding_batch_size',
+    'Number of texts embedded per micro-batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+milvus_insert_buffer_size = Gauge(
+    'milvus_insert_buffer_size',
+    'Entities buffered for the next Milvus insert batch',
+    multiprocess_mode='livesum'
+)
+
+milvus_insert_failures_total = Counter(
+    'milvus_insert_failures_total',
+    'Milvus insert batch writes that failed'
+)
+
+milvus_insert_dropped_total = Counter(
+    'milvus_insert_dropped_total',
+    'Entities dropped from the Milvus write buffer (rejected, attempts)',
+    ['reason']
+)
+
+agent_graph_build_seconds = Histogram(
+    'agent_graph_build_seconds',
+    'Time to build and compile an agent workflow graph',
+    ['agent_type']
+)
+
+inference_queue_depth = Gauge(
+    'inference_queue_depth',
+    'LLM requests waiting for a model replica',
+    multiprocess_mode='livesum'
+)
+
+inference_queue_wait_seconds = Histogram(
+    'inference_queue_wait_seconds',
+    'Time LLM requests wait for a model replica'
+)
+
+inference_rejected_total = Counter(
+    'inference_rejected_total',
+    'LLM requests rejected by admission control',
+    ['reason']
+)
+
+inference_time_to_first_token_seconds = Histogram(
+    'inference_time_to_first_token_seconds',
+    'Time from replica start to the first generated token'
+)
+
+inference_tokens_per_second = Histogram(
+    'inference_tokens_per_second',
+    'LLM generation throughput per request',
+    buckets=(1, 2, 4, 8, 12, 16, 24, 32, 48, 64, 128)
+)
+
+agent_context_tokens = Histogram(
+    'agent_context_tokens',
+    'Prompt tokens used by retrieved context per agent query',
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+
+agent_response_cache_total = Counter(
+    'agent_response_cache_total',
+    'Agent response cache lookups by result (hit, miss, skip)',
+    ['result']
+)
+
+llm_prompt_prefix_cache_total = Counter(
+    'llm_prompt_prefix_cache_total',
+    'Prompt prefix cache outcomes (warm, restored, built)',
+    ['result']
+)
+
+rag_chunks = Gauge(
+    'rag_chunks',
+    'Chunks indexed in the RAG FAISS vector store',
+    ['index'],
+    multiprocess_mode='mostrecent'
+)
+
+rag_documents = Gauge(
+    'rag_documents',
+    'Source documents ingested into the RAG vector store',
+    ['index'],
+    multiprocess_mode='mostrecent'
+)
+
+rag_index_bytes = Gauge(
+    'rag_index_bytes',
+    'Estimated size of the RAG FAISS index in bytes',
+    ['index'],
+    multiprocess_mode='mostrecent'
+)
+
+rag_memory_bytes = Gauge(
+    'rag_memory_bytes',
+    'Estimated memory held by the RAG index and chunk texts',
+    ['index'],
+    multiprocess_mode='mostrecent'
+)
+
+rag_last_ingest_timestamp = Gauge(
+    'rag_last_ingest_timestamp_seconds',
+    'Unix time of the last RAG document ingest',
+    ['index'],
+    multiprocess_mode='max'
+)
+
+log_writer_queue_depth = Gauge(
+    'log_writer_queue_depth',
+    'Log rows waiting to be written',
+    multiprocess_mode='livesum'
+)
+
+log_writer_batch_size = Histogram(
+    'log_writer_batch_size',
+    'Log rows written per batch',
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000)
+)
+
+log_writer_rows_written_total = Counter(
+    'log_writer_rows_written_total',
+    'Log rows inserted by the background writer',
+    ['table']
+)
+
+log_writer_dropped_total = Counter(
+    'log_writer_dropped_total',
+    'Log rows dropped by the background writer (queue_full, error)',
+    ['table', 'reason']
+)
+
+http_endpoint_labels = Gauge(
+    'http_endpoint_labels',
+    'Distinct endpoint label values used by the HTTP metrics',
+    multiprocess_mode='livemax'
+)
+
+http_endpoint_overflow_total = Counter(
+    'http_endpoint_overflow_total',
+    'Requests counted under the overflow endpoint label'
+)
+
+metrics_registry_series = Gauge(
+    'metrics_registry_series',
+    'Time series exported by the last metrics scrape',
+    multiprocess_mode='mostrecent'
+)
+
+
+@contextmanager
+def observe_stage(agent_type: str, stage: str):
+    """Record how long the enclosed block of an agent query took"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ai_agent_stage_duration_seconds.labels(
+            agent_type=agent_type, stage=stage
+        ).observe(time.perf_counter() - start)
+
 
 class MetricsMiddleware:
-    """Middleware to collect HTTP metrics"""
+    """
+    Middleware to collect HTTP metrics and, given a log writer, API logs
+
+    Requests are labelled with the matched route template (for example
+    ``/agent/sessions/{session_id}/messages``) rather than the raw path, and
+    at most ``max_endpoints`` distinct templates get their own label.
+    """
 
-    def __init__(self, app):
+    def __init__(self, app, log_writer=None, max_endpoints: int = None):
         self.app = app
+        self.log_writer = log_writer
+        self.max_endpoints = max_endpoints or settings.METRICS_MAX_ENDPOINTS
+        self._endpoints = set()
+
+    def _endpoint(self, scope) -> str:
+        """Bounded endpoint label for a routed request"""
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return UNMATCHED_ENDPOINT
+
+        if path not in self._endpoints:
+            if len(self._endpoints) >= self.max_endpoints:
+                http_endpoint_overflow_total.inc()
+                return OVERFLOW_ENDPOINT
+            self._endpoints.add(path)
+            http_endpoint_labels.set(len(self._endpoints))
+        return path
+
+    def _log(self, method: str, path: str, status_code: int, duration: float, error: str = None):
+        """Queue an APILog row; the writer inserts it in the background"""
+        if self.log_writer is None:
+            return
+        self.log_writer.enqueue(APILog, {
+            "method": method,
+            "endpoint": path,
+            "status_code": status_code,
+            "duration": duration,
+            "error_message": error
+        })
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
@@ -59,15 +324,19 @@ class MetricsMiddleware:
             return
 
         method = scope["method"]
-        path = scope["path"]
 
         active_requests.inc()
         start_time = time.time()
+        started = False
 
         async def send_wrapper(message):
+            nonlocal started
             if message["type"] == "http.response.start":
+                started = True
                 status_code = message["status"]
                 duration = time.time() - start_time
+                # Routing has filled in scope["route"] by now
+                path = self._endpoint(scope)
 
                 http_requests_total.labels(
                     method=method,
@@ -81,19 +350,40 @@ class MetricsMiddleware:
                 ).observe(duration)
 
                 active_requests.dec()
+                self._log(method, path, status_code, duration)
 
             await send(message)
 
         try:
             await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            active_requests.dec()
+            if not started:
+                active_requests.dec()
+                self._log(method, self._endpoint(scope), 500, time.time() - start_time, str(e))
             raise e
 
 
 def metrics_endpoint():
     """Prometheus metrics endpoint"""
+    if MULTIPROCESS_DIR:
+        # Aggregate the values every worker process wrote
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    content = generate_latest(registry)
+    # Counted from this scrape, reported on the next one
+    metrics_registry_series.set(sum(
+        1 for line in content.splitlines() if line and not line.startswith(b"#")
+    ))
     return Response(
-        content=generate_latest(),
+        content=content,
         media_type=CONTENT_TYPE_LATEST
     )
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the shared metrics (multiprocess mode)"""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, UniqueConstraint
 from datetime import datetime
 from common.database import Base
 
@@ -31,3 +31,45 @@ class AgentLog(Base):
     status = Column(String, index=True)  # success, error, timeout
     error_message = Column(Text, nullable=True)
     tokens_used = Column(Integer, nullable=True)
+
+
+class APILogRollup(Base):
+    """Per-minute and per-hour API request aggregates, maintained by the log writer"""
+    __tablename__ = "api_log_rollups"
+
+    id = Column(Integer, primary_key=True)
+    bucket_seconds = Column(Integer, nullable=False)  # 60 or 3600
+    bucket_start = Column(DateTime, nullable=False)
+    method = Column(String, nullable=False)
+    endpoint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    request_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_seconds", "bucket_start", "method", "endpoint", "status_code",
+            name="uq_api_log_rollups_bucket"
+        ),
+    )
+
+
+class AgentLogRollup(Base):
+    """Per-minute and per-hour agent query aggregates, maintained by the log writer"""
+    __tablename__ = "agent_log_rollups"
+
+    id = Column(Integer, primary_key=True)
+    bucket_seconds = Column(Integer, nullable=False)  # 60 or 3600
+    bucket_start = Column(DateTime, nullable=False)
+    agent_type = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    request_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0.0)
+    tokens_sum = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_seconds", "bucket_start", "agent_type", "status",
+            name="uq_agent_log_rollups_bucket"
+        ),
+    )
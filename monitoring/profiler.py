@@ -0,0 +1,186 @@
+"""
+On-demand Profiler
+Sampling CPU profiles and tracemalloc allocation reports for the running
+process, in folded-stack form that flamegraph.pl and speedscope read directly
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+import threading
+import tracemalloc
+import linecache
+import sys
+import time
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+    pass
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def folded(stacks: Dict[str, int]) -> str:
+    """Render stack counts as folded lines ("root;...;leaf count"), largest first"""
+    return "\n".join(
+        f"{stack} {count}"
+        for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+    ) + "\n"
+
+
+class Profiler:
+    """
+    Profiles the current worker process, one capture at a time
+
+    The CPU profiler samples every thread's stack from a background thread,
+    so it sees the event loop and the executor pools alike without
+    instrumenting them. Each process profiles only itself: with several
+    workers per pod, repeat the request until the slow worker answers.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, tracemalloc_frames: int = 25):
+        self.max_seconds = max_seconds
+        self.tracemalloc_frames = tracemalloc_frames
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being captured")
+
+    def _check_duration(self, seconds: float):
+        if seconds > self.max_seconds:
+            raise ValueError(f"Profiles are limited to {self.max_seconds} seconds")
+
+    def cpu_profile(self, seconds: float, interval_ms: float = 10.0) -> Dict[str, Any]:
+        """
+        Sample all thread stacks every ``interval_ms`` for ``seconds`` (blocking)
+
+        Returns:
+            Dictionary with sample counts and ``stacks`` mapping each folded
+            stack, rooted at its thread name, to the number of samples seen
+        """
+        self._check_duration(seconds)
+        self._acquire()
+        try:
+            own_thread = threading.get_ident()
+            interval = interval_ms / 1000
+            labels: Dict[Any, str] = {}
+            stacks: Counter = Counter()
+            samples = 0
+
+            started = time.perf_counter()
+            deadline = started + seconds
+            while time.perf_counter() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        label = labels.get(code)
+                        if label is None:
+                            label = labels[code] = _frame_label(code)
+                        stack.append(label)
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                    stacks[";".join(reversed(stack))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return {
+                "duration": time.perf_counter() - started,
+                "interval_ms": interval_ms,
+                "samples": samples,
+                "stacks": dict(stacks)
+            }
+        finally:
+            self._lock.release()
+
+    def memory_profile(
+        self,
+        seconds: float = 0.0,
+        limit: int = 20,
+        group_by: str = "lineno"
+    ) -> Dict[str, Any]:
+        """
+        Top allocators from a tracemalloc snapshot (blocking for ``seconds``)
+
+        If tracemalloc is already tracing (e.g. started with PYTHONTRACEMALLOC),
+        ``seconds=0`` reports the live heap and ``seconds>0`` the growth over
+        that window. Otherwise tracing runs only for the window, so the report
+        covers memory allocated during it and still alive at the end.
+
+        Args:
+            seconds: Capture window
+            limit: Number of allocation sites to return
+            group_by: "lineno" or "traceback" (full stacks, for flamegraphs)
+        """
+        self._check_duration(seconds)
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing and seconds <= 0:
+            raise ValueError("tracemalloc is not running; pass a capture window in seconds")
+
+        self._acquire()
+        try:
+            if not was_tracing:
+                tracemalloc.start(self.tracemalloc_frames)
+            baseline = tracemalloc.take_snapshot() if was_tracing and seconds > 0 else None
+            time.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+
+        # Leave out the profiler's own bookkeeping
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__)
+        ]
+        snapshot = snapshot.filter_traces(filters)
+        if baseline is not None:
+            stats = snapshot.compare_to(baseline.filter_traces(filters), group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+
+        allocators: List[Dict[str, Any]] = []
+        for stat in stats[:limit]:
+            entry = {
+                # Outermost call first, like the CPU stacks
+                "stack": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size_bytes": stat.size,
+                "count": stat.count
+            }
+            if baseline is not None:
+                entry["size_diff_bytes"] = stat.size_diff
+                entry["count_diff"] = stat.count_diff
+            allocators.append(entry)
+
+        return {
+            "mode": "growth" if baseline is not None else "snapshot",
+            "duration": seconds,
+            "traced_memory_bytes": current,
+            "peak_traced_memory_bytes": peak,
+            "allocators": allocators
+        }
+
+    @staticmethod
+    def memory_stacks(report: Dict[str, Any]) -> Dict[str, int]:
+        """Folded stacks weighted by bytes, from a memory report"""
+        key = "size_diff_bytes" if report["mode"] == "growth" else "size_bytes"
+        stacks: Counter = Counter()
+        for allocator in report["allocators"]:
+            if allocator[key] > 0:
+                stacks[";".join(allocator["stack"])] += allocator[key]
+        return dict(stacks)
+
+
+# Global profiler instance
+profiler = Profiler(
+    max_seconds=settings.PROFILER_MAX_SECONDS,
+    tracemalloc_frames=settings.PROFILER_TRACEMALLOC_FRAMES
+)
@@ -0,0 +1,141 @@
+"""
+Log Rollups
+Per-minute and per-hour aggregates of APILog and AgentLog rows, upserted
+alongside each log batch so stats queries read buckets instead of raw rows
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from monitoring.models import APILog, AgentLog, APILogRollup, AgentLogRollup
+
+MINUTE = 60
+HOUR = 3600
+GRANULARITIES = (MINUTE, HOUR)
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    """Start of the bucket of the given size that contains timestamp"""
+    if seconds == HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(second=0, microsecond=0)
+
+
+class Rollup:
+    """
+    Aggregation of one raw log table into its rollup table
+
+    ``keys`` maps rollup columns to functions of a raw row; ``sums`` maps
+    rollup measure columns to the per-row amount added to the bucket.
+    """
+
+    def __init__(
+        self,
+        model,
+        keys: Dict[str, Callable[[Dict[str, Any]], Any]],
+        sums: Dict[str, Callable[[Dict[str, Any]], float]]
+    ):
+        self.model = model
+        self.keys = keys
+        self.sums = sums
+
+    def aggregate(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sum raw rows into one entry per bucket and key"""
+        buckets: Dict[Tuple, Dict[str, Any]] = {}
+        for row in rows:
+            timestamp = row.get("timestamp") or datetime.utcnow()
+            key_values = {column: get(row) for column, get in self.keys.items()}
+            for seconds in GRANULARITIES:
+                start = bucket_start(timestamp, seconds)
+                key = (seconds, start) + tuple(key_values.values())
+                entry = buckets.get(key)
+                if entry is None:
+                    entry = buckets[key] = {
+                        "bucket_seconds": seconds,
+                        "bucket_start": start,
+                        **key_values,
+                        **{column: 0 for column in self.sums}
+                    }
+                for column, amount in self.sums.items():
+                    entry[column] += amount(row)
+        # A stable order keeps concurrent upserts from locking rows in different orders
+        return [buckets[key] for key in sorted(buckets)]
+
+    def upsert(self, dialect: str, rows: Iterable[Dict[str, Any]]):
+        """INSERT ... ON CONFLICT statement that adds the rows into their buckets"""
+        if dialect not in UPSERT_INSERTS:
+            raise ValueError(f"Log rollups are not supported on {dialect}")
+
+        table = self.model.__table__
+        statement = UPSERT_INSERTS[dialect](table).values(self.aggregate(rows))
+        return statement.on_conflict_do_update(
+            index_elements=["bucket_seconds", "bucket_start", *self.keys],
+            set_={
+                column: table.c[column] + statement.excluded[column]
+                for column in self.sums
+            }
+        )
+
+    def window(self, cutoff: datetime):
+        """
+        Filter for the buckets covering cutoff until now
+
+        Uses minute buckets up to the first full hour after cutoff and hour
+        buckets from there on.
+        """
+        table = self.model.__table__
+        start = bucket_start(cutoff, MINUTE)
+        hour = bucket_start(start, HOUR)
+        if hour < start:
+            hour += timedelta(hours=1)
+
+        return or_(
+            and_(
+                table.c.bucket_seconds == MINUTE,
+                table.c.bucket_start >= start,
+                table.c.bucket_start < hour
+            ),
+            and_(
+                table.c.bucket_seconds == HOUR,
+                table.c.bucket_start >= hour
+            )
+        )
+
+
+api_log_rollup = Rollup(
+    APILogRollup,
+    keys={
+        "method": lambda row: row.get("method") or "",
+        "endpoint": lambda row: row.get("endpoint") or "",
+        "status_code": lambda row: row.get("status_code") or 0,
+    },
+    sums={
+        "request_count": lambda row: 1,
+        "duration_sum": lambda row: row.get("duration") or 0.0,
+    }
+)
+
+agent_log_rollup = Rollup(
+    AgentLogRollup,
+    keys={
+        "agent_type": lambda row: row.get("agent_type") or "",
+        "status": lambda row: row.get("status") or "",
+    },
+    sums={
+        "request_count": lambda row: 1,
+        "duration_sum": lambda row: row.get("duration") or 0.0,
+        "tokens_sum": lambda row: row.get("tokens_used") or 0,
+    }
+)
+
+# Rollups maintained for each raw log model
+ROLLUPS = {
+    APILog: api_log_rollup,
+    AgentLog: agent_log_rollup,
+}
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case, text
 from datetime import datetime, timedelta
 from typing import Optional, List
-from common.database import get_db
-from monitoring.models import APILog, AgentLog
+from common.database import get_async_db
+from config.settings import settings
+from auth.models import User
+from auth.security import get_current_superuser
+from monitoring.models import APILogRollup, AgentLogRollup
+from monitoring.rollups import api_log_rollup, agent_log_rollup
 from monitoring.metrics import metrics_endpoint
+from monitoring.profiler import profiler, folded, ProfilerBusy
 from pydantic import BaseModel
+import asyncio
 
 router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
 
@@ -42,32 +49,29 @@ async def get_metrics():
 @router.get("/api-logs/stats", response_model=LogStats)
 async def get_api_logs_stats(
     hours: int = Query(24, description="Number of hours to look back"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get API logs statistics"""
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
 
-    total = db.query(func.count(APILog.id)).filter(
-        APILog.timestamp >= cutoff_time
-    ).scalar()
-
-    avg_duration = db.query(func.avg(APILog.duration)).filter(
-        APILog.timestamp >= cutoff_time
-    ).scalar() or 0
-
-    success_count = db.query(func.count(APILog.id)).filter(
-        and_(
-            APILog.timestamp >= cutoff_time,
-            APILog.status_code < 400
-        )
-    ).scalar()
-
-    error_count = db.query(func.count(APILog.id)).filter(
-        and_(
-            APILog.timestamp >= cutoff_time,
-            APILog.status_code >= 400
-        )
-    ).scalar()
+    # Reads the per-minute/per-hour rollups, not the raw log rows
+    row = (await db.execute(
+        select(
+            func.sum(APILogRollup.request_count).label('total'),
+            func.sum(APILogRollup.duration_sum).label('duration_sum'),
+            func.sum(case(
+                (APILogRollup.status_code < 400, APILogRollup.request_count), else_=0
+            )).label('success_count'),
+            func.sum(case(
+                (APILogRollup.status_code >= 400, APILogRollup.request_count), else_=0
+            )).label('error_count')
+        ).where(api_log_rollup.window(cutoff_time))
+    )).one()
+
+    total = row.total or 0
+    avg_duration = (row.duration_sum / total) if total > 0 else 0
+    success_count = row.success_count or 0
+    error_count = row.error_count or 0
 
     success_rate = (success_count / total * 100) if total > 0 else 0
 
@@ -83,28 +87,31 @@ async def get_api_logs_stats(
 async def get_endpoint_stats(
     hours: int = Query(24, description="Number of hours to look back"),
     limit: int = Query(10, description="Number of top endpoints to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get top endpoints by request count"""
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
 
-    results = db.query(
-        APILog.endpoint,
-        func.count(APILog.id).label('count'),
-        func.avg(APILog.duration).label('avg_duration')
-    ).filter(
-        APILog.timestamp >= cutoff_time
-    ).group_by(
-        APILog.endpoint
-    ).order_by(
-        func.count(APILog.id).desc()
-    ).limit(limit).all()
+    count = func.sum(APILogRollup.request_count)
+    results = (await db.execute(
+        select(
+            APILogRollup.endpoint,
+            count.label('count'),
+            func.sum(APILogRollup.duration_sum).label('duration_sum')
+        ).where(
+            api_log_rollup.window(cutoff_time)
+        ).group_by(
+            APILogRollup.endpoint
+        ).order_by(
+            count.desc()
+        ).limit(limit)
+    )).all()
 
     return [
         {
             "endpoint": r.endpoint,
             "count": r.count,
-            "avg_duration": round(r.avg_duration, 3)
+            "avg_duration": round(r.duration_sum / r.count, 3)
         }
         for r in results
     ]
@@ -113,27 +120,29 @@ async def get_endpoint_stats(
 @router.get("/agent-logs/stats", response_model=List[AgentStats])
 async def get_agent_stats(
     hours: int = Query(24, description="Number of hours to look back"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get AI agent statistics"""
     cutoff_time = datetime.utcnow() - timedelta(hours=hours)
 
-    results = db.query(
-        AgentLog.agent_type,
-        func.count(AgentLog.id).label('total'),
-        func.sum(
-            func.case((AgentLog.status == 'success', 1), else_=0)
-        ).label('success_count'),
-        func.sum(
-            func.case((AgentLog.status == 'error', 1), else_=0)
-        ).label('error_count'),
-        func.avg(AgentLog.duration).label('avg_duration'),
-        func.sum(AgentLog.tokens_used).label('total_tokens')
-    ).filter(
-        AgentLog.timestamp >= cutoff_time
-    ).group_by(
-        AgentLog.agent_type
-    ).all()
+    results = (await db.execute(
+        select(
+            AgentLogRollup.agent_type,
+            func.sum(AgentLogRollup.request_count).label('total'),
+            func.sum(
+                case((AgentLogRollup.status == 'success', AgentLogRollup.request_count), else_=0)
+            ).label('success_count'),
+            func.sum(
+                case((AgentLogRollup.status == 'error', AgentLogRollup.request_count), else_=0)
+            ).label('error_count'),
+            func.sum(AgentLogRollup.duration_sum).label('duration_sum'),
+            func.sum(AgentLogRollup.tokens_sum).label('total_tokens')
+        ).where(
+            agent_log_rollup.window(cutoff_time)
+        ).group_by(
+            AgentLogRollup.agent_type
+        )
+    )).all()
 
     return [
         {
@@ -141,7 +150,7 @@ async def get_agent_stats(
             "total_requests": r.total,
             "success_count": r.success_count or 0,
             "error_count": r.error_count or 0,
-            "avg_duration": round(r.avg_duration, 3),
+            "avg_duration": round(r.duration_sum / r.total, 3),
             "total_tokens": r.total_tokens or 0
         }
         for r in results
@@ -149,12 +158,11 @@ async def get_agent_stats(
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Health check endpoint"""
     try:
         # Test database connection
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {
             "status": "healthy",
             "timestamp": datetime.utcnow().isoformat(),
@@ -167,3 +175,52 @@ async def health_check(db: Session = Depends(get_db)):
             "database": "disconnected",
             "error": str(e)
         }
+
+
+@router.get("/profile/cpu")
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration in seconds"),
+    interval_ms: float = Query(
+        settings.PROFILER_SAMPLE_INTERVAL_MS, ge=1, le=1000, description="Time between samples"
+    ),
+    format: str = Query("folded", pattern="^(folded|json)$", description="folded or json"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Sample this worker's thread stacks for a while (superusers only)
+
+    The folded output feeds straight into flamegraph.pl or speedscope.
+    """
+    try:
+        # A dedicated thread, so the capture neither blocks the event loop
+        # nor holds a compute executor slot
+        profile = await asyncio.to_thread(profiler.cpu_profile, seconds, interval_ms)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "folded":
+        return PlainTextResponse(folded(profile["stacks"]))
+    return profile
+
+
+@router.get("/profile/memory")
+async def profile_memory(
+    seconds: float = Query(10.0, ge=0, description="Capture window in seconds"),
+    limit: int = Query(20, ge=1, le=1000, description="Number of top allocation sites"),
+    group_by: str = Query("lineno", pattern="^(lineno|traceback)$", description="lineno or traceback"),
+    format: str = Query("json", pattern="^(folded|json)$", description="folded or json"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """Top memory allocators from tracemalloc snapshots (superusers only)"""
+    try:
+        report = await asyncio.to_thread(profiler.memory_profile, seconds, limit, group_by)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "folded":
+        return PlainTextResponse(folded(profiler.memory_stacks(report)))
+    return report
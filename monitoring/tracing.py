@@ -0,0 +1,318 @@
+"""
+Request Tracing
+OpenTelemetry-style spans for sampled requests: the FastAPI handler, the
+LangGraph nodes it runs, Milvus/FAISS calls and every SQL statement, exported
+as one JSON document per trace to a file or stdout
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import event
+from config.settings import settings
+import contextvars
+import functools
+import asyncio
+import random
+import threading
+import json
+import time
+import sys
+import os
+
+# Longest SQL statement text kept on a span
+MAX_STATEMENT_LENGTH = 500
+
+# Innermost open span of the current request; None when it is not sampled
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans recorded for one sampled request"""
+
+    def __init__(self, max_spans: int):
+        self.trace_id = _new_id(128)
+        self.max_spans = max_spans
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional["Span"],
+        attributes: Dict[str, Any]
+    ) -> Optional["Span"]:
+        """Open a span, or count it as dropped once the trace is full"""
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        span = Span(self, name, parent.span_id if parent else None, attributes)
+        self.spans.append(span)
+        return span
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any]
+    ):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = "error"
+        self.attributes["error.type"] = type(exc).__name__
+        self.attributes["error.message"] = str(exc)
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class FileExporter:
+    """Append each trace as one JSON line to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Dict[str, Any]):
+        line = json.dumps(trace, default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class StdoutExporter:
+    """Print each trace as one JSON line"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def export(self, trace: Dict[str, Any]):
+        line = json.dumps(trace, default=str)
+        with self._lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+
+def create_exporter(kind: str, path: str):
+    """Exporter for the TRACING_EXPORTER setting"""
+    if kind == "file":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return FileExporter(path)
+    if kind == "stdout":
+        return StdoutExporter()
+    raise ValueError(f"Unsupported tracing exporter: {kind}")
+
+
+class Tracer:
+    """
+    Head-sampled tracer
+
+    ``trace`` decides once per request whether it is recorded. Inside an
+    unsampled request (or outside any request) ``span`` and the SQL hooks do
+    nothing beyond one context variable lookup, so instrumented code paths
+    stay cheap at low sample rates.
+    """
+
+    def __init__(
+        self,
+        exporter=None,
+        sample_rate: float = 1.0,
+        max_spans: int = 1000,
+        enabled: bool = True
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self.enabled = enabled and exporter is not None
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def _activate(self, span: Span):
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """
+        Root span of a request, recorded for ``sample_rate`` of calls
+
+        Within an existing trace this is an ordinary child span.
+        """
+        if _current_span.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield None
+            return
+
+        trace = Trace(self.max_spans)
+        root = trace.start_span(name, None, attributes)
+        try:
+            with self._activate(root):
+                yield root
+        finally:
+            self._export(trace, root)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child span of the current span; a no-op outside a sampled trace"""
+        parent = _current_span.get()
+        span = parent.trace.start_span(name, parent, attributes) if parent else None
+        if span is None:
+            yield None
+            return
+        with self._activate(span):
+            yield span
+
+    def traced(self, name: str) -> Callable:
+        """Decorator wrapping every call of a sync or async function in a span"""
+        def decorator(fn: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _export(self, trace: Trace, root: Span):
+        try:
+            self.exporter.export({
+                "trace_id": trace.trace_id,
+                "name": root.name,
+                "duration_ms": root.to_dict()["duration_ms"],
+                "dropped_spans": trace.dropped,
+                "spans": [span.to_dict() for span in trace.spans]
+            })
+        except Exception as e:
+            # Tracing must never fail the request it describes
+            print(f"[WARNING] Failed to export trace: {e}")
+
+    def instrument_engine(self, engine):
+        """Record a span for each statement executed on a (sync) SQLAlchemy engine"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_sql_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        # Parameters are left out: they can hold passwords and user content
+        context._trace_span = parent.trace.start_span("sql", parent, {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.executemany": executemany
+        })
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    def _handle_sql_error(self, exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
+class TracingMiddleware:
+    """Trace sampled HTTP requests, naming the root span after the matched route"""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with self.tracer.trace(
+            f"{method} {scope['path']}",
+            **{"http.method": method, "http.target": scope["path"]}
+        ) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        root.status = "error"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Routing has filled in scope["route"] by now
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    root.name = f"{method} {route}"
+                    root.set_attribute("http.route", route)
+
+
+# Global tracer instance
+tracer = Tracer(
+    exporter=create_exporter(settings.TRACING_EXPORTER, settings.TRACING_FILE_PATH)
+    if settings.TRACING_ENABLED else None,
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    max_spans=settings.TRACING_MAX_SPANS,
+    enabled=settings.TRACING_ENABLED
+)
@@ -115,6 +115,7 @@ async def add_sample_data():
             texts=texts,
             metadata=metadata_list
         )
+        vector_store.flush()
         print(f"   ✓ Inserted {len(texts)} documents")
     except Exception as e:
         print(f"   ✗ Insertion failed: {e}")
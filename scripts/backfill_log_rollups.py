@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Backfill Log Rollups
+
+This script:
+1. Finds where the log writer started maintaining rollups
+2. Aggregates the raw api_logs/agent_logs rows written before that point
+3. Adds them into the per-minute and per-hour rollup tables
+
+Run it once after deploying rollups; running it twice counts rows twice.
+
+Usage:
+    python scripts/backfill_log_rollups.py
+    python scripts/backfill_log_rollups.py --until 2024-06-01T12:00:00 --batch-size 20000
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from common.database import engine, Base, SessionLocal
+from monitoring.rollups import ROLLUPS, MINUTE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill log rollup tables from raw logs")
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        help="Only roll up rows before this UTC time (default: first existing rollup minute)"
+    )
+    parser.add_argument("--batch-size", type=int, default=10000, help="Raw rows per upsert")
+    return parser.parse_args()
+
+
+def backfill_log_rollups():
+    """Roll up raw log rows written before rollups were maintained"""
+    args = parse_args()
+    Base.metadata.create_all(bind=engine)
+
+    print("📊 Backfilling log rollups")
+    print()
+
+    db = SessionLocal()
+    try:
+        for model, rollup in ROLLUPS.items():
+            rollup_table = rollup.model.__table__
+            until = args.until or db.scalar(
+                select(func.min(rollup_table.c.bucket_start))
+                .where(rollup_table.c.bucket_seconds == MINUTE)
+            ) or datetime.utcnow()
+            print(f"   {model.__tablename__}: rows before {until.isoformat()}")
+
+            columns = [column for column in model.__table__.columns if not column.primary_key]
+            last_id = 0
+            total = 0
+            while True:
+                rows = db.execute(
+                    select(model.id, *columns)
+                    .where(model.timestamp < until, model.id > last_id)
+                    .order_by(model.id)
+                    .limit(args.batch_size)
+                ).mappings().all()
+                if not rows:
+                    break
+
+                db.execute(rollup.upsert(engine.dialect.name, [dict(row) for row in rows]))
+                db.commit()
+                last_id = rows[-1]["id"]
+                total += len(rows)
+
+            print(f"   ✓ {total} rows rolled up into {rollup_table.name}")
+    finally:
+        db.close()
+
+    print("\n✅ Backfill complete")
+
+
+if __name__ == "__main__":
+    backfill_log_rollups()
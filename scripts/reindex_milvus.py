@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Rebuild the Milvus ANN Index
+
+This script:
+1. Connects to Milvus and binds the embeddings collection
+2. Drops the current index and builds the requested one
+3. Reloads the collection so searches resume
+
+Milvus allows one index per vector field, so the rebuild is not fully online.
+From the release until the new index is built and loaded, API workers'
+searches wait (up to MILVUS_REINDEX_WAIT_TIMEOUT) instead of returning
+results, and then adopt the new index type and metric. Search params passed
+here are not stored in Milvus: other workers use the preset (or
+MILVUS_SEARCH_PARAMS) for the new index type until .env is updated.
+
+Usage:
+    python scripts/reindex_milvus.py --index-type HNSW --metric-type COSINE
+    python scripts/reindex_milvus.py --index-type IVF_PQ --index-params '{"nlist": 4096, "m": 32}'
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.vector_store import vector_store, INDEX_PRESETS, METRIC_TYPES
+from config.settings import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the Milvus ANN index")
+    parser.add_argument("--index-type", choices=sorted(INDEX_PRESETS), help="ANN index type")
+    parser.add_argument("--metric-type", choices=METRIC_TYPES, help="Distance metric")
+    parser.add_argument("--index-params", type=json.loads, help="JSON build params")
+    parser.add_argument("--search-params", type=json.loads, help="JSON search params")
+    return parser.parse_args()
+
+
+def reindex_milvus():
+    """Rebuild the collection index"""
+    args = parse_args()
+
+    print("🔧 Rebuilding Milvus index")
+    print(f"   Collection: {settings.MILVUS_COLLECTION_NAME}")
+    print()
+
+    # Step 1: Connect
+    print("1️⃣  Connecting to Milvus...")
+    try:
+        vector_store.connect()
+        vector_store.create_collection()
+        print(f"   ✓ Current index: {vector_store.index_type} ({vector_store.metric_type})")
+    except Exception as e:
+        print(f"   ✗ Connection failed: {e}")
+        sys.exit(1)
+
+    # Step 2: Rebuild
+    print("\n2️⃣  Rebuilding index...")
+    try:
+        vector_store.reindex(
+            index_type=args.index_type,
+            metric_type=args.metric_type,
+            index_params=args.index_params,
+            search_params=args.search_params
+        )
+        print(f"   ✓ New index: {vector_store.index_type} ({vector_store.metric_type})")
+        print(f"   ✓ Build params: {vector_store.index_params}")
+        print(f"   ✓ Search params: {vector_store.search_params}")
+    except Exception as e:
+        print(f"   ✗ Reindex failed: {e}")
+        sys.exit(1)
+
+    print("\n✅ Reindex complete!")
+    print("\n📝 Next steps:")
+    print("   1. Update MILVUS_INDEX_TYPE / MILVUS_METRIC_TYPE in .env to match")
+    print("   2. Running workers adopt the new index and metric on their next search;")
+    print("      restart them if you changed --search-params")
+
+
+if __name__ == "__main__":
+    reindex_milvus()
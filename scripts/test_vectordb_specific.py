@@ -102,6 +102,7 @@ async def add_specific_info():
             texts=[SPECIFIC_INFO['text']],
             metadata=[metadata_str]
         )
+        vector_store.flush()
         print("   ✓ Inserted successfully")
     except Exception as e:
         print(f"   ✗ Insertion failed: {e}")
@@ -0,0 +1,21 @@
+"""
+Shared test setup
+"""
+import os
+import shutil
+import tempfile
+
+_embedding_cache_dir = None
+
+
+def pytest_configure(config):
+    # Keep the shared embedding cache's disk tier out of the working tree;
+    # set before config.settings is first imported
+    global _embedding_cache_dir
+    _embedding_cache_dir = tempfile.mkdtemp(prefix="embedding-cache-")
+    os.environ["EMBEDDING_CACHE_DIR"] = _embedding_cache_dir
+
+
+def pytest_unconfigure(config):
+    if _embedding_cache_dir:
+        shutil.rmtree(_embedding_cache_dir, ignore_errors=True)
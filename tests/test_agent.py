@@ -16,7 +16,7 @@ class TestLLMClient:
         """Test that LLM client initializes correctly"""
         llm = LLMClient()
         assert llm.provider == settings.LLM_PROVIDER.lower()
-        assert llm.chat_model is not None
+        assert llm.scheduler.replicas == settings.LLM_REPLICAS
 
     def test_llm_provider_is_anthropic(self):
         """Test that provider is set to anthropic"""
@@ -113,6 +113,42 @@ class TestGraphAgent:
         assert isinstance(result["retrieval_results"], list)
         print(f"\n✓ Agent with retrieval: {result['response'][:100]}...")
 
+    @pytest.mark.asyncio
+    async def test_agent_stream(self):
+        """Test that streaming yields retrieval first, then tokens, then the result"""
+        agent = GraphAgent(agent_type="general")
+
+        events = [event async for event in agent.astream("What is 2+2?")]
+        kinds = [kind for kind, _ in events]
+
+        assert kinds[0] == "retrieval"
+        assert kinds[-1] == "done"
+        assert "token" in kinds
+        tokens = "".join(data for kind, data in events if kind == "token")
+        assert events[-1][1]["response"] == tokens.strip()
+        print(f"\n✓ Streamed {kinds.count('token')} tokens")
+
+    @pytest.mark.asyncio
+    async def test_agent_records_stage_durations(self):
+        """Test that each pipeline stage is timed under the agent type"""
+        from prometheus_client import REGISTRY
+
+        agent = GraphAgent(agent_type="stage_test")
+        await agent.run("What is 2+2?")
+
+        def stage_count(stage):
+            return REGISTRY.get_sample_value(
+                "ai_agent_stage_duration_seconds_count",
+                {"agent_type": "stage_test", "stage": stage}
+            ) or 0
+
+        for stage in ("embedding", "vector_search", "context_assembly", "queue_wait"):
+            assert stage_count(stage) >= 1
+        if settings.AGENT_RESPONSE_CACHE_ENABLED:
+            assert stage_count("cache_lookup") >= 1
+        assert stage_count("prompt_eval") >= 1
+        assert stage_count("generation") >= 1
+
 
 # Test Agent API Endpoints
 class TestAgentAPI:
@@ -177,6 +213,28 @@ class TestAgentAPI:
         assert "paris" in data["response"].lower()
         print(f"\n✓ API Response: {data['response']}")
 
+    def test_agent_query_stream(self, auth_token):
+        """Test SSE streaming of an agent query"""
+        response = client.post(
+            "/agent/query/stream",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            json={
+                "query": "What is the capital of France?",
+                "agent_type": "general"
+            }
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            line.split(": ", 1)[1]
+            for line in response.text.splitlines()
+            if line.startswith("event: ")
+        ]
+        assert events[0] == "retrieval"
+        assert events[-1] == "done"
+        assert "paris" in response.text.lower()
+
     def test_create_session(self, auth_token):
         """Test creating a new agent session"""
         response = client.post(
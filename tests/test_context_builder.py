@@ -0,0 +1,77 @@
+"""
+Tests for token-budgeted context assembly
+Uses a word-count tokenizer so budgets are easy to reason about
+"""
+from agent.context_builder import ContextBuilder
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def hit(text: str, distance: float) -> dict:
+    return {"id": hash(text), "distance": distance, "text": text, "metadata": None}
+
+
+class TestContextBuilder:
+    """Test suite for ContextBuilder"""
+
+    def test_ranks_by_metric(self):
+        """L2 puts small distances first, IP/COSINE large ones"""
+        builder = ContextBuilder(word_count, token_budget=100)
+        results = [hit("far away", 0.9), hit("close by", 0.1)]
+
+        assert builder.build(results).text.startswith("close by")
+        assert builder.build(results, higher_is_better=True).text.startswith("far away")
+
+    def test_duplicates_removed(self):
+        """Repeated and contained chunks are only included once"""
+        builder = ContextBuilder(word_count, token_budget=100)
+        results = [
+            hit("HBM stacks DRAM dies vertically", 0.1),
+            hit("HBM  stacks DRAM dies vertically", 0.2),
+            hit("DRAM dies", 0.3),
+        ]
+
+        context = builder.build(results)
+
+        assert context.text == "HBM stacks DRAM dies vertically"
+        assert context.duplicates == 2
+        assert len(context.used) == 1
+
+    def test_overlapping_chunks_trimmed(self):
+        """The splitter overlap between neighbouring chunks is not repeated"""
+        builder = ContextBuilder(word_count, token_budget=100, min_overlap=10)
+        overlap = "shared overlap text between chunks"
+        results = [
+            hit(f"first chunk body {overlap}", 0.1),
+            hit(f"{overlap} second chunk body", 0.2),
+        ]
+
+        context = builder.build(results)
+
+        assert context.text.count(overlap) == 1
+        assert "second chunk body" in context.text
+
+    def test_budget_truncates(self):
+        """Context never exceeds the budget and the last chunk is cut"""
+        builder = ContextBuilder(word_count, token_budget=8, separator="\n\n")
+        results = [
+            hit("one two three four five", 0.1),
+            hit("six seven eight nine ten eleven", 0.2),
+            hit("never included", 0.3),
+        ]
+
+        context = builder.build(results)
+
+        assert context.tokens <= 8
+        assert context.truncated
+        assert context.text == "one two three four five\n\nsix seven eight"
+        assert len(context.used) == 2
+
+    def test_empty_results(self):
+        """No hits produce an empty context"""
+        context = ContextBuilder(word_count).build([])
+
+        assert context.text == ""
+        assert context.tokens == 0
@@ -0,0 +1,72 @@
+"""
+Tests for the micro-batching embedding scheduler
+"""
+import pytest
+import asyncio
+from typing import List
+from agent.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEmbedder:
+    """Fake batch embedder that records the size of every call"""
+
+    def __init__(self):
+        self.batches: List[List[str]] = []
+
+    async def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class TestEmbeddingBatcher:
+    """Test suite for EmbeddingBatcher"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self):
+        """Requests arriving inside the window are embedded together"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=32, max_wait_ms=20)
+
+        texts = [f"query {i}" for i in range(10)]
+        vectors = await asyncio.gather(*(batcher.embed(text) for text in texts))
+
+        assert len(embedder.batches) == 1
+        assert vectors == [[float(len(text))] for text in texts]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_dispatches_immediately(self):
+        """Reaching max_batch_size flushes without waiting for the window"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=4, max_wait_ms=10_000)
+
+        vectors = await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(str(i)) for i in range(8))),
+            timeout=1
+        )
+
+        assert [len(batch) for batch in embedder.batches] == [4, 4]
+        assert len(vectors) == 8
+
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_embedded_once(self):
+        """Identical concurrent queries share a single vector"""
+        embedder = RecordingEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=32, max_wait_ms=5)
+
+        first, second = await asyncio.gather(batcher.embed("HBM"), batcher.embed("HBM"))
+
+        assert embedder.batches == [["HBM"]]
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_caller(self):
+        """A failed batch fails every request in it"""
+        async def failing(texts):
+            raise RuntimeError("model unavailable")
+
+        batcher = EmbeddingBatcher(failing, max_batch_size=32, max_wait_ms=5)
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,156 @@
+"""
+Tests for the content-addressed embedding cache
+Uses a counting fake embeddings model so no transformer is loaded
+"""
+import os
+import pytest
+import numpy as np
+from typing import List
+from langchain_core.embeddings import Embeddings
+from agent.embedding_cache import EmbeddingCache, CachedEmbeddings, DiskEmbeddingStore
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that record every text it embeds"""
+
+    model_name = "fake-model"
+    encode_kwargs = {"normalize_embeddings": True}
+
+    def __init__(self):
+        self.calls: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class TestEmbeddingCache:
+    """Test suite for the embedding cache tiers"""
+
+    def test_memory_tier_skips_model(self):
+        """Repeated texts are only embedded once"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_entries=100))
+
+        first = embeddings.embed_documents(["SK Hynix", "GaiA", "SK Hynix"])
+        second = embeddings.embed_documents(["GaiA", "SK Hynix"])
+
+        assert base.calls == ["SK Hynix", "GaiA"]
+        assert first[0] == first[2] == second[1]
+        assert first[1] == second[0]
+
+    def test_query_uses_same_cache(self):
+        """Queries hit vectors cached by document ingestion"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_entries=100))
+
+        embeddings.embed_documents(["What is DRAM?"])
+        vector = embeddings.embed_query("What is DRAM?")
+
+        assert base.calls == ["What is DRAM?"]
+        assert vector == base.embed_documents(["What is DRAM?"])[0]
+
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted from the memory tier"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_entries=2))
+
+        embeddings.embed_documents(["a", "b", "c"])
+        embeddings.embed_documents(["a"])
+
+        assert base.calls == ["a", "b", "c", "a"]
+
+    def test_disk_tier_survives_new_cache(self, tmp_path):
+        """Vectors written to disk are reused by a fresh process-level cache"""
+        base = CountingEmbeddings()
+        first = CachedEmbeddings(base, EmbeddingCache(max_entries=10, cache_dir=str(tmp_path)))
+        expected = first.embed_documents(["NAND flash", "HBM"])
+
+        second = CachedEmbeddings(base, EmbeddingCache(max_entries=10, cache_dir=str(tmp_path)))
+        vectors = second.embed_documents(["HBM", "NAND flash", "CXL"])
+
+        assert base.calls == ["NAND flash", "HBM", "CXL"]
+        assert vectors[0] == pytest.approx(expected[1])
+        assert vectors[1] == pytest.approx(expected[0])
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        """Different models never share cached vectors"""
+        cache = EmbeddingCache(max_entries=10, cache_dir=str(tmp_path))
+        cache.put_many("model-a", True, ["text"], [[1.0, 2.0]])
+
+        assert cache.get_many("model-b", True, ["text"]) == [None]
+        assert cache.get_many("model-a", False, ["text"]) == [None]
+        assert cache.get_many("model-a", True, ["text"])[0].tolist() == [1.0, 2.0]
+
+    def test_torn_vector_append_is_repaired(self, tmp_path):
+        """Vectors written without their keys don't shift later rows"""
+        store = DiskEmbeddingStore(str(tmp_path))
+        store.put_many([("a", np.array([1.0, 1.0], dtype=np.float32))])
+        # A writer died after appending a row and a half of vectors
+        with open(store.vectors_path, "ab") as f:
+            f.write(np.array([9.0, 9.0, 9.0], dtype=np.float32).tobytes())
+
+        reopened = DiskEmbeddingStore(str(tmp_path))
+        reopened.put_many([("b", np.array([2.0, 2.0], dtype=np.float32))])
+
+        vectors = DiskEmbeddingStore(str(tmp_path)).get_many(["a", "b"])
+        assert [vector.tolist() for vector in vectors] == [[1.0, 1.0], [2.0, 2.0]]
+
+    def test_keys_without_vectors_are_dropped(self, tmp_path):
+        """Key rows pointing past the vector file are discarded on open"""
+        store = DiskEmbeddingStore(str(tmp_path))
+        store.put_many([("a", np.array([1.0, 1.0], dtype=np.float32))])
+        with open(store.keys_path, "ab") as f:
+            f.write(b"lost\t1\npartial")
+
+        reopened = DiskEmbeddingStore(str(tmp_path))
+        reopened.put_many([("b", np.array([2.0, 2.0], dtype=np.float32))])
+
+        vectors = DiskEmbeddingStore(str(tmp_path)).get_many(["a", "lost", "b"])
+        assert vectors[1] is None
+        assert vectors[2].tolist() == [2.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_async_embedding_uses_cache(self):
+        """Async embedding goes through the executor and shares the cache"""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_entries=10))
+
+        vectors = await embeddings.aembed_documents(["DRAM", "HBM"])
+        query = await embeddings.aembed_query("HBM")
+
+        assert base.calls == ["DRAM", "HBM"]
+        assert query == vectors[1]
+
+    @pytest.mark.asyncio
+    async def test_async_disk_tier_runs_in_io_pool(self, tmp_path, monkeypatch):
+        """Disk-tier reads and writes are handed to the executor's I/O pool"""
+        from agent import embedding_cache as module
+        io_calls = []
+
+        async def run_io(fn, *args):
+            io_calls.append(fn.__name__)
+            return fn(*args)
+
+        monkeypatch.setattr(module.compute_executor, "run_io", run_io)
+        embeddings = CachedEmbeddings(CountingEmbeddings(), EmbeddingCache(cache_dir=str(tmp_path)))
+
+        await embeddings.aembed_documents(["DRAM"])
+
+        assert io_calls[0] == "_lookup" and io_calls[-1] == "_merge"
+
+    def test_namespace_separates_model_classes(self, tmp_path):
+        """A stand-in model with a real model's name does not share its vectors"""
+        class OtherEmbeddings(CountingEmbeddings):
+            pass
+
+        cache = EmbeddingCache(cache_dir=str(tmp_path))
+        CachedEmbeddings(CountingEmbeddings(), cache).embed_documents(["DRAM"])
+        other = OtherEmbeddings()
+        CachedEmbeddings(other, cache).embed_documents(["DRAM"])
+
+        assert other.calls == ["DRAM"]
+        assert len(os.listdir(tmp_path)) == 2
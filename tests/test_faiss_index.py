@@ -0,0 +1,61 @@
+"""
+Tests for FAISS index building and flat-to-ANN promotion
+"""
+import pytest
+import numpy as np
+import faiss
+from agent import faiss_index
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    """Random normalized vectors standing in for embeddings"""
+    rng = np.random.default_rng(42)
+    data = rng.standard_normal((4000, 64)).astype(np.float32)
+    faiss.normalize_L2(data)
+    return data
+
+
+@pytest.fixture(scope="module")
+def flat_index(vectors):
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+class TestFaissIndex:
+    """Test suite for FAISS index management"""
+
+    @pytest.mark.parametrize("index_type", ["ivf", "ivf_sq8", "ivf_pq", "hnsw"])
+    def test_promotion_preserves_positions(self, flat_index, vectors, index_type):
+        """Promoted indexes keep vector positions so docstore ids still line up"""
+        index = faiss_index.promote(
+            flat_index, index_type, train_size=4000, nprobe=32, ef_search=64, pq_m=8
+        )
+
+        assert index.ntotal == flat_index.ntotal
+        _, ids = index.search(vectors[:20], 1)
+        # Each vector should find itself (PQ is lossy, so allow a few misses)
+        assert (ids[:, 0] == np.arange(20)).mean() >= 0.8
+
+    def test_should_promote(self, flat_index):
+        """Only flat indexes over the threshold are promoted"""
+        assert faiss_index.should_promote(flat_index, "hnsw", 1000)
+        assert not faiss_index.should_promote(flat_index, "hnsw", 10000)
+        assert not faiss_index.should_promote(flat_index, "flat", 1000)
+
+        hnsw = faiss_index.promote(flat_index, "hnsw", train_size=0, nprobe=1, ef_search=16)
+        assert not faiss_index.should_promote(hnsw, "hnsw", 1000)
+
+    def test_search_params_applied(self, flat_index):
+        """nprobe and efSearch are set on the indexes that support them"""
+        ivf = faiss_index.promote(flat_index, "ivf", train_size=4000, nprobe=7, ef_search=16)
+        hnsw = faiss_index.promote(flat_index, "hnsw", train_size=0, nprobe=7, ef_search=48)
+
+        assert faiss.extract_index_ivf(ivf).nprobe == 7
+        assert hnsw.hnsw.efSearch == 48
+
+    def test_pq_requires_divisible_dimension(self):
+        """PQ sub-quantizer count must divide the dimension"""
+        with pytest.raises(ValueError):
+            faiss_index.factory_string("ivf_pq", dim=768, ntotal=10000, pq_m=7)
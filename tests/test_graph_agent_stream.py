@@ -0,0 +1,80 @@
+"""
+Tests for GraphAgent.astream
+The LLM, vector store and executor are replaced with fakes, so the compiled
+graph runs without models or Milvus
+"""
+import types
+import pytest
+from agent import graph_agent
+from agent.graph_agent import GraphAgent
+from agent.inference import GenerationResult
+from config.settings import settings
+
+
+class FakeLLM:
+    """Streams a fixed answer token by token"""
+
+    def __init__(self, tokens, fail=False):
+        self.tokens = tokens
+        self.fail = fail
+
+    async def generate_embeddings(self, text):
+        return [0.1, 0.2]
+
+    async def stream_response(self, messages, system_prompt=None, cache_prefix=None, on_complete=None):
+        for token in self.tokens:
+            yield token
+        if self.fail:
+            raise RuntimeError("replica crashed")
+        on_complete(GenerationResult("".join(self.tokens), len(self.tokens), 0.0, 0.01, 0.02))
+
+
+class FakeExecutor:
+    async def run_io(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(graph_agent, "compute_executor", FakeExecutor())
+    monkeypatch.setattr(graph_agent, "kb_version", types.SimpleNamespace(current=lambda name: 1))
+    monkeypatch.setattr(graph_agent, "vector_store", types.SimpleNamespace(
+        collection_name="test",
+        higher_is_better=False,
+        search=lambda embedding, top_k: [
+            {"id": 1, "distance": 0.1, "text": "doc", "metadata": "{}"}
+        ]
+    ))
+
+    def use_llm(llm):
+        monkeypatch.setattr(graph_agent, "llm_client", llm)
+    return use_llm
+
+
+class TestGraphAgentStream:
+    """Test suite for streaming through the compiled graph"""
+
+    async def test_stream_relays_graph_events(self, fakes):
+        """Retrieval comes first, then tokens, then the final state"""
+        fakes(FakeLLM(["Four", " is", " the", " answer"]))
+        agent = GraphAgent(agent_type="stream_test")
+
+        events = [event async for event in agent.astream("What is 2+2?")]
+        kinds = [kind for kind, _ in events]
+
+        assert kinds == ["retrieval", "token", "token", "token", "token", "done"]
+        assert events[0][1]["results"][0]["text"] == "doc"
+        assert events[-1][1]["response"] == "Four is the answer"
+
+    async def test_stream_raises_generation_errors(self, fakes):
+        """A failing node surfaces as an exception after the tokens already sent"""
+        fakes(FakeLLM(["partial"], fail=True))
+        agent = GraphAgent(agent_type="stream_test")
+
+        kinds = []
+        with pytest.raises(RuntimeError):
+            async for kind, _ in agent.astream("What is 2+2?"):
+                kinds.append(kind)
+
+        assert kinds == ["retrieval", "token"]
@@ -0,0 +1,137 @@
+"""
+Tests for token-budgeted conversation history
+Uses an in-memory SQLite database (aiosqlite) and a word-count tokenizer
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from common.database import Base
+from agent.models import AgentMessage
+from agent.history import ConversationHistory
+
+
+@pytest.fixture
+async def db():
+    """Fresh SQLite session with the agent tables"""
+    # One shared connection so every session sees the same in-memory database
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[AgentMessage.__table__])
+        )
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+
+    queries = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2])
+    )
+    session.queries = queries
+
+    yield session
+    await session.close()
+    await engine.dispose()
+
+
+async def add_turns(db, session_id, count, start=0, words=5):
+    """Add alternating user/assistant messages with increasing timestamps"""
+    base = datetime(2024, 1, 1)
+    for i in range(start, start + count):
+        db.add(AgentMessage(
+            session_id=session_id,
+            role="user" if i % 2 == 0 else "assistant",
+            content=" ".join([f"m{i}"] * words),
+            created_at=base + timedelta(seconds=i)
+        ))
+    await db.commit()
+
+
+def make_history(**kwargs):
+    summaries = []
+
+    async def summarize(previous, messages):
+        summaries.append(messages)
+        return f"summary of {len(messages)} messages"
+
+    history = ConversationHistory(
+        count_tokens=lambda text: len(text.split()),
+        summarize=summarize,
+        **kwargs
+    )
+    history.summaries = summaries
+    return history
+
+
+class TestConversationHistory:
+    """Test suite for ConversationHistory"""
+
+    async def test_window_respects_message_cap(self, db):
+        """Only the most recent messages are returned, oldest first"""
+        await add_turns(db, session_id=1, count=10)
+        history = make_history(token_budget=1000, max_messages=4)
+
+        messages = await history.load(db, 1)
+
+        assert [m["content"].split()[0] for m in messages] == ["m6", "m7", "m8", "m9"]
+        assert messages[0]["role"] == "user"
+
+    async def test_window_respects_token_budget(self, db):
+        """Older messages are dropped once the token budget is exceeded"""
+        await add_turns(db, session_id=1, count=6, words=5)
+        history = make_history(token_budget=12, max_messages=20)
+
+        messages = await history.load(db, 1)
+
+        assert len(messages) == 2
+
+    async def test_cached_session_reads_only_new_messages(self, db):
+        """A cached session issues one query that returns just the new rows"""
+        await add_turns(db, session_id=1, count=4)
+        history = make_history(token_budget=1000, max_messages=20)
+        await history.load(db, 1)
+
+        await add_turns(db, session_id=1, count=2, start=4)
+        db.queries.clear()
+        messages = await history.load(db, 1)
+
+        assert len(db.queries) == 1
+        assert len(messages) == 6
+        assert messages[-1]["content"].startswith("m5")
+
+    async def test_sessions_are_isolated(self, db):
+        """Messages of other sessions never leak into a window"""
+        await add_turns(db, session_id=1, count=2)
+        await add_turns(db, session_id=2, count=3)
+        history = make_history()
+
+        assert len(await history.load(db, 1)) == 2
+        assert len(await history.load(db, 2)) == 3
+
+    async def test_rolling_summary(self, db):
+        """Evicted messages are summarized and prepended as a system message"""
+        await add_turns(db, session_id=1, count=8, words=5)
+        history = make_history(token_budget=20, max_messages=20, summary_trigger=10)
+
+        await history.load(db, 1)
+        assert history.needs_summary(1)
+        await history.update_summary(1)
+        messages = await history.load(db, 1)
+
+        assert len(history.summaries) == 1
+        assert messages[0]["role"] == "system"
+        assert "summary of" in messages[0]["content"]
+        assert not history.needs_summary(1)
+
+    async def test_oversized_message_is_evicted_once(self, db):
+        """A message larger than the budget is not re-read and re-evicted every turn"""
+        await add_turns(db, session_id=1, count=1, words=50)
+        history = make_history(token_budget=20, max_messages=20, summary_trigger=1000)
+
+        assert await history.load(db, 1) == []
+        db.queries.clear()
+        assert await history.load(db, 1) == []
+
+        window = history._window(1)
+        assert len(window.evicted) == 1
+        assert len(db.queries) == 1
@@ -0,0 +1,162 @@
+"""
+Tests for the LLM inference scheduler
+Uses a fake streaming model so no GGUF weights are loaded
+"""
+import pytest
+import asyncio
+import threading
+import time
+from typing import List
+from agent.inference import (
+    InferenceScheduler,
+    InferenceQueueFull,
+    InferenceTimeout,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND
+)
+
+
+class FakeModel:
+    """Streams the prompt back word by word, recording prompts it served"""
+
+    def __init__(self, served: List[str], delay: float = 0.0, gate: threading.Event = None):
+        self.served = served
+        self.delay = delay
+        self.gate = gate
+
+    def stream(self, prompt: str):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.served.append(prompt)
+        for word in prompt.split():
+            time.sleep(self.delay)
+            yield f" {word}"
+
+
+class TestInferenceScheduler:
+    """Test suite for InferenceScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_generate_returns_text_and_stats(self):
+        """Generation returns the completion with token statistics"""
+        served = []
+        scheduler = InferenceScheduler(lambda: FakeModel(served), replicas=1)
+
+        result = await scheduler.generate("one two three")
+
+        assert result.text == "one two three"
+        assert result.completion_tokens == 3
+        assert result.time_to_first_token is not None
+        assert result.tokens_per_second > 0
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_tokens(self):
+        """Streaming yields every token in order"""
+        scheduler = InferenceScheduler(lambda: FakeModel([]), replicas=1)
+
+        tokens = [token async for token in scheduler.stream("a b c")]
+
+        assert tokens == [" a", " b", " c"]
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Waiting interactive requests are served before background ones"""
+        served = []
+        gate = threading.Event()
+        scheduler = InferenceScheduler(lambda: FakeModel(served, gate=gate), replicas=1)
+
+        # Occupies the only replica until the gate opens
+        busy = asyncio.create_task(scheduler.generate("busy"))
+        await asyncio.sleep(0.05)
+
+        background = asyncio.create_task(
+            scheduler.generate("background", priority=PRIORITY_BACKGROUND)
+        )
+        interactive = asyncio.create_task(
+            scheduler.generate("interactive", priority=PRIORITY_INTERACTIVE)
+        )
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(busy, background, interactive)
+
+        assert served == ["busy", "interactive", "background"]
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejects(self):
+        """Requests beyond the queue capacity are rejected immediately"""
+        gate = threading.Event()
+        scheduler = InferenceScheduler(
+            lambda: FakeModel([], gate=gate), replicas=1, max_queue_size=1
+        )
+
+        busy = asyncio.create_task(scheduler.generate("busy"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(scheduler.generate("queued"))
+        await asyncio.sleep(0.01)
+
+        assert scheduler.full()
+        with pytest.raises(InferenceQueueFull):
+            await scheduler.generate("rejected")
+
+        gate.set()
+        await asyncio.gather(busy, queued)
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Requests that wait too long for a replica fail with InferenceTimeout"""
+        scheduler = InferenceScheduler(
+            lambda: FakeModel([], delay=0.1), replicas=1, queue_timeout=0.05
+        )
+
+        busy = asyncio.create_task(scheduler.generate("slow slow slow"))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(InferenceTimeout):
+            await scheduler.generate("late")
+        await busy
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout_while_replica_is_busy(self):
+        """The deadline holds even while the only replica is stuck on a long generation"""
+        served = []
+        gate = threading.Event()
+        scheduler = InferenceScheduler(
+            lambda: FakeModel(served, gate=gate), replicas=1, queue_timeout=0.05
+        )
+
+        busy = asyncio.create_task(scheduler.generate("busy"))
+        await asyncio.sleep(0.01)
+
+        start = time.time()
+        with pytest.raises(InferenceTimeout):
+            await scheduler.generate("late")
+        assert time.time() - start < 1.0
+
+        gate.set()
+        await busy
+        await asyncio.sleep(0.05)
+        assert served == ["busy"]
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_replicas_run_concurrently(self):
+        """Each replica serves its own request in parallel"""
+        created = []
+
+        def factory():
+            model = FakeModel([], delay=0.1)
+            created.append(model)
+            return model
+
+        scheduler = InferenceScheduler(factory, replicas=2)
+        start = time.time()
+        await asyncio.gather(scheduler.generate("a b"), scheduler.generate("c d"))
+
+        assert len(created) == 2
+        assert time.time() - start < 0.35
+        scheduler.shutdown()
@@ -0,0 +1,36 @@
+"""
+Tests for the shared knowledge base version
+"""
+from sqlalchemy import create_engine
+from agent.kb_version import KBVersion
+
+
+def make_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'kb.db'}")
+
+
+class TestKBVersion:
+    """Test suite for KBVersion"""
+
+    def test_bumps_are_seen_by_the_writer_at_once(self, tmp_path):
+        versions = KBVersion(make_engine(tmp_path), check_interval=60)
+
+        assert versions.current("docs") == 0
+        versions.bump("docs")
+        versions.bump("docs")
+
+        assert versions.current("docs") == 2
+        assert versions.current("other") == 0
+
+    def test_other_processes_see_changes_after_the_check_interval(self, tmp_path):
+        """Bumps by another writer show up once the cached value expires"""
+        engine = make_engine(tmp_path)
+        reader = KBVersion(engine, check_interval=60)
+        writer = KBVersion(engine)
+
+        assert reader.current("docs") == 0
+        writer.bump("docs")
+        assert reader.current("docs") == 0
+
+        reader.check_interval = 0
+        assert reader.current("docs") == 1
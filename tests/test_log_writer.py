@@ -0,0 +1,103 @@
+"""
+Tests for the batched background log writer
+Uses an in-memory SQLite database (aiosqlite)
+"""
+import asyncio
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from common.database import Base
+from monitoring.models import APILog, AgentLog
+from monitoring.log_writer import LogWriter
+from monitoring.metrics import log_writer_dropped_total
+
+
+@pytest.fixture
+async def session_factory():
+    """Session factory for a fresh database with the log tables"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(
+                sync_conn, tables=[APILog.__table__, AgentLog.__table__]
+            )
+        )
+
+    inserts = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record_insert(conn, cursor, statement, *args):
+        if statement.startswith("INSERT"):
+            inserts.append(statement)
+
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    factory.inserts = inserts
+
+    yield factory
+    await engine.dispose()
+
+
+async def count(session_factory, model):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count(model.id)))
+
+
+def api_row(i=0):
+    return {"method": "GET", "endpoint": f"/items/{i}", "status_code": 200, "duration": 0.01}
+
+
+class TestLogWriter:
+    """Test suite for LogWriter"""
+
+    async def test_rows_are_written_in_batches(self, session_factory):
+        """Queued rows are inserted together, one statement per table"""
+        writer = LogWriter(session_factory, batch_size=100, flush_interval_ms=50)
+        for i in range(20):
+            writer.enqueue(APILog, api_row(i))
+        writer.enqueue(AgentLog, {"agent_type": "general", "user_id": 1, "status": "success"})
+
+        await writer.stop()
+
+        assert await count(session_factory, APILog) == 20
+        assert await count(session_factory, AgentLog) == 1
+        assert len(session_factory.inserts) <= 4
+
+    async def test_enqueue_sets_event_timestamp(self, session_factory):
+        """Rows keep the time they were queued, not the time they were written"""
+        writer = LogWriter(session_factory, flush_interval_ms=50)
+        writer.enqueue(APILog, api_row())
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+        async with session_factory() as db:
+            log = await db.scalar(select(APILog))
+        assert log.timestamp is not None
+        assert log.endpoint == "/items/0"
+
+    async def test_full_queue_drops_rows(self, session_factory):
+        """Rows beyond the queue capacity are dropped and counted"""
+        writer = LogWriter(session_factory, max_queue_size=3, flush_interval_ms=50)
+        before = log_writer_dropped_total.labels(table="api_logs", reason="queue_full")._value.get()
+
+        accepted = [writer.enqueue(APILog, api_row(i)) for i in range(5)]
+        await writer.stop()
+
+        assert accepted == [True, True, True, False, False]
+        after = log_writer_dropped_total.labels(table="api_logs", reason="queue_full")._value.get()
+        assert after - before == 2
+        assert await count(session_factory, APILog) == 3
+
+    async def test_failed_write_is_counted(self):
+        """A database error drops the batch without stopping the worker"""
+        def broken_factory():
+            raise RuntimeError("database unavailable")
+
+        writer = LogWriter(broken_factory, flush_interval_ms=10)
+        before = log_writer_dropped_total.labels(table="api_logs", reason="error")._value.get()
+
+        writer.enqueue(APILog, api_row())
+        await writer.stop()
+
+        after = log_writer_dropped_total.labels(table="api_logs", reason="error")._value.get()
+        assert after - before == 1
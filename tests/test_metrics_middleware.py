@@ -0,0 +1,84 @@
+"""
+Tests for MetricsMiddleware endpoint labels
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from monitoring.metrics import (
+    MetricsMiddleware,
+    UNMATCHED_ENDPOINT,
+    OVERFLOW_ENDPOINT,
+    metrics_endpoint
+)
+
+
+def make_client(max_endpoints=10):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, max_endpoints=max_endpoints)
+
+    @app.get("/sessions/{session_id}/messages")
+    async def messages(session_id: int):
+        return []
+
+    @app.get("/first")
+    async def first():
+        return {}
+
+    @app.get("/second")
+    async def second():
+        return {}
+
+    @app.get("/metrics")
+    async def metrics():
+        return metrics_endpoint()
+
+    return TestClient(app)
+
+
+def requests_for(endpoint, status="200"):
+    return REGISTRY.get_sample_value(
+        "http_requests_total",
+        {"method": "GET", "endpoint": endpoint, "status": status}
+    ) or 0
+
+
+class TestMetricsMiddleware:
+    """Test suite for MetricsMiddleware"""
+
+    def test_path_parameters_share_the_route_template(self):
+        """Requests for different ids are counted under one template label"""
+        client = make_client()
+        before = requests_for("/sessions/{session_id}/messages")
+
+        for session_id in range(5):
+            client.get(f"/sessions/{session_id}/messages")
+
+        assert requests_for("/sessions/{session_id}/messages") - before == 5
+        assert requests_for("/sessions/3/messages") == 0
+
+    def test_unmatched_paths_share_one_label(self):
+        """404s for arbitrary paths do not create new series"""
+        client = make_client()
+        before = requests_for(UNMATCHED_ENDPOINT, status="404")
+
+        client.get("/does-not-exist")
+        client.get("/also/missing")
+
+        assert requests_for(UNMATCHED_ENDPOINT, status="404") - before == 2
+
+    def test_templates_beyond_the_cap_overflow(self):
+        """Only the first max_endpoints templates get their own label"""
+        client = make_client(max_endpoints=1)
+        before = requests_for(OVERFLOW_ENDPOINT)
+
+        client.get("/first")
+        client.get("/second")
+
+        assert requests_for(OVERFLOW_ENDPOINT) - before == 1
+
+    def test_scrape_reports_series_count(self):
+        """The metrics endpoint records how many series it exported"""
+        client = make_client()
+        client.get("/metrics")
+
+        assert REGISTRY.get_sample_value("metrics_registry_series") > 0
@@ -0,0 +1,61 @@
+"""
+Tests for multiprocess metrics
+Each worker runs in its own interpreter, since prometheus_client picks its
+value storage when first imported
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+from monitoring import metrics
+metrics.http_requests_total.labels(method="GET", endpoint="/health", status=200).inc({requests})
+metrics.active_requests.inc(3)
+if {exit_cleanly}:
+    metrics.mark_process_dead()
+"""
+
+SCRAPE = """
+from monitoring import metrics
+print(metrics.metrics_endpoint().body.decode())
+"""
+
+
+def run(code: str, multiproc_dir: str) -> str:
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=multiproc_dir)
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def sample(metrics_text: str, name: str) -> float:
+    for line in metrics_text.splitlines():
+        if line.startswith(name + "{") or line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not exported")
+
+
+class TestMultiprocessMetrics:
+    """Test suite for metrics shared across worker processes"""
+
+    def test_scrape_aggregates_workers(self, tmp_path):
+        """Counters sum across processes and dead workers leave the live gauges"""
+        multiproc_dir = str(tmp_path)
+        run(WORKER.format(requests=2, exit_cleanly=False), multiproc_dir)
+        run(WORKER.format(requests=5, exit_cleanly=True), multiproc_dir)
+
+        metrics_text = run(SCRAPE, multiproc_dir)
+
+        assert sample(metrics_text, "http_requests_total") == 7
+        # Only the worker that never marked itself dead still counts
+        assert sample(metrics_text, "active_requests") == 3
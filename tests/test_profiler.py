@@ -0,0 +1,82 @@
+"""
+Tests for the on-demand profiler
+"""
+import threading
+import types
+import pytest
+from fastapi import HTTPException
+from monitoring.profiler import Profiler, ProfilerBusy, folded
+from auth.security import get_current_superuser
+
+
+def spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiler:
+    """Test suite for Profiler"""
+
+    def test_cpu_profile_samples_other_threads(self):
+        """Busy threads show up in the folded stacks under their thread name"""
+        stop = threading.Event()
+        worker = threading.Thread(target=spin, args=(stop,), name="spinner")
+        worker.start()
+        try:
+            profile = Profiler().cpu_profile(0.2, interval_ms=5)
+        finally:
+            stop.set()
+            worker.join()
+
+        spinner = [stack for stack in profile["stacks"] if stack.startswith("spinner;")]
+        assert profile["samples"] > 0
+        assert any(stack.split(";")[-1].startswith("spin ") for stack in spinner)
+
+    def test_memory_profile_reports_window_allocations(self):
+        """Memory allocated during the window is attributed to its allocation site"""
+        kept = []
+
+        def allocate():
+            kept.append([bytearray(1024) for _ in range(200)])
+
+        timer = threading.Timer(0.05, allocate)
+        timer.start()
+        report = Profiler().memory_profile(0.2, limit=50)
+        timer.join()
+
+        assert report["mode"] == "snapshot"
+        assert any(
+            allocator["stack"][-1].startswith(__file__) and allocator["size_bytes"] >= 200 * 1024
+            for allocator in report["allocators"]
+        )
+
+    def test_limits_and_concurrent_captures(self):
+        """Captures are bounded in length and run one at a time"""
+        profiler = Profiler(max_seconds=1)
+
+        with pytest.raises(ValueError):
+            profiler.cpu_profile(5)
+
+        profiler._lock.acquire()
+        try:
+            with pytest.raises(ProfilerBusy):
+                profiler.cpu_profile(0.1)
+        finally:
+            profiler._lock.release()
+
+    def test_folded_output(self):
+        """Folded stacks are one line per stack, largest first"""
+        assert folded({"main;a": 1, "main;b": 3}) == "main;b 3\nmain;a 1\n"
+
+
+class TestSuperuserDependency:
+    """Test suite for get_current_superuser"""
+
+    async def test_rejects_regular_users(self):
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_superuser(types.SimpleNamespace(is_superuser=False))
+        assert exc_info.value.status_code == 403
+
+    async def test_allows_superusers(self):
+        user = types.SimpleNamespace(is_superuser=True)
+        assert await get_current_superuser(user) is user
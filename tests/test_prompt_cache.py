@@ -0,0 +1,102 @@
+"""
+Tests for the prompt prefix (KV-cache) snapshots
+Uses a fake llama.cpp model that tokenizes one character per token
+"""
+from agent.prompt_cache import PrefixStateCache, common_prefix_length
+
+
+class FakeLlama:
+    """Tracks evaluated tokens the way llama_cpp.Llama does"""
+
+    def __init__(self):
+        self._input_ids = []
+        self.evaluated = 0
+        self.loads = 0
+
+    @property
+    def n_tokens(self):
+        return len(self._input_ids)
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False):
+        return list(text)
+
+    def reset(self):
+        self._input_ids = []
+
+    def eval(self, tokens):
+        self.evaluated += len(tokens)
+        self._input_ids = self._input_ids + list(tokens)
+
+    def save_state(self):
+        return list(self._input_ids)
+
+    def load_state(self, state):
+        self.loads += 1
+        self._input_ids = list(state)
+
+    def generate(self, prompt: str):
+        """Evaluate only the tokens after the shared prefix, like Llama.generate"""
+        tokens = self.tokenize(prompt.encode())
+        keep = min(common_prefix_length(self._input_ids, tokens), len(tokens) - 1)
+        self._input_ids = self._input_ids[:keep]
+        self.eval(tokens[keep:])
+
+
+PREFIX = "System: You are an AI assistant.\nContext:\n"
+
+
+class TestPrefixStateCache:
+    """Test suite for PrefixStateCache"""
+
+    def test_prefix_evaluated_once(self):
+        """After the first request only the suffix is evaluated"""
+        llama = FakeLlama()
+        cache = PrefixStateCache()
+
+        first = PREFIX + "doc A\nUser: q1\nAssistant:"
+        cache.prepare(llama, first, PREFIX)
+        llama.generate(first)
+
+        # Another prompt evaluated on this replica evicts the prefix from the KV cache
+        llama.reset()
+        llama.generate("Summarize this conversation")
+
+        second = PREFIX + "doc B\nUser: q2\nAssistant:"
+        llama.evaluated = 0
+        cache.prepare(llama, second, PREFIX)
+        llama.generate(second)
+
+        assert llama.loads == 1
+        assert llama.evaluated == len(second) - len(PREFIX)
+
+    def test_warm_prefix_not_restored(self):
+        """No restore when the KV cache already starts with the prefix"""
+        llama = FakeLlama()
+        cache = PrefixStateCache()
+
+        for question in ("q1", "q2"):
+            prompt = PREFIX + f"User: {question}\nAssistant:"
+            cache.prepare(llama, prompt, PREFIX)
+            llama.generate(prompt)
+
+        assert llama.loads == 0
+
+    def test_prompt_without_prefix_untouched(self):
+        """Prompts that do not start with the prefix are left alone"""
+        llama = FakeLlama()
+        cache = PrefixStateCache()
+
+        cache.prepare(llama, "User: hi\nAssistant:", PREFIX)
+
+        assert llama.evaluated == 0
+        assert llama.loads == 0
+
+    def test_oldest_prefix_evicted(self):
+        """Only max_prefixes snapshots are kept"""
+        llama = FakeLlama()
+        cache = PrefixStateCache(max_prefixes=1)
+
+        cache.prepare(llama, "first prefix then question", "first prefix ")
+        cache.prepare(llama, "second prefix then question", "second prefix ")
+
+        assert list(cache._states) == ["second prefix "]
@@ -159,6 +159,39 @@ class TestRAGAPI:
         assert data["count"] > 0
         print(f"\nKorean search: {data['results'][0]['content'][:50]}...")
 
+    def test_batch_search(self, client):
+        """Test multi-query batch search"""
+        add_request = {
+            "documents": [
+                "Python is a programming language used for AI and web development.",
+                "Machine learning enables computers to learn from data.",
+                "SK Hynix produces memory semiconductors."
+            ]
+        }
+        client.post("/api/v1/rag/documents", json=add_request)
+
+        search_request = {
+            "queries": ["What is machine learning?", "Who makes memory chips?"],
+            "k": 1
+        }
+
+        response = client.post("/api/v1/rag/search/batch", json=search_request)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert [r["query"] for r in data["results"]] == search_request["queries"]
+        assert "learn" in data["results"][0]["results"][0]["content"].lower()
+        assert "hynix" in data["results"][1]["results"][0]["content"].lower()
+
+        # Batch results match single-query search
+        single = client.post(
+            "/api/v1/rag/search",
+            json={"query": "What is machine learning?", "k": 1}
+        ).json()
+        assert single["results"] == data["results"][0]["results"]
+        print(f"\nBatch search: {data['count']} queries")
+
     def test_stats_after_adding_documents(self, client):
         """Test stats after adding documents"""
         # Add documents
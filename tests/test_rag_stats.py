@@ -0,0 +1,56 @@
+"""
+Tests for incrementally maintained RAG statistics
+"""
+from agent.rag_stats import RAGStats
+
+
+class TestRAGStats:
+    """Test suite for RAGStats"""
+
+    def test_empty_snapshot(self):
+        """A fresh service reports an uninitialized store"""
+        stats = RAGStats("fake-model")
+        snapshot = stats.snapshot()
+
+        assert snapshot["initialized"] is False
+        assert snapshot["document_count"] == 0
+        assert snapshot["embedding_model"] == "fake-model"
+        assert snapshot["last_ingest_at"] is None
+
+    def test_ingest_accumulates(self):
+        """Counts accumulate across ingests while index size is replaced"""
+        stats = RAGStats("fake-model")
+        stats.set_dimension(384)
+        stats.record_ingest(documents=2, chunks=5, content_bytes=100, index_bytes=7680, index_type="flat")
+        stats.record_ingest(documents=1, chunks=1, content_bytes=20, index_bytes=9216, index_type="flat")
+        snapshot = stats.snapshot()
+
+        assert snapshot["initialized"] is True
+        assert snapshot["source_document_count"] == 3
+        assert snapshot["chunk_count"] == snapshot["document_count"] == 6
+        assert snapshot["index_bytes"] == 9216
+        assert snapshot["memory_bytes"] == 9216 + 120
+        assert snapshot["last_ingest_at"] is not None
+
+    def test_dimension_recorded_once(self):
+        """The first known dimension wins"""
+        stats = RAGStats("fake-model")
+        stats.set_dimension(None)
+        stats.set_dimension(768)
+        stats.set_dimension(384)
+
+        assert stats.snapshot()["embedding_dimension"] == 768
+
+    def test_exported_gauges_are_per_index(self):
+        """Two instances export separate series instead of overwriting one gauge"""
+        from monitoring.metrics import rag_chunks
+
+        RAGStats("fake-model", export_metrics=True, index_name="test-a").record_ingest(
+            documents=1, chunks=4, content_bytes=10, index_bytes=100, index_type="flat"
+        )
+        RAGStats("fake-model", export_metrics=True, index_name="test-b").record_ingest(
+            documents=1, chunks=9, content_bytes=10, index_bytes=100, index_type="flat"
+        )
+
+        assert rag_chunks.labels(index="test-a")._value.get() == 4
+        assert rag_chunks.labels(index="test-b")._value.get() == 9
@@ -0,0 +1,75 @@
+"""
+Tests for the semantic agent response cache
+"""
+import pytest
+from agent.response_cache import ResponseCache
+
+DOCS = [{"id": 1}, {"id": 2}]
+
+
+class TestResponseCache:
+    """Test suite for ResponseCache"""
+
+    def test_near_duplicate_hits(self):
+        """A similar question retrieving the same documents reuses the answer"""
+        cache = ResponseCache(threshold=0.95)
+        cache.put("general", [1.0, 0.0, 0.1], DOCS, kb_version=0, response="Seoul", query="q")
+
+        entry = cache.lookup("general", [1.0, 0.02, 0.1], list(reversed(DOCS)), kb_version=0)
+
+        assert entry is not None
+        assert entry["response"] == "Seoul"
+
+    def test_dissimilar_question_misses(self):
+        """Questions below the similarity threshold are not served from cache"""
+        cache = ResponseCache(threshold=0.95)
+        cache.put("general", [1.0, 0.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("general", [0.0, 1.0, 0.0], DOCS, kb_version=0) is None
+
+    def test_different_documents_miss(self):
+        """The retrieved documents must match exactly"""
+        cache = ResponseCache()
+        cache.put("general", [1.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("general", [1.0, 0.0], [{"id": 1}, {"id": 3}], kb_version=0) is None
+
+    def test_agent_types_isolated(self):
+        """Answers are never shared between agent types"""
+        cache = ResponseCache()
+        cache.put("general", [1.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("support", [1.0, 0.0], DOCS, kb_version=0) is None
+
+    def test_ingestion_invalidates(self):
+        """A new knowledge base version drops all cached answers"""
+        cache = ResponseCache()
+        cache.put("general", [1.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("general", [1.0, 0.0], DOCS, kb_version=1) is None
+        assert cache.lookup("general", [1.0, 0.0], DOCS, kb_version=0) is None
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are ignored"""
+        cache = ResponseCache(ttl=0.0)
+        cache.put("general", [1.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("general", [1.0, 0.0], DOCS, kb_version=0) is None
+
+    def test_ring_evicts_oldest(self):
+        """Only max_entries answers are kept"""
+        cache = ResponseCache(max_entries=2)
+        for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])):
+            cache.put("general", vector, DOCS, kb_version=0, response=str(i), query="q")
+
+        assert cache.lookup("general", [1.0, 0.0], DOCS, kb_version=0) is None
+        assert cache.lookup("general", [-1.0, 0.0], DOCS, kb_version=0)["response"] == "2"
+
+    def test_zero_entries_disables_the_cache(self):
+        """max_entries=0 caches nothing instead of failing, negative sizes are refused"""
+        cache = ResponseCache(max_entries=0)
+        cache.put("general", [1.0, 0.0], DOCS, kb_version=0, response="Seoul", query="q")
+
+        assert cache.lookup("general", [1.0, 0.0], DOCS, kb_version=0) is None
+        with pytest.raises(ValueError):
+            ResponseCache(max_entries=-1)
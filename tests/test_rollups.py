@@ -0,0 +1,99 @@
+"""
+Tests for per-minute/per-hour log rollups
+Uses an in-memory SQLite database (aiosqlite), which supports ON CONFLICT upserts
+"""
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from common.database import Base
+from monitoring.models import APILog, AgentLog, APILogRollup, AgentLogRollup
+from monitoring.rollups import ROLLUPS, MINUTE, HOUR, api_log_rollup
+from monitoring.log_writer import LogWriter
+
+
+@pytest.fixture
+async def session_factory():
+    """Session factory for a fresh database with the log and rollup tables"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[
+                APILog.__table__, AgentLog.__table__,
+                APILogRollup.__table__, AgentLogRollup.__table__
+            ])
+        )
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def api_row(minute, status_code=200, duration=1.0, endpoint="/items"):
+    return {
+        "method": "GET",
+        "endpoint": endpoint,
+        "status_code": status_code,
+        "duration": duration,
+        "timestamp": datetime(2024, 1, 1, 10, minute, 30)
+    }
+
+
+class TestRollup:
+    """Test suite for Rollup aggregation"""
+
+    def test_aggregate_sums_per_bucket(self):
+        """Rows are summed per minute and per hour bucket"""
+        entries = api_log_rollup.aggregate([
+            api_row(5, duration=1.0),
+            api_row(5, duration=2.0),
+            api_row(6, duration=4.0)
+        ])
+
+        minutes = [e for e in entries if e["bucket_seconds"] == MINUTE]
+        hours = [e for e in entries if e["bucket_seconds"] == HOUR]
+        assert [(e["request_count"], e["duration_sum"]) for e in minutes] == [(2, 3.0), (1, 4.0)]
+        assert [(e["request_count"], e["duration_sum"]) for e in hours] == [(3, 7.0)]
+        assert hours[0]["bucket_start"] == datetime(2024, 1, 1, 10)
+
+    def test_window_uses_minutes_until_the_next_hour(self):
+        """Minute buckets cover the partial hour after the cutoff, hour buckets the rest"""
+        clause = api_log_rollup.window(datetime(2024, 1, 1, 9, 45, 10))
+        compiled = clause.compile(compile_kwargs={"literal_binds": True})
+
+        assert "2024-01-01 09:45:00" in str(compiled)
+        assert "2024-01-01 10:00:00" in str(compiled)
+
+
+class TestRollupWriter:
+    """Test suite for rollups maintained by the log writer"""
+
+    async def test_batches_accumulate_into_buckets(self, session_factory):
+        """Each batch adds its counts onto the existing bucket rows"""
+        writer = LogWriter(session_factory, flush_interval_ms=10, rollups=ROLLUPS)
+
+        writer.enqueue(APILog, api_row(5, duration=1.0))
+        writer.enqueue(APILog, api_row(5, status_code=500, duration=3.0))
+        await writer.stop()
+        writer.enqueue(APILog, api_row(5, duration=2.0))
+        writer.enqueue(AgentLog, {
+            "agent_type": "general",
+            "status": "success",
+            "duration": 2.0,
+            "tokens_used": 10,
+            "timestamp": datetime(2024, 1, 1, 10, 5)
+        })
+        await writer.stop()
+
+        async with session_factory() as db:
+            rows = (await db.scalars(
+                select(APILogRollup).where(APILogRollup.bucket_seconds == HOUR)
+                .order_by(APILogRollup.status_code)
+            )).all()
+            agent = await db.scalar(
+                select(AgentLogRollup).where(AgentLogRollup.bucket_seconds == MINUTE)
+            )
+
+        assert [(r.status_code, r.request_count, r.duration_sum) for r in rows] == [
+            (200, 2, 3.0), (500, 1, 3.0)
+        ]
+        assert (agent.request_count, agent.tokens_sum) == (1, 10)
@@ -0,0 +1,151 @@
+"""
+Tests for request tracing
+"""
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from monitoring.tracing import Tracer, TracingMiddleware, FileExporter
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def spans_by_name(trace):
+    return {span["name"]: span for span in trace["spans"]}
+
+
+class TestTracer:
+    """Test suite for Tracer"""
+
+    def test_spans_nest_under_the_root(self):
+        """Child spans record their parent and the whole trace is exported once"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.trace("request"):
+            with tracer.span("outer", step=1):
+                with tracer.span("inner"):
+                    pass
+
+        assert len(exporter.traces) == 1
+        spans = spans_by_name(exporter.traces[0])
+        assert spans["request"]["parent_id"] is None
+        assert spans["outer"]["parent_id"] == spans["request"]["span_id"]
+        assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+        assert spans["outer"]["attributes"] == {"step": 1}
+
+    def test_unsampled_requests_record_nothing(self):
+        """With a zero sample rate neither the root nor its children are recorded"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter, sample_rate=0.0)
+
+        with tracer.trace("request") as root:
+            with tracer.span("child") as child:
+                pass
+
+        assert root is None and child is None
+        assert exporter.traces == []
+
+    def test_spans_outside_a_trace_are_noops(self):
+        """Instrumented code called outside a request does not start traces"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        @tracer.traced("work")
+        def work():
+            return 42
+
+        assert work() == 42
+        assert exporter.traces == []
+
+    def test_exceptions_mark_the_span_as_failed(self):
+        """A raising span is exported with error status and the exception type"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        with pytest.raises(ValueError):
+            with tracer.trace("request"):
+                with tracer.span("child"):
+                    raise ValueError("boom")
+
+        spans = spans_by_name(exporter.traces[0])
+        assert spans["child"]["status"] == "error"
+        assert spans["child"]["attributes"]["error.type"] == "ValueError"
+        assert spans["request"]["status"] == "error"
+
+    def test_spans_beyond_the_cap_are_counted(self):
+        """Traces keep at most max_spans spans"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter, max_spans=3)
+
+        with tracer.trace("request"):
+            for _ in range(5):
+                with tracer.span("child"):
+                    pass
+
+        assert len(exporter.traces[0]["spans"]) == 3
+        assert exporter.traces[0]["dropped_spans"] == 3
+
+    async def test_async_functions_are_traced(self):
+        """The decorator wraps coroutines until they finish"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        @tracer.traced("node")
+        async def node():
+            with tracer.span("inside"):
+                return "done"
+
+        with tracer.trace("request"):
+            assert await node() == "done"
+
+        spans = spans_by_name(exporter.traces[0])
+        assert spans["inside"]["parent_id"] == spans["node"]["span_id"]
+
+    def test_sql_statements_become_spans(self):
+        """Statements on an instrumented engine are recorded without parameters"""
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+        engine = create_engine("sqlite://")
+        tracer.instrument_engine(engine)
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with tracer.trace("request"):
+                conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+
+        spans = [span for span in exporter.traces[0]["spans"] if span["name"] == "sql"]
+        assert len(spans) == 1
+        assert spans[0]["attributes"]["db.statement"] == "SELECT ?"
+        assert "hunter2" not in json.dumps(exporter.traces[0])
+
+
+class TestTracingMiddleware:
+    """Test suite for TracingMiddleware"""
+
+    def test_root_span_is_named_after_the_route(self, tmp_path):
+        """Requests are exported under their route template with the status code"""
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(FileExporter(str(path)))
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+
+        @app.get("/sessions/{session_id}")
+        async def session(session_id: int):
+            with tracer.span("handler"):
+                return {"id": session_id}
+
+        TestClient(app).get("/sessions/7")
+
+        trace = json.loads(path.read_text().splitlines()[0])
+        spans = spans_by_name(trace)
+        assert trace["name"] == "GET /sessions/{session_id}"
+        assert spans[trace["name"]]["attributes"]["http.status_code"] == 200
+        assert spans["handler"]["parent_id"] == spans[trace["name"]]["span_id"]
@@ -0,0 +1,224 @@
+"""
+Tests for the Milvus VectorStore write buffer
+Uses a mocked Collection, so no Milvus server is needed
+"""
+import time
+import pytest
+from unittest.mock import MagicMock
+from pymilvus.exceptions import MilvusException
+from config.settings import settings
+from agent.vector_store import VectorStore, InsertBufferFull
+
+
+@pytest.fixture(autouse=True)
+def shared_version(monkeypatch):
+    """Keep the shared KB version counter out of the database"""
+    version = MagicMock()
+    monkeypatch.setattr("agent.vector_store.kb_version", version)
+    return version
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """VectorStore with a mocked collection, small batches and a short timer"""
+    monkeypatch.setattr(settings, "MILVUS_INSERT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "MILVUS_INSERT_FLUSH_INTERVAL", 0.05)
+    store = VectorStore(collection_name="test")
+    store.collection = MagicMock()
+    yield store
+    if store._flush_timer is not None:
+        store._flush_timer.cancel()
+
+
+def loaded_store(index_type="IVF_FLAT", metric_type="L2"):
+    """VectorStore whose mocked collection is known to be loaded"""
+    store = VectorStore(collection_name="test", index_type=index_type, metric_type=metric_type)
+    store.collection = MagicMock()
+    store._loaded = True
+    store._load_checked_at = time.monotonic()
+    return store
+
+
+def index(index_type, metric_type, params=None):
+    return MagicMock(params={
+        "index_type": index_type, "metric_type": metric_type, "params": params or {}
+    })
+
+
+def inserted_texts(collection):
+    return [text for call in collection.insert.call_args_list for text in call.args[0][1]]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestInsertBuffer:
+    """Test suite for buffered inserts"""
+
+    def test_full_buffer_is_written_at_once(self, store, shared_version):
+        """Reaching the batch size writes without waiting for the timer"""
+        store.insert([[0.1], [0.2]], ["a", "b"], ["{}", "{}"])
+
+        assert inserted_texts(store.collection) == ["a", "b"]
+        assert store._flush_timer is None
+        assert store.version == 1
+        shared_version.bump.assert_called_once_with("test")
+
+    def test_partial_buffer_is_written_by_the_timer(self, store):
+        """A partial batch is written once the flush interval passes"""
+        store.insert([[0.1]], ["a"], ["{}"])
+        assert store.collection.insert.call_count == 0
+
+        assert wait_for(lambda: inserted_texts(store.collection) == ["a"])
+
+    def test_failed_timer_write_is_kept_and_retried(self, store):
+        """Rows from a failed write are retried after a backoff until they land"""
+        store.collection.insert.side_effect = [RuntimeError("milvus down"), None]
+
+        written = store.insert([[0.1]], ["a"], ["{}"])
+
+        assert written.result(timeout=2) is None
+        assert [call.args[0][1] for call in store.collection.insert.call_args_list] == [
+            ["a"], ["a"]
+        ]
+        assert store._buffer == ([], [], [], [])
+        assert store._retries == []
+
+    def test_flush_reports_writes_that_still_fail(self, store, monkeypatch):
+        """A synchronous flush raises and keeps the unwritten rows queued in order"""
+        monkeypatch.setattr(settings, "MILVUS_INSERT_FLUSH_INTERVAL", 60)
+        store.collection.insert.side_effect = RuntimeError("milvus down")
+
+        # The size-triggered write fails without failing the caller
+        store.insert([[0.1], [0.2]], ["a", "b"], ["{}", "{}"])
+        store.insert([[0.3]], ["c"], ["{}"])
+
+        with pytest.raises(RuntimeError):
+            store.flush()
+        assert [text for pending in store._retries for text in pending.batch[1]] == ["a", "b", "c"]
+        assert store.version == 0
+
+    def test_rejected_batch_is_dropped_without_blocking_later_inserts(self, store):
+        """Data Milvus refuses is dropped at once and reported to its caller"""
+        store.collection.insert.side_effect = [
+            MilvusException(message="length of varchar field text exceeds max length"), None
+        ]
+
+        rejected = store.insert([[0.1], [0.2]], ["bad", "x"], ["{}", "{}"])
+        accepted = store.insert([[0.3], [0.4]], ["c", "d"], ["{}", "{}"])
+
+        with pytest.raises(MilvusException):
+            rejected.result(timeout=0)
+        assert accepted.result(timeout=0) is None
+        assert store.collection.insert.call_count == 2
+        assert store._retries == []
+
+    def test_batch_is_dropped_after_max_attempts(self, store, monkeypatch):
+        monkeypatch.setattr(settings, "MILVUS_INSERT_FLUSH_INTERVAL", 60)
+        monkeypatch.setattr(settings, "MILVUS_INSERT_MAX_ATTEMPTS", 2)
+        store.collection.insert.side_effect = RuntimeError("milvus down")
+
+        written = store.insert([[0.1]], ["a"], ["{}"])
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                store.flush_buffer()
+
+        with pytest.raises(RuntimeError):
+            written.result(timeout=0)
+        assert store._retries == []
+
+    def test_rows_that_do_not_fit_the_schema_are_refused(self, store):
+        """Wrong dimensions and oversized text never reach the buffer"""
+        store.dim = 2
+
+        with pytest.raises(ValueError):
+            store.insert([[0.1]], ["a"], ["{}"])
+        with pytest.raises(ValueError):
+            store.insert([[0.1, 0.2]], ["x" * 70000], ["{}"])
+        assert store._buffer == ([], [], [], [])
+
+    def test_full_buffer_refuses_inserts(self, store, monkeypatch):
+        monkeypatch.setattr(settings, "MILVUS_INSERT_BATCH_SIZE", 10)
+        monkeypatch.setattr(settings, "MILVUS_INSERT_MAX_BUFFERED", 2)
+
+        store.insert([[0.1], [0.2]], ["a", "b"], ["{}", "{}"])
+
+        with pytest.raises(InsertBufferFull):
+            store.insert([[0.3]], ["c"], ["{}"])
+
+
+class TestIndexChanges:
+    """Test suite for indexes rebuilt by another process"""
+
+    def test_metric_mismatch_adopts_the_new_index(self):
+        """A metric error re-reads the index and retries with matching params"""
+        store = loaded_store()
+        store.collection.indexes = [index("HNSW", "COSINE", {"M": 16})]
+        store.collection.search.side_effect = [
+            MilvusException(message="metric type not match"), [[]]
+        ]
+
+        assert store.search([0.1], top_k=3) == []
+
+        retry = store.collection.search.call_args_list[1].kwargs
+        assert retry["param"] == {"metric_type": "COSINE", "params": {"ef": 64}}
+        assert store.higher_is_better
+
+    def test_not_loaded_waits_for_the_index_before_loading(self, monkeypatch):
+        """A collection released for a rebuild is reloaded once its new index exists"""
+        monkeypatch.setattr("agent.vector_store.time.sleep", lambda seconds: None)
+        waited = MagicMock()
+        monkeypatch.setattr("agent.vector_store.utility.wait_for_index_building_complete", waited)
+        store = loaded_store()
+        indexes = iter([[], [index("FLAT", "IP")], [index("FLAT", "IP")]])
+        type(store.collection).indexes = property(lambda collection: next(indexes))
+        store.collection.search.side_effect = [
+            MilvusException(message="collection not loaded"), [[]]
+        ]
+
+        store.search([0.1])
+
+        waited.assert_called_once()
+        store.collection.load.assert_called_once()
+        assert (store.index_type, store.metric_type) == ("FLAT", "IP")
+
+    def test_unrelated_errors_are_raised(self):
+        store = loaded_store()
+        store.collection.search.side_effect = MilvusException(message="timeout")
+
+        with pytest.raises(MilvusException):
+            store.search([0.1])
+
+
+class TestSearchMany:
+    """Test suite for multi-query search"""
+
+    def test_hits_are_grouped_per_query(self):
+        """All queries go out in one request and hits come back in query order"""
+        store = loaded_store()
+
+        def hit(id, distance):
+            return MagicMock(id=id, distance=distance, entity={"text": f"doc{id}", "metadata": "{}"})
+
+        store.collection.search.return_value = [
+            [hit(1, 0.1), hit(2, 0.4)],
+            [],
+            [hit(3, 0.2)]
+        ]
+
+        results = store.search_many([[0.1], [0.2], [0.3]], top_k=2)
+
+        store.collection.search.assert_called_once()
+        assert store.collection.search.call_args.kwargs["data"] == [[0.1], [0.2], [0.3]]
+        assert [[hit["id"] for hit in hits] for hits in results] == [[1, 2], [], [3]]
+        assert results[2][0] == {"id": 3, "distance": 0.2, "text": "doc3", "metadata": "{}"}
+
+    def test_no_queries_skip_milvus(self):
+        store = loaded_store()
+
+        assert store.search_many([]) == []
+        store.collection.search.assert_not_called()